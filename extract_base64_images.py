@@ -10,13 +10,61 @@ Suporta dois estilos de imagens Base64:
 2. Reference-style (com ou sem angle brackets):
      [image1]: data:image/png;base64,CODIGO...
      [image1]: <data:image/png;base64,CODIGO...>
+
+Os dois estilos são reconhecidos em uma única passada linear sobre o arquivo.
+As imagens são decodificadas e salvas em um pool de threads, e imagens repetidas
+(mesmo conteúdo) são salvas uma única vez, com todas as referências apontando
+para o mesmo arquivo.
+
+Com --stream, o arquivo é lido via memória mapeada: cada imagem é decodificada
+em blocos direto para o disco e o Markdown limpo é escrito à medida que avança,
+com uso de memória constante (para exports muito grandes).
+
+Aceita vários arquivos, diretórios (busca recursiva por *.md) e padrões glob,
+processados em paralelo. Um índice persistente (--index, criado por padrão no
+diretório informado) guarda o hash de cada imagem salva, compartilhado entre os
+documentos, e o estado de cada Markdown já processado: rodar de novo sobre uma
+árvore sem alterações não decodifica nem escreve nada.
 """
 
 import argparse
 import base64
+import collections
+import concurrent.futures
+import glob
+import hashlib
+import io
+import json
+import mmap
 import os
 import re
 import sys
+import tempfile
+import threading
+
+
+# Tamanho dos blocos de Base64 decodificados por vez no modo streaming.
+# Múltiplo de 4 para que cada bloco seja decodificável isoladamente.
+STREAM_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Marcador que ancora a busca: toda imagem Base64 contém este trecho
+DATA_URI_MARKER = b"data:image/"
+
+# Dados Base64: uma única classe de caracteres gulosa (um estado de DFA, sem
+# retrocesso), portanto o tempo é linear no tamanho dos dados.
+INLINE_DATA_PATTERN = re.compile(rb"[A-Za-z0-9+/=\s]*")
+REFERENCE_DATA_PATTERN = re.compile(rb"[A-Za-z0-9+/= \t]*")
+
+MIME_SUBTYPE_CHARS = frozenset(b"abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ+")
+
+INLINE = "inline"
+REFERENCE = "reference"
+
+# Nome padrão do índice persistente criado nos diretórios processados
+INDEX_FILENAME = ".base64_images_index.json"
+
+# Sufixo dos Markdowns gerados (ignorados ao percorrer diretórios)
+OUTPUT_SUFFIX = "_limpo"
 
 
 def parse_args():
@@ -25,8 +73,10 @@ def parse_args():
         description="Extrai imagens Base64 de um arquivo Markdown e salva como arquivos separados."
     )
     parser.add_argument(
-        "markdown_file",
-        help="Caminho para o arquivo .md contendo imagens Base64.",
+        "paths",
+        nargs="+",
+        help="Arquivos .md contendo imagens Base64, diretórios (busca recursiva por *.md) "
+             "ou padrões glob (ex: 'guias/**/*.md').",
     )
     parser.add_argument(
         "--overwrite",
@@ -38,211 +88,667 @@ def parse_args():
         default="images",
         help="Subdiretório onde as imagens serão salvas (relativo ao Markdown). Padrão: 'images'.",
     )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Processa o arquivo via memória mapeada, decodificando cada imagem em blocos "
+             "direto para o disco (memória constante, para arquivos muito grandes).",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Quantidade de threads para decodificar e salvar as imagens. Padrão: número de CPUs.",
+    )
+    parser.add_argument(
+        "--index",
+        default=None,
+        help="Arquivo do índice persistente de hashes das imagens. Padrão: "
+             f"'{INDEX_FILENAME}' dentro do primeiro diretório informado (sem índice "
+             "quando só arquivos são informados).",
+    )
     return parser.parse_args()
 
 
-def decode_and_save(ref_id, image_type, base64_data, images_dir):
+def decode_and_save(image_name, image_type, base64_data, images_dir):
     """
-    Decodifica uma string Base64, salva a imagem no disco e retorna o
-    caminho relativo do arquivo salvo.
+    Decodifica uma string Base64 e salva a imagem em um arquivo temporário no
+    diretório de imagens, calculando o hash do conteúdo. O arquivo só recebe o
+    nome final em commit_image(), depois da deduplicação.
 
     Args:
-        ref_id: Identificador da referência (usado como nome do arquivo).
+        image_name: Nome do arquivo da imagem, sem extensão (ex: notas_image1).
         image_type: Tipo MIME da imagem (ex: png, jpeg).
-        base64_data: String Base64 codificada.
-        images_dir: Diretório absoluto onde a imagem será salva.
+        base64_data: Bytes ou string Base64 codificada.
+        images_dir: Diretório absoluto onde a imagem será salva (já existente).
 
     Returns:
-        Caminho relativo do arquivo salvo (ex: images/image1.png), ou None em caso de erro.
+        Tupla (nome_do_arquivo, caminho_temporario, hash_sha256, tamanho).
+
+    Raises:
+        binascii.Error: Se o Base64 for inválido.
+    """
+    if isinstance(base64_data, str):
+        base64_data = base64_data.encode("ascii")
+
+    # Remove espaços e quebras de linha que possam existir no Base64
+    base64_clean = base64_data.translate(None, b" \t\r\n\x0b\x0c")
+
+    # Decodifica o Base64 para bytes binários
+    image_bytes = base64.b64decode(base64_clean)
+
+    # Monta o nome do arquivo de saída (ex: notas_image1.png)
+    image_filename = f"{image_name}.{image_extension(image_type)}"
+    part_path = create_part_file(images_dir, image_filename)
+
+    # Salva a imagem no disco
+    with open(part_path, "wb") as img_file:
+        img_file.write(image_bytes)
+
+    digest = hashlib.sha256(image_bytes).hexdigest()
+    return image_filename, part_path, digest, len(image_bytes)
+
+
+def create_part_file(images_dir, image_filename):
     """
-    # Normaliza o tipo MIME para extensão de arquivo
+    Cria o arquivo temporário de uma imagem, com nome único: documentos e imagens
+    são processados em paralelo, e duas chamadas nunca podem escrever no mesmo.
+    """
+    fd, part_path = tempfile.mkstemp(prefix=f".{image_filename}.", suffix=".part", dir=images_dir)
+    os.close(fd)
+    return part_path
+
+
+def image_extension(image_type):
+    """Normaliza o tipo MIME da imagem para extensão de arquivo (ex: jpeg -> jpg)."""
     ext_map = {
         "jpeg": "jpg",
         "svg+xml": "svg",
     }
-    extension = ext_map.get(image_type.lower(), image_type.lower())
+    return ext_map.get(image_type.lower(), image_type.lower())
 
-    # Remove espaços e quebras de linha que possam existir no Base64
-    base64_clean = re.sub(r"\s+", "", base64_data)
 
-    # Decodifica o Base64 para bytes binários
-    try:
-        image_bytes = base64.b64decode(base64_clean)
-    except Exception as e:
-        print(f"  [ERRO] Não foi possível decodificar '{ref_id}': {e}")
-        return None
+def decode_and_save_stream(image_name, image_type, buffer, start, end, images_dir):
+    """
+    Decodifica em blocos o Base64 em buffer[start:end] direto para um arquivo
+    temporário, calculando o hash à medida que avança, sem nunca copiar todo o
+    conteúdo para a memória.
 
-    # Monta o nome do arquivo de saída (ex: image1.png)
-    image_filename = f"{ref_id}.{extension}"
-    image_path = os.path.join(images_dir, image_filename)
+    Args:
+        image_name: Nome do arquivo da imagem, sem extensão (ex: notas_image1).
+        image_type: Tipo MIME da imagem (ex: png, jpeg).
+        buffer: Buffer de bytes (ex: mmap) com o conteúdo do Markdown.
+        start: Posição inicial dos dados Base64 no buffer.
+        end: Posição final (exclusiva) dos dados Base64 no buffer.
+        images_dir: Diretório absoluto onde a imagem será salva (já existente).
 
-    # Cria o diretório se não existir
-    os.makedirs(images_dir, exist_ok=True)
+    Returns:
+        Tupla (nome_do_arquivo, caminho_temporario, hash_sha256, tamanho).
 
-    # Salva a imagem no disco
-    with open(image_path, "wb") as img_file:
-        img_file.write(image_bytes)
+    Raises:
+        binascii.Error: Se o Base64 for inválido.
+    """
+    image_filename = f"{image_name}.{image_extension(image_type)}"
+    part_path = create_part_file(images_dir, image_filename)
 
-    print(f"  Salva: {image_filename} ({len(image_bytes)} bytes)")
-    return image_filename
+    size = 0
+    pending = b""
+    digest = hashlib.sha256()
+    try:
+        with open(part_path, "wb") as img_file:
+            for chunk_start in range(start, end, STREAM_CHUNK_SIZE):
+                chunk = buffer[chunk_start:min(chunk_start + STREAM_CHUNK_SIZE, end)]
+                # Remove espaços e quebras de linha que possam existir no Base64
+                pending += chunk.translate(None, b" \t\r\n\x0b\x0c")
+                usable = len(pending) - len(pending) % 4
+                image_bytes = base64.b64decode(pending[:usable])
+                pending = pending[usable:]
+                img_file.write(image_bytes)
+                digest.update(image_bytes)
+                size += len(image_bytes)
+
+            # Sobra sem múltiplo de 4: decodifica para obter o mesmo erro de padding
+            if pending:
+                image_bytes = base64.b64decode(pending)
+                img_file.write(image_bytes)
+                digest.update(image_bytes)
+                size += len(image_bytes)
+    except Exception:
+        os.remove(part_path)
+        raise
+
+    return image_filename, part_path, digest.hexdigest(), size
+
+
+class ImageIndex:
+    """
+    Índice das imagens salvas, por hash SHA-256 do conteúdo, e dos Markdowns já
+    processados. Com um caminho, é carregado e salvo em disco (JSON), com os
+    caminhos relativos ao diretório do índice, e compartilhado entre documentos.
+    Seguro para uso por várias threads.
+    """
 
+    def __init__(self, path=None):
+        self.path = path
+        self.lock = threading.Lock()
+        self.images = {}     # hash -> caminho absoluto da imagem
+        self.paths = {}      # caminho absoluto da imagem -> hash (inverso de images)
+        self.documents = {}  # caminho absoluto do Markdown -> estado registrado
+        self.dirty = False
+
+        if path and os.path.isfile(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                root = os.path.dirname(path)
+                self.images = {
+                    digest: os.path.normpath(os.path.join(root, rel))
+                    for digest, rel in data.get("images", {}).items()
+                }
+                self.documents = {
+                    os.path.normpath(os.path.join(root, rel)): dict(
+                        state, output=os.path.normpath(os.path.join(root, state["output"]))
+                    )
+                    for rel, state in data.get("documents", {}).items()
+                }
+            except (OSError, ValueError) as e:
+                print(f"Aviso: índice ignorado ({path}): {e}")
+        self.paths = {image_path: digest for digest, image_path in self.images.items()}
+
+    def find_image(self, digest):
+        """Retorna o caminho da imagem já salva com este hash, ou None."""
+        path = self.images.get(digest)
+        if path is not None and os.path.isfile(path):
+            return path
+        return None
 
-def extract_reference_style(markdown_text, images_dir, images_rel):
+    def add_image(self, digest, path):
+        """Registra uma imagem salva."""
+        old_path = self.images.get(digest)
+        if old_path is not None and self.paths.get(old_path) == digest:
+            del self.paths[old_path]
+        self.images[digest] = path
+        self.paths[path] = digest
+        self.dirty = True
+
+    def is_path_in_use(self, path):
+        """
+        True se o caminho é o arquivo de uma imagem indexada que ainda existe.
+        A entrada de uma imagem cujo arquivo foi apagado é descartada, liberando o nome.
+        """
+        digest = self.paths.get(path)
+        if digest is None:
+            return False
+        if os.path.isfile(path):
+            return True
+        del self.paths[path]
+        if self.images.get(digest) == path:
+            del self.images[digest]
+        self.dirty = True
+        return False
+
+    def is_unchanged(self, md_path, output_md):
+        """True se o Markdown não mudou desde o último processamento e a saída ainda existe."""
+        state = self.documents.get(md_path)
+        # A saída registrada é o próprio Markdown quando ele não tinha imagens
+        if state is None or state.get("output") not in (output_md, md_path):
+            return False
+        if not os.path.isfile(state["output"]):
+            return False
+        stat = os.stat(md_path)
+        return state.get("size") == stat.st_size and state.get("mtime_ns") == stat.st_mtime_ns
+
+    def record_document(self, md_path, output_md):
+        """Registra o estado atual de um Markdown processado."""
+        stat = os.stat(md_path)
+        state = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "output": output_md,
+        }
+        with self.lock:
+            if self.documents.get(md_path) != state:
+                self.documents[md_path] = state
+                self.dirty = True
+
+    def save(self):
+        """Grava o índice em disco, apenas se algo mudou."""
+        if not self.path or not self.dirty:
+            return
+        root = os.path.dirname(self.path)
+
+        def relative(path):
+            return os.path.relpath(path, root).replace(os.sep, "/")
+
+        data = {
+            "images": {digest: relative(path) for digest, path in sorted(self.images.items())},
+            "documents": {
+                relative(md_path): dict(state, output=relative(state["output"]))
+                for md_path, state in sorted(self.documents.items())
+            },
+        }
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+        self.dirty = False
+
+
+def commit_image(decoded, images_dir, index):
     """
-    Processa definições de referência com Base64 (reference-style).
-    Formato esperado (com ou sem angle brackets):
-        [image1]: <data:image/png;base64,iVBORw0KGgo...>
-        [image1]: data:image/png;base64,iVBORw0KGgo...
+    Dá o nome final a uma imagem decodificada, ou a descarta se uma imagem com o
+    mesmo conteúdo já foi salva (neste ou em outro documento), reaproveitando o
+    arquivo existente.
 
-    Substitui cada definição pelo caminho relativo do arquivo salvo:
-        [image1]: images/image1.png
+    Um arquivo usado por outra imagem do índice nunca é sobrescrito: ao rodar de
+    novo sobre um documento editado as imagens inline são renumeradas, e o nome
+    pode pertencer a outra imagem, talvez referenciada por outro documento. A
+    imagem recebe então o primeiro nome livre com sufixo (ex: notas_img_2_2.png).
 
     Args:
-        markdown_text: Conteúdo completo do Markdown.
-        images_dir: Caminho absoluto do diretório para salvar as imagens.
-        images_rel: Caminho relativo do diretório de imagens (para o Markdown).
+        decoded: Tupla retornada por decode_and_save() ou decode_and_save_stream().
+        images_dir: Diretório absoluto onde as imagens são salvas.
+        index: ImageIndex com as imagens já salvas.
 
     Returns:
-        Tupla (texto_modificado, quantidade_de_imagens_extraidas).
-    """
-    # Regex para definições de referência com data URI Base64.
-    # Suporta com e sem angle brackets < >.
-    # Grupo 1: ID da referência (ex: image1)
-    # Grupo 2: tipo MIME da imagem (ex: png, jpeg)
-    # Grupo 3: dados Base64
-    pattern = re.compile(
-        r"^\[([^\]]+)\]:\s*"             # [ref_id]:  (início de linha)
-        r"<?data:image/([a-zA-Z+]+);"    # <data:image/EXTENSAO;  (< opcional)
-        r"base64,"                        # base64,
-        r"([A-Za-z0-9+/=\s]+?)"         # CODIGO_BASE64
-        r">?\s*$",                        # > opcional no final da linha
-        re.MULTILINE,
-    )
+        Caminho absoluto do arquivo que a referência deve usar.
+    """
+    image_filename, part_path, digest, size = decoded
+
+    with index.lock:
+        existing = index.find_image(digest)
+        if existing is not None:
+            os.remove(part_path)
+            print(f"  Duplicada: {image_filename} -> {existing}")
+            return existing
 
-    count = 0
+        image_path = os.path.join(images_dir, image_filename)
+        stem, ext = os.path.splitext(image_path)
+        suffix = 1
+        # Os nomes com sufixo também não podem apagar arquivos fora do índice
+        while index.is_path_in_use(image_path) or (suffix > 1 and os.path.exists(image_path)):
+            suffix += 1
+            image_path = f"{stem}_{suffix}{ext}"
+        os.replace(part_path, image_path)
+        index.add_image(digest, image_path)
 
-    def replacer(match):
-        nonlocal count
+    print(f"  Salva: {os.path.basename(image_path)} ({size} bytes)")
+    return image_path
 
-        ref_id = match.group(1)
-        image_type = match.group(2)
-        base64_data = match.group(3)
 
-        rel_path = decode_and_save(ref_id, image_type, base64_data, images_dir)
-        if rel_path is None:
-            return match.group(0)  # mantém o original em caso de erro
+def copy_range(buffer, start, end, out_file):
+    """Copia buffer[start:end] para out_file em blocos de tamanho limitado."""
+    for chunk_start in range(start, end, STREAM_CHUNK_SIZE):
+        out_file.write(buffer[chunk_start:min(chunk_start + STREAM_CHUNK_SIZE, end)])
 
-        count += 1
-        # Substitui a definição pelo caminho relativo do arquivo
-        return f"[{ref_id}]: {images_rel}/{rel_path}"
 
-    new_text = pattern.sub(replacer, markdown_text)
-    return new_text, count
+def scan_data_uri_images(buffer):
+    """
+    Tokenizador de passada única que encontra as imagens Base64 dos dois estilos:
+
+        ![alt text](data:image/png;base64,CODIGO...)
+        [image1]: <data:image/png;base64,CODIGO...>
+        [image1]: data:image/png;base64,CODIGO...
 
+    A busca avança com bytes.find() até cada marcador "data:image/", valida o
+    prefixo olhando para trás (no máximo até o fim da imagem anterior) e os dados
+    olhando para frente. Nenhum byte é examinado mais de uma vez por marcador,
+    então o tempo é linear mesmo com payloads de vários MB.
 
-def extract_inline_style(markdown_text, base_name, images_dir, images_rel):
+    Args:
+        buffer: Buffer de bytes (bytes ou mmap) com o conteúdo do Markdown (UTF-8).
+
+    Yields:
+        Tuplas (estilo, inicio, fim, nome, tipo, inicio_dados, fim_dados), onde
+        estilo é INLINE ou REFERENCE, buffer[inicio:fim] é o trecho a substituir e
+        nome é o alt text (inline) ou o ID da referência (reference-style).
     """
-    Processa imagens inline com Base64.
-    Formato esperado:
-        ![alt text](data:image/png;base64,iVBORw0KGgo...)
+    floor = 0  # Nada antes desta posição pode fazer parte de uma nova imagem
+    at = buffer.find(DATA_URI_MARKER)
+
+    while at != -1:
+        token = _match_data_uri_at(buffer, at, floor)
+        if token is None:
+            at = buffer.find(DATA_URI_MARKER, at + 1)
+            continue
+
+        yield token
+        floor = token[2]
+        at = buffer.find(DATA_URI_MARKER, floor)
+
+
+def _match_data_uri_at(buffer, at, floor):
+    """Valida a imagem cujo marcador "data:image/" está em buffer[at]. Retorna o token ou None."""
+    # Tipo MIME e "base64," depois do marcador
+    type_start = at + len(DATA_URI_MARKER)
+    type_end = type_start
+    while type_end < len(buffer) and buffer[type_end] in MIME_SUBTYPE_CHARS:
+        type_end += 1
+    if type_end == type_start or buffer[type_end:type_end + 8] != b";base64,":
+        return None
+    image_type = buffer[type_start:type_end].decode("ascii")
+    data_start = type_end + 8
+
+    # Inline: o marcador vem logo depois de "](" e o alt text começa no primeiro
+    # "![" da linha sem nenhum "]" entre ele e o marcador
+    if at - 2 >= floor and buffer[at - 2:at] == b"](":
+        alt_end = at - 2
+        segment_start = max(
+            floor,
+            buffer.rfind(b"\n", floor, alt_end) + 1,
+            buffer.rfind(b"]", floor, alt_end) + 1,
+        )
+        bang = buffer.find(b"![", segment_start, alt_end)
+        if bang == -1:
+            return None
+
+        data_end = INLINE_DATA_PATTERN.match(buffer, data_start).end()
+        if data_end == data_start or buffer[data_end:data_end + 1] != b")":
+            return None
+
+        alt_text = buffer[bang + 2:alt_end].decode("utf-8")
+        return (INLINE, bang, data_end + 1, alt_text, image_type, data_start, data_end)
+
+    # Reference-style: "[ref_id]:" no início da linha, espaços e "<" opcionais
+    colon = at
+    if colon > floor and buffer[colon - 1:colon] == b"<":
+        colon -= 1
+    while colon > floor and buffer[colon - 1:colon] in (b" ", b"\t"):
+        colon -= 1
+    if colon - 2 < floor or buffer[colon - 2:colon] != b"]:":
+        return None
+    id_end = colon - 2
+    line_start = buffer.rfind(b"\n", 0, id_end) + 1
+    if line_start < floor or buffer[line_start:line_start + 1] != b"[":
+        return None
+    ref_id = buffer[line_start + 1:id_end]
+    if not ref_id or b"]" in ref_id:
+        return None
+
+    # Os dados vão até o fim da linha, com ">" e espaços opcionais no final
+    data_end = REFERENCE_DATA_PATTERN.match(buffer, data_start).end()
+    match_end = data_end
+    data_end = data_start + len(buffer[data_start:data_end].rstrip(b" \t"))
+    if buffer[match_end:match_end + 1] == b">":
+        match_end += 1
+        while buffer[match_end:match_end + 1] in (b" ", b"\t"):
+            match_end += 1
+    line_end = buffer[match_end:match_end + 2]
+    if data_end == data_start or not (line_end == b"" or line_end[:1] == b"\n" or line_end == b"\r\n"):
+        return None
+
+    return (REFERENCE, line_start, match_end, ref_id.decode("utf-8"), image_type, data_start, data_end)
 
-    Substitui pela referência ao arquivo salvo:
+
+def extract_images(buffer, out_file, base_name, images_dir, md_dir, stream=False, jobs=None,
+                   index=None, executor=None):
+    """
+    Extrai as imagens dos dois estilos (reference-style e inline) em uma única
+    passada sobre o buffer, escrevendo o Markdown limpo em out_file à medida que
+    avança.
+
+    A decodificação e a escrita das imagens rodam em um pool de threads. Imagens
+    com conteúdo idêntico (mesmo hash SHA-256, inclusive de outros documentos do
+    mesmo índice) são salvas uma única vez e todas as referências apontam para o
+    mesmo arquivo.
+
+    Cada definição reference-style é substituída pelo caminho do arquivo salvo:
+        [image1]: images/notas_image1.png
+    E cada imagem inline pela referência ao arquivo salvo:
         ![alt text](images/notas_img_1.png)
 
+    Os arquivos levam o nome base do documento: documentos da mesma pasta que
+    definem a mesma referência (ex: [image1]) não sobrescrevem um ao outro.
+
     Args:
-        markdown_text: Conteúdo completo do Markdown.
+        buffer: Buffer de bytes (bytes ou mmap) com o conteúdo do Markdown (UTF-8).
+        out_file: Arquivo binário onde o Markdown limpo será escrito.
         base_name: Nome base do arquivo para nomear as imagens.
         images_dir: Caminho absoluto do diretório para salvar as imagens.
-        images_rel: Caminho relativo do diretório de imagens (para o Markdown).
+        md_dir: Diretório do Markdown, base dos caminhos relativos das referências.
+        stream: Se True, decodifica cada imagem em blocos direto para o disco, com
+            memória limitada ao tamanho de um bloco por thread.
+        jobs: Quantidade de threads (padrão: número de CPUs).
+        index: ImageIndex compartilhado (padrão: um índice novo, só em memória).
+        executor: Pool de threads compartilhado (padrão: um pool próprio com jobs threads).
 
     Returns:
-        Tupla (texto_modificado, quantidade_de_imagens_extraidas).
-    """
-    # Regex para imagens inline com data URI Base64.
-    # Grupo 1: alt text (pode estar vazio)
-    # Grupo 2: tipo MIME da imagem (ex: png, jpeg, gif, webp)
-    # Grupo 3: dados Base64
-    pattern = re.compile(
-        r"!\[([^\]]*)\]"                       # ![alt text]
-        r"\("                                   # (
-        r"data:image/([a-zA-Z+]+);"            # data:image/EXTENSAO;
-        r"base64,"                              # base64,
-        r"([A-Za-z0-9+/=\s]+)"                # CODIGO_BASE64
-        r"\)"                                   # )
-    )
+        Tupla (quantidade_de_referencias, quantidade_de_inline).
+    """
+    jobs = jobs or os.cpu_count() or 1
+    if index is None:
+        index = ImageIndex()
+    counts = {REFERENCE: 0, INLINE: 0}
+    position = 0  # Tudo antes desta posição já foi escrito em out_file
+    inline_index = 0
+    images_dir_ready = False
+    pending = collections.deque()
+
+    def finish_oldest():
+        """Escreve no Markdown a imagem mais antiga ainda pendente, na ordem do texto."""
+        nonlocal position
+        style, start, end, name, image_name, future = pending.popleft()
+        try:
+            image_path = commit_image(future.result(), images_dir, index)
+        except Exception as e:
+            print(f"  [ERRO] Não foi possível decodificar '{image_name}': {e}")
+            return  # mantém o original em caso de erro
+        rel_path = os.path.relpath(image_path, md_dir).replace(os.sep, "/")
+
+        # Escreve o texto anterior à imagem e a referência ao arquivo salvo
+        copy_range(buffer, position, start, out_file)
+        if style == REFERENCE:
+            out_file.write(f"[{name}]: {rel_path}".encode("utf-8"))
+        else:
+            out_file.write(f"![{name}]({rel_path})".encode("utf-8"))
+        counts[style] += 1
+        position = end
+
+    own_executor = executor is None
+    if own_executor:
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=jobs)
 
-    count = 0
+    try:
+        for style, start, end, name, image_type, data_start, data_end in scan_data_uri_images(buffer):
+            if not images_dir_ready:
+                # Cria o diretório uma única vez, antes da primeira imagem
+                os.makedirs(images_dir, exist_ok=True)
+                images_dir_ready = True
+
+            if style == REFERENCE:
+                image_name = f"{base_name}_{name}"
+            else:
+                inline_index += 1
+                image_name = f"{base_name}_img_{inline_index}"
+
+            if stream:
+                future = executor.submit(
+                    decode_and_save_stream, image_name, image_type, buffer, data_start, data_end, images_dir
+                )
+            else:
+                future = executor.submit(
+                    decode_and_save, image_name, image_type, buffer[data_start:data_end], images_dir
+                )
+            pending.append((style, start, end, name, image_name, future))
+
+            # Limita as imagens em andamento para manter a memória limitada
+            while len(pending) > jobs * 2:
+                finish_oldest()
+
+        while pending:
+            finish_oldest()
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+    copy_range(buffer, position, len(buffer), out_file)
+    return counts[REFERENCE], counts[INLINE]
 
-    def replacer(match):
-        nonlocal count
-        count += 1
 
-        alt_text = match.group(1)
-        image_type = match.group(2)
-        base64_data = match.group(3)
+def main():
+    args = parse_args()
 
-        ref_id = f"{base_name}_img_{count}"
-        rel_path = decode_and_save(ref_id, image_type, base64_data, images_dir)
-        if rel_path is None:
-            count -= 1
-            return match.group(0)
+    md_paths, directories = collect_markdown_files(args.paths)
+    if not md_paths:
+        print(f"Erro: nenhum arquivo .md encontrado em: {' '.join(args.paths)}")
+        sys.exit(1)
 
-        return f"![{alt_text}]({images_rel}/{rel_path})"
+    # Índice persistente: explícito, ou dentro do primeiro diretório informado
+    index_path = args.index
+    if index_path is None and directories:
+        index_path = os.path.join(directories[0], INDEX_FILENAME)
+    index = ImageIndex(os.path.abspath(index_path) if index_path else None)
+
+    jobs = args.jobs or os.cpu_count() or 1
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as image_executor:
+        if len(md_paths) == 1:
+            results = [process_markdown_file(md_paths[0], args, index, image_executor)]
+        else:
+            # Arquivos em paralelo, compartilhando o pool de imagens e o índice
+            with concurrent.futures.ThreadPoolExecutor(max_workers=min(jobs, len(md_paths))) as file_executor:
+                results = list(file_executor.map(
+                    lambda md_path: process_markdown_file(md_path, args, index, image_executor),
+                    md_paths,
+                ))
+
+    index.save()
+
+    ref_count = sum(result[0] for result in results if result)
+    inline_count = sum(result[1] for result in results if result)
+    skipped = sum(1 for result in results if result is None)
+    total = ref_count + inline_count
 
-    new_text = pattern.sub(replacer, markdown_text)
-    return new_text, count
+    if len(md_paths) > 1:
+        print(f"\nArquivos: {len(md_paths)} (sem alterações desde a última execução: {skipped})")
 
+    if total == 0:
+        if skipped:
+            print("\nNenhuma imagem nova para extrair.")
+        else:
+            print("\nNenhuma imagem Base64 encontrada.")
+        sys.exit(0)
 
-def main():
-    args = parse_args()
+    print(f"\nTotal de imagens extraídas: {total} (referências: {ref_count}, inline: {inline_count})")
 
-    md_path = os.path.abspath(args.markdown_file)
 
-    # Verifica se o arquivo existe
-    if not os.path.isfile(md_path):
-        print(f"Erro: arquivo não encontrado: {md_path}")
-        sys.exit(1)
+def collect_markdown_files(paths):
+    """
+    Expande os caminhos da linha de comando em uma lista de arquivos Markdown.
+
+    Args:
+        paths: Arquivos, diretórios (busca recursiva por *.md) ou padrões glob.
+
+    Returns:
+        Tupla (arquivos_md_absolutos_sem_repeticao, diretorios_informados).
+    """
+    md_paths = []
+    directories = []
+    for path in paths:
+        if os.path.isdir(path):
+            directories.append(os.path.abspath(path))
+            found = glob.glob(os.path.join(glob.escape(path), "**", "*.md"), recursive=True)
+            # Não reprocessa os Markdowns gerados por execuções anteriores
+            found = [f for f in found if not os.path.splitext(f)[0].endswith(OUTPUT_SUFFIX)]
+        elif glob.has_magic(path):
+            found = glob.glob(path, recursive=True)
+        elif os.path.isfile(path):
+            found = [path]
+        else:
+            print(f"Erro: arquivo não encontrado: {os.path.abspath(path)}")
+            sys.exit(1)
+        md_paths.extend(sorted(os.path.abspath(f) for f in found if os.path.isfile(f)))
+
+    return list(dict.fromkeys(md_paths)), directories
+
+
+def process_markdown_file(md_path, args, index, executor):
+    """
+    Extrai as imagens de um Markdown.
 
+    Returns:
+        Tupla (referências, inline), ou None se o arquivo não mudou desde a
+        última execução registrada no índice.
+    """
     # Deriva o diretório de saída e o nome base a partir do arquivo de entrada
     md_dir = os.path.dirname(md_path)
     base_name = os.path.splitext(os.path.basename(md_path))[0]
 
     # Diretório onde as imagens serão salvas (subpasta do diretório do Markdown)
-    images_rel = args.images_dir
-    images_dir = os.path.join(md_dir, images_rel)
+    images_dir = os.path.join(md_dir, args.images_dir)
+
+    # Decide onde salvar o Markdown resultante
+    if args.overwrite:
+        output_md = md_path
+    else:
+        output_md = os.path.join(md_dir, f"{base_name}{OUTPUT_SUFFIX}.md")
+
+    if index.is_unchanged(md_path, output_md):
+        print(f"Sem alterações: {md_path}")
+        return None
 
     print(f"Processando: {md_path}")
     print(f"Imagens serão salvas em: {images_dir}")
 
-    # Lê o conteúdo do Markdown
-    with open(md_path, "r", encoding="utf-8") as f:
-        content = f.read()
+    run = run_streaming if args.stream else run_in_memory
+    ref_count, inline_count = run(
+        md_path, output_md, base_name, images_dir, args.jobs, index, executor
+    )
 
-    # Primeiro processa as definições reference-style (mais comum no caso do usuário)
-    print("\n--- Extraindo referências (reference-style) ---")
-    content, ref_count = extract_reference_style(content, images_dir, images_rel)
+    if ref_count + inline_count:
+        print(f"Markdown salvo em: {output_md}")
+        index.record_document(md_path, output_md)
+    elif os.path.isfile(output_md):
+        index.record_document(md_path, output_md)
+    else:
+        # Sem imagens e sem saída: registra para não ler o arquivo de novo
+        index.record_document(md_path, md_path)
+    return ref_count, inline_count
 
-    # Depois processa imagens inline
-    print("\n--- Extraindo imagens inline ---")
-    content, inline_count = extract_inline_style(content, base_name, images_dir, images_rel)
 
-    total = ref_count + inline_count
+def run_in_memory(md_path, output_md, base_name, images_dir, jobs=None, index=None, executor=None):
+    """Processa o Markdown inteiro em memória. Retorna (referências, inline)."""
+    # Lê o conteúdo do Markdown
+    with open(md_path, "rb") as f:
+        content = f.read()
 
-    if total == 0:
-        print("\nNenhuma imagem Base64 encontrada no arquivo.")
-        sys.exit(0)
+    print("\n--- Extraindo imagens ---")
+    out_buffer = io.BytesIO()
+    ref_count, inline_count = extract_images(
+        content, out_buffer, base_name, images_dir, os.path.dirname(md_path),
+        jobs=jobs, index=index, executor=executor,
+    )
 
-    # Decide onde salvar o Markdown resultante
-    if args.overwrite:
-        output_md = md_path
-    else:
-        output_md = os.path.join(md_dir, f"{base_name}_limpo.md")
+    if ref_count + inline_count:
+        with open(output_md, "wb") as f:
+            f.write(out_buffer.getvalue())
 
-    with open(output_md, "w", encoding="utf-8") as f:
-        f.write(content)
+    return ref_count, inline_count
 
-    print(f"\nTotal de imagens extraídas: {total} (referências: {ref_count}, inline: {inline_count})")
-    print(f"Markdown salvo em: {output_md}")
+
+def run_streaming(md_path, output_md, base_name, images_dir, jobs=None, index=None, executor=None):
+    """
+    Processa o Markdown via memória mapeada, escrevendo o resultado em um arquivo
+    temporário que só substitui output_md se alguma imagem foi extraída.
+    Retorna (referências, inline).
+    """
+    print("\n--- Extraindo imagens (streaming) ---")
+    fd, temp_path = tempfile.mkstemp(suffix=".md", dir=os.path.dirname(output_md))
+    try:
+        with open(fd, "wb") as out_file, open(md_path, "rb") as md_file:
+            if os.fstat(md_file.fileno()).st_size == 0:
+                return 0, 0
+            with mmap.mmap(md_file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                ref_count, inline_count = extract_images(
+                    buffer, out_file, base_name, images_dir, os.path.dirname(md_path),
+                    stream=True, jobs=jobs, index=index, executor=executor,
+                )
+
+        if ref_count + inline_count:
+            os.replace(temp_path, output_md)
+        return ref_count, inline_count
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark do tokenizador de imagens Base64 do extract_base64_images.py.
+
+Gera Markdowns sintéticos com payloads de vários MB (nos dois estilos, inline e
+reference-style) e mede o tempo do tokenizador de passada única para tamanhos
+crescentes. Se o tempo por MB se mantém estável, a escala é linear.
+
+Também mede, para comparação, as duas passadas de regex usadas antes
+(reference-style com padrão preguiçoso + MULTILINE, seguida da inline).
+
+Uso:
+    python extract_base64_images_benchmark.py
+    python extract_base64_images_benchmark.py --sizes 1 4 16 64 --repeat 5
+"""
+
+import argparse
+import base64
+import os
+import re
+import time
+
+from extract_base64_images import scan_data_uri_images
+
+
+# Padrões usados antes do tokenizador, mantidos aqui só para comparação
+LEGACY_REFERENCE_PATTERN = re.compile(
+    r"^\[([^\]]+)\]:\s*<?data:image/([a-zA-Z+]+);base64,([A-Za-z0-9+/=\s]+?)>?\s*$",
+    re.MULTILINE,
+)
+LEGACY_INLINE_PATTERN = re.compile(
+    r"!\[([^\]]*)\]\(data:image/([a-zA-Z+]+);base64,([A-Za-z0-9+/=\s]+)\)"
+)
+
+
+def parse_args():
+    """Processa os argumentos da linha de comando."""
+    parser = argparse.ArgumentParser(
+        description="Mede a escala do tokenizador de imagens Base64 em payloads sintéticos."
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[1, 2, 4, 8, 16, 32],
+        help="Tamanhos aproximados do Markdown em MB. Padrão: 1 2 4 8 16 32.",
+    )
+    parser.add_argument(
+        "--images",
+        type=int,
+        default=8,
+        help="Quantidade de imagens em cada Markdown (metade de cada estilo). Padrão: 8.",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Repetições por tamanho; vale o menor tempo. Padrão: 3.",
+    )
+    parser.add_argument(
+        "--no-legacy",
+        action="store_true",
+        help="Não mede as duas passadas de regex antigas.",
+    )
+    return parser.parse_args()
+
+
+def build_markdown(size_mb, images):
+    """Monta um Markdown sintético de ~size_mb MB com imagens dos dois estilos."""
+    payload_bytes = size_mb * 1024 * 1024 * 3 // 4 // images
+    payload = base64.b64encode(os.urandom(payload_bytes)).decode("ascii")
+
+    parts = ["# Documento sintético\n\n"]
+    for index in range(images):
+        if index % 2 == 0:
+            parts.append(f"Parágrafo {index}.\n\n![figura {index}](data:image/png;base64,{payload})\n\n")
+        else:
+            parts.append(f"Veja a figura [image{index}].\n\n[image{index}]: <data:image/png;base64,{payload}>\n\n")
+    return "".join(parts)
+
+
+def best_time(function, repeat):
+    """Executa function repeat vezes e retorna o menor tempo em segundos."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    args = parse_args()
+
+    print(f"{'MB':>6} {'tokens':>7} {'scan (s)':>10} {'s/MB':>9} {'legacy (s)':>11}")
+    per_mb = []
+    for size_mb in args.sizes:
+        markdown = build_markdown(size_mb, args.images)
+        buffer = markdown.encode("utf-8")
+        real_mb = len(buffer) / (1024 * 1024)
+
+        tokens = len(list(scan_data_uri_images(buffer)))
+        scan_time = best_time(lambda: list(scan_data_uri_images(buffer)), args.repeat)
+        per_mb.append(scan_time / real_mb)
+
+        legacy = ""
+        if not args.no_legacy:
+            legacy_time = best_time(
+                lambda: (
+                    [m.end() for m in LEGACY_REFERENCE_PATTERN.finditer(markdown)],
+                    [m.end() for m in LEGACY_INLINE_PATTERN.finditer(markdown)],
+                ),
+                args.repeat,
+            )
+            legacy = f"{legacy_time:.4f}"
+
+        print(f"{real_mb:6.1f} {tokens:7d} {scan_time:10.4f} {scan_time / real_mb:9.5f} {legacy:>11}")
+
+    # Em escala linear, o tempo por MB do maior tamanho fica próximo do menor
+    print(f"\nRazão s/MB (maior / menor tamanho): {per_mb[-1] / per_mb[0]:.2f} (~1.0 = linear)")
+
+
+if __name__ == "__main__":
+    main()
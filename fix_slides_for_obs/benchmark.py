@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for fix_slides_for_obs.
+
+Each benchmark returns a flat dict of metric -> value (milliseconds unless the
+name says otherwise). Results can be saved as JSON and compared with an earlier
+run, so regressions show up as deltas.
+
+Benchmarks:
+    import  Startup cost of the entry points: wall time of `fix_slides_for_obs.py --help`
+            and `python -X importtime` cumulative time of each module, plus the
+            heaviest modules each one pulls in
+    fit     --reposition and --auto-fit over the decks in tests/test_slides, with the
+            binary search and with the vectorized NumPy fit (needs the Windows fonts)
+    measure --reposition over the same decks measured serially, in a thread pool and in
+            a process pool (one task per deck, pool start-up included), and over all
+            of them merged into one deck with threads=1 vs one thread per CPU
+    workers Per-worker cost of the process pools: start-up time and peak memory (MB, Linux
+            only) of a process importing the worker module vs the whole processor, and
+            the PNG export of the merged deck with spawned workers
+    memory  Peak memory (MB) of each pipeline step over the merged deck: tracemalloc peak
+            and sampled RSS peak; the largest allocators of each step are printed too
+
+Usage:
+    python benchmark.py                              # Run everything
+    python benchmark.py --only import
+    python benchmark.py --json after.json --baseline before.json
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+TEST_SLIDES_DIR = os.path.join(SCRIPT_DIR, 'tests', 'test_slides')
+
+# Modules whose import cost is tracked (entry points first)
+IMPORT_MODULES = [
+    'fix_slides_for_obs',
+    'fix_slides_for_obs_gui',
+    'fix_slides_for_obs_service',
+    'fix_slides_for_obs_processor',
+    'fix_slides_for_obs_workers',
+]
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$')
+
+
+def parse_importtime(stderr):
+    """
+    Parse `python -X importtime` output.
+
+    Returns:
+        dict: {module: (self_us, cumulative_us, depth)}
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            # Each nesting level is indented by two spaces after the first one
+            modules[name] = (int(self_us), int(cumulative_us), (len(indent) - 1) // 2)
+    return modules
+
+
+def best_of(repeat, function):
+    """Smallest result of repeat calls (the least disturbed run)."""
+    return min(function() for _ in range(repeat))
+
+
+def time_python_startup():
+    """Wall time in ms of a bare interpreter (the floor for every entry point)."""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', 'pass'], check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def time_cli_help():
+    """Wall time in ms of `python fix_slides_for_obs.py --help`."""
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, os.path.join(SCRIPT_DIR, 'fix_slides_for_obs.py'), '--help'],
+        check=True, stdout=subprocess.DEVNULL, cwd=SCRIPT_DIR
+    )
+    return (time.perf_counter() - start) * 1000
+
+
+def import_profile(module):
+    """`python -X importtime -c 'import module'` parsed into {module: (self, cumulative, depth)}."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        check=True, capture_output=True, text=True, cwd=SCRIPT_DIR
+    )
+    return parse_importtime(result.stderr)
+
+
+def benchmark_imports(args):
+    """Startup cost of the CLI/GUI entry points and the processor."""
+    results = {
+        'python_startup_ms': best_of(args.repeat, time_python_startup),
+        'cli_help_ms': best_of(args.repeat, time_cli_help),
+    }
+    for module in IMPORT_MODULES:
+        profiles = [import_profile(module) for _ in range(args.repeat)]
+        profile = min(profiles, key=lambda modules: modules[module][1])
+        results[f'import_{module}_ms'] = profile[module][1] / 1000
+
+        # Direct dependencies of the module, heaviest first
+        heaviest = sorted(
+            ((cumulative, name) for name, (_, cumulative, depth) in profile.items()
+             if depth == 1 and name != module),
+            reverse=True
+        )[:args.top]
+        for cumulative, name in heaviest:
+            results[f'import_{module}.{name}_ms'] = cumulative / 1000
+    return results
+
+
+def time_over_decks(function, decks):
+    """Wall time in ms of function(prs) over fresh copies of every deck."""
+    from pptx import Presentation
+
+    presentations = [Presentation(path) for path in decks]
+    start = time.perf_counter()
+    for prs in presentations:
+        function(prs)
+    return (time.perf_counter() - start) * 1000
+
+
+def benchmark_fit(args):
+    """Binary-search vs vectorized font fitting over the test slides."""
+    import glob
+    import fix_slides_for_obs_processor as processor
+
+    decks = sorted(glob.glob(os.path.join(TEST_SLIDES_DIR, '*.pptx')))
+    results = {'decks': len(decks)}
+    for vectorized in (False, True):
+        if vectorized and not processor.NUMPY_AVAILABLE:
+            continue
+        suffix = 'vectorized' if vectorized else 'binary_search'
+        results[f'reposition_{suffix}_ms'] = best_of(args.repeat, lambda: time_over_decks(
+            lambda prs: processor.reposition_and_maximize_font(prs, vectorized=vectorized), decks))
+        results[f'auto_fit_{suffix}_ms'] = best_of(args.repeat, lambda: time_over_decks(
+            lambda prs: processor.auto_fit_all_text(prs, vectorized=vectorized), decks))
+    return results
+
+
+def _reposition_deck(path):
+    """One task of the measure benchmark (module level, so process pools can pickle it)."""
+    from pptx import Presentation
+    import fix_slides_for_obs_processor as processor
+
+    return processor.reposition_and_maximize_font(Presentation(path))['slides_processed']
+
+
+def benchmark_measure(args):
+    """Serial vs thread pool vs process pool measurement of the test slides."""
+    import glob
+    import shutil
+    import tempfile
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+    import debug_slide
+    import fix_slides_for_obs_processor as processor
+
+    decks = sorted(glob.glob(os.path.join(TEST_SLIDES_DIR, '*.pptx')))
+    workers = args.jobs or os.cpu_count()
+    results = {'decks': len(decks), 'workers': workers}
+
+    def serial():
+        start = time.perf_counter()
+        for path in decks:
+            _reposition_deck(path)
+        return (time.perf_counter() - start) * 1000
+
+    def pooled(executor_class):
+        start = time.perf_counter()
+        with executor_class(max_workers=workers) as executor:
+            list(executor.map(_reposition_deck, decks))
+        return (time.perf_counter() - start) * 1000
+
+    results['corpus_serial_ms'] = best_of(args.repeat, serial)
+    results['corpus_threads_ms'] = best_of(args.repeat, lambda: pooled(ThreadPoolExecutor))
+    results['corpus_processes_ms'] = best_of(args.repeat, lambda: pooled(ProcessPoolExecutor))
+
+    # The thread mode inside one deck: map_measurement() over its slides
+    work_dir = tempfile.mkdtemp(prefix='fix_slides_benchmark_')
+    try:
+        merged = os.path.join(work_dir, 'merged.pptx')
+        debug_slide.merge_presentations(decks, merged, fix=False)
+        for threads, name in ((1, 'serial'), (workers, 'threads')):
+            results[f'merged_deck_{name}_ms'] = best_of(args.repeat, lambda: time_over_decks(
+                lambda prs: processor.reposition_and_maximize_font(prs, threads=threads), [merged]))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def time_worker_start(module):
+    """
+    Start a Python process that imports module, like a spawned pool worker.
+
+    Returns:
+        tuple: (wall time in ms, peak RSS in MB, or None where it cannot be read)
+    """
+    # VmHWM, not ru_maxrss: on Linux the latter keeps the peak of the forked parent across exec
+    code = (f'import {module}\n'
+            'try:\n'
+            '    with open("/proc/self/status") as f:\n'
+            '        print(next(line.split()[1] for line in f if line.startswith("VmHWM:")))\n'
+            'except OSError:\n'
+            '    print(0)')
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True,
+                            text=True, cwd=SCRIPT_DIR)
+    elapsed = (time.perf_counter() - start) * 1000
+    return elapsed, (int(result.stdout.split()[-1]) / 1024) or None
+
+
+def benchmark_workers(args):
+    """Start-up cost of a pool worker, and the PNG export with spawned workers."""
+    import glob
+    import multiprocessing
+    import shutil
+    import tempfile
+    from concurrent.futures import ProcessPoolExecutor
+    from unittest import mock
+    from pptx import Presentation
+    import debug_slide
+    import fix_slides_for_obs_processor as processor
+
+    results = {}
+    for name, module in (('worker_module', 'fix_slides_for_obs_workers'),
+                         ('processor', 'fix_slides_for_obs_processor')):
+        runs = [time_worker_start(module) for _ in range(args.repeat)]
+        results[f'{name}_start_ms'] = min(elapsed for elapsed, _ in runs)
+        if runs[0][1] is not None:
+            results[f'{name}_rss_mb'] = min(rss for _, rss in runs)
+
+    # Spawn, as on Windows and macOS, so every worker pays its imports
+    workers = args.jobs or os.cpu_count()
+    results['workers'] = workers
+    spawn_pool = lambda max_workers: ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'))
+    work_dir = tempfile.mkdtemp(prefix='fix_slides_benchmark_')
+    try:
+        merged = os.path.join(work_dir, 'merged.pptx')
+        debug_slide.merge_presentations(sorted(glob.glob(os.path.join(TEST_SLIDES_DIR, '*.pptx'))), merged,
+                                        fix=False)
+        prs = Presentation(merged)
+
+        def export():
+            start = time.perf_counter()
+            with mock.patch('concurrent.futures.ProcessPoolExecutor', spawn_pool):
+                processor.export_slide_images(prs, os.path.join(work_dir, 'png'), jobs=workers)
+            return (time.perf_counter() - start) * 1000
+
+        results['slides'] = len(prs.slides)
+        results['export_spawn_ms'] = best_of(args.repeat, export)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+
+def benchmark_memory(args):
+    """Peak memory of load, reset_master_slides, reposition, process_presentation and save."""
+    import glob
+    import shutil
+    import tempfile
+    from pptx import Presentation
+    import debug_slide
+    import fix_slides_for_obs_processor as processor
+    from fix_slides_for_obs_defaults import DEFAULT_GLOW_COLOR, DEFAULT_GLOW_SIZE_PT, DEFAULT_TEXT_COLOR
+    from fix_slides_for_obs_memory import MemoryProfiler, print_memory_summary
+
+    results = {}
+    work_dir = tempfile.mkdtemp(prefix='fix_slides_benchmark_')
+    try:
+        merged = os.path.join(work_dir, 'merged.pptx')
+        debug_slide.merge_presentations(sorted(glob.glob(os.path.join(TEST_SLIDES_DIR, '*.pptx'))), merged)
+
+        # Memory does not depend on disturbances like time does: one run
+        with MemoryProfiler(top=args.top) as memory:
+            with memory.stage('load'):
+                prs = Presentation(merged)
+            with memory.stage('reset_master_slides'):
+                processor.reset_master_slides(prs)
+            with memory.stage('reposition'):
+                processor.reposition_and_maximize_font(prs)
+            with memory.stage('process_presentation'):
+                processor.process_presentation(prs, DEFAULT_GLOW_COLOR, DEFAULT_GLOW_SIZE_PT, DEFAULT_TEXT_COLOR)
+            with memory.stage('save'):
+                prs.save(os.path.join(work_dir, 'fixed.pptx'))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print_memory_summary(memory.stages)
+    results['slides'] = len(prs.slides)
+    for stats in memory.stages:
+        results[f'{stats.stage}_traced_peak_mb'] = stats.traced_peak / 1048576
+        if stats.rss_peak is not None:
+            results[f'{stats.stage}_rss_peak_mb'] = stats.rss_peak / 1048576
+    return results
+
+
+BENCHMARKS = {
+    'import': benchmark_imports,
+    'fit': benchmark_fit,
+    'measure': benchmark_measure,
+    'workers': benchmark_workers,
+    'memory': benchmark_memory,
+}
+
+
+def print_results(results, baseline):
+    width = max(len(name) for name in results)
+    for name, value in results.items():
+        line = f'  {name:<{width}}  {value:10.2f}'
+        if name in baseline and baseline[name]:
+            delta = value - baseline[name]
+            line += f'  {delta:+10.2f} ({delta / baseline[name]:+.0%})'
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark suite for fix_slides_for_obs.')
+    parser.add_argument('--only', choices=sorted(BENCHMARKS), action='append',
+                        help='Run only this benchmark (can be repeated)')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Runs per measurement; the fastest counts (default: 5)')
+    parser.add_argument('-j', '--jobs', type=int,
+                        help='Workers of the thread and process pools (default: one per CPU)')
+    parser.add_argument('--top', type=int, default=5,
+                        help='Heaviest direct imports listed per module, and largest allocators '
+                             'per step of the memory benchmark (default: 5)')
+    parser.add_argument('--json', help='Save the results to this JSON file')
+    parser.add_argument('--baseline', help='Earlier --json results to compare with')
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+
+    all_results = {}
+    for name in args.only or BENCHMARKS:
+        print(f'{name}:')
+        results = BENCHMARKS[name](args)
+        print_results(results, baseline.get(name, {}))
+        all_results[name] = results
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(all_results, f, indent=2)
+        print(f'Saved to {args.json}')
+
+
+if __name__ == '__main__':
+    main()
@@ -22,15 +22,25 @@ Examples:
     python debug_slide.py 17 --process          # Process and show results
     python debug_slide.py --generate-output     # Process full presentation, save to tests/test_output.pptx
     python debug_slide.py --split-slides        # Split presentation into individual slide files
+    python debug_slide.py --merge a.pptx b.pptx --merge-output weekend.pptx  # Merge decks and fix for OBS
 """
 
 import argparse
+import copy
+import hashlib
+import re
 import shutil
 import sys
 from pathlib import Path
 
+from lxml import etree
 from pptx import Presentation
 from pptx.enum.shapes import MSO_SHAPE_TYPE
+from pptx.opc.constants import RELATIONSHIP_TARGET_MODE as RTM
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.opc.package import XmlPart, _Relationship
+from pptx.opc.packuri import PackURI
+from pptx.oxml.ns import qn
 from pptx.util import Pt, Emu
 
 # Import processor if available
@@ -49,11 +59,17 @@ TESTS_DIR = SCRIPT_DIR / 'tests'
 DEFAULT_ORIGINAL = str(SCRIPT_DIR / 'Apresentação1Original.pptx')
 DEFAULT_PROCESSED = str(TESTS_DIR / 'test_output.pptx')
 DEFAULT_DEBUG = str(TESTS_DIR / 'test_debug.pptx')
+DEFAULT_MERGED = 'merged_obs.pptx'
 
 # Constants
 EMU_PER_INCH = 914400
 EMU_PER_PT = 12700
 
+# Relationships not carried over when merging decks: notes slides point at the
+# source notes master and comments at the source comment authors list
+MERGE_SKIPPED_RELTYPES = {RT.NOTES_SLIDE, RT.COMMENTS}
+RELATIONSHIP_ATTR_PREFIX = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+
 
 def emu_to_inches(emu):
     """Convert EMU to inches."""
@@ -259,82 +275,38 @@ def print_layout_calculation(slide, slide_num, dims):
     print(f'Available: {dims["available_width_pt"]:.0f}pt x {dims["available_height_pt"]:.0f}pt')
     print()
     
-    text_shapes = []
-    for shape in slide.shapes:
-        if shape.has_text_frame and shape.text_frame.text.strip():
-            text = processor.normalize_text_whitespace(shape.text_frame.text)
-            
-            original_sizes = {}
-            min_font_in_shape = float('inf')
-            max_font_in_shape = 0
-            font_name = 'Arial'
-            
-            for para_idx, paragraph in enumerate(shape.text_frame.paragraphs):
-                for run_idx, run in enumerate(paragraph.runs):
-                    if run.text.strip():
-                        font_size = run.font.size.pt if run.font.size else 12
-                        original_sizes[(para_idx, run_idx)] = font_size
-                        min_font_in_shape = min(min_font_in_shape, font_size)
-                        max_font_in_shape = max(max_font_in_shape, font_size)
-                        if run.font.name:
-                            font_name = run.font.name
-            
-            if min_font_in_shape == float('inf'):
-                min_font_in_shape = 12
-            if max_font_in_shape == 0:
-                max_font_in_shape = 12
-            
-            # Measure text
-            text_size = processor.measure_multiline_text_size(
-                text, font_name, max_font_in_shape, dims['available_width_pt'] - 20
-            )
-            weight = text_size[1] if text_size else max_font_in_shape
-            
-            text_shapes.append({
-                'shape': shape,
-                'text': text,
-                'weight': weight,
-                'original_sizes': original_sizes,
-                'max_font': max_font_in_shape,
-                'font_name': font_name
-            })
-            
-            print(f'Shape: {shape.name}')
-            print(f'  Text: "{text[:40]}..."')
-            print(f'  Max font: {max_font_in_shape}pt')
-            print(f'  Weight: {weight}')
-            print(f'  Original sizes: {original_sizes}')
-            print()
+    text_shapes = processor.collect_slide_text_shapes(slide, dims['available_width_pt'])
+    for item in text_shapes:
+        print(f'Shape: {item.name}')
+        print(f'  Text: "{item.text[:40]}..."')
+        print(f'  Max font: {item.max_font}pt')
+        print(f'  Weight: {item.weight}')
+        print(f'  Original sizes: {[(style.paragraph, style.run, style.size) for style in item.runs]}')
+        print()
     
     if not text_shapes:
         print("No text shapes found")
         return
     
     # Calculate layout
-    num_shapes = len(text_shapes)
-    total_weight = sum(item['weight'] for item in text_shapes)
-    total_spacing = dims['spacing_emu'] * (num_shapes - 1)
-    height_for_boxes = dims['available_height'] - total_spacing
+    total_weight = sum(item.weight for item in text_shapes)
+    total_spacing = dims['spacing_emu'] * (len(text_shapes) - 1)
     
     print(f'Total weight: {total_weight}')
-    print(f'Height for boxes: {emu_to_pt(height_for_boxes):.0f}pt')
+    print(f'Height for boxes: {emu_to_pt(dims["available_height"] - total_spacing):.0f}pt')
     print()
     
-    current_y = dims['margin_y']
-    for item in text_shapes:
-        height_ratio = item['weight'] / total_weight
-        height_per_box = int(height_for_boxes * height_ratio)
-        min_height = int(dims['available_height'] * 0.1)
-        height_per_box = max(height_per_box, min_height)
-        
-        print(f'{item["shape"].name}:')
-        print(f'  Height ratio: {height_ratio:.2%}')
-        print(f'  Box height: {emu_to_pt(height_per_box):.0f}pt')
-        current_y += height_per_box + dims['spacing_emu']
+    layout = processor.layout_text_shapes(
+        text_shapes, dims['available_height'], dims['margin_y'], dims['spacing_emu']
+    )
+    for item, height in zip(layout.shapes, layout.heights):
+        print(f'{item.name}:')
+        print(f'  Height ratio: {item.weight / total_weight:.2%}')
+        print(f'  Box height: {emu_to_pt(height):.0f}pt')
 
 
 def print_binary_search(slide, slide_num, dims):
-    """Print binary search scaling process."""
+    """Print binary search scaling process, traced from the processor's own search."""
     if not HAS_PROCESSOR:
         print("Error: processor module required for binary search")
         return
@@ -342,80 +314,51 @@ def print_binary_search(slide, slide_num, dims):
     print(f'=== SLIDE {slide_num} BINARY SEARCH SCALING ===')
     print(f'Available area: {dims["available_width_pt"]:.0f}pt x {dims["available_height_pt"]:.0f}pt')
     
-    for shape in slide.shapes:
-        if shape.has_text_frame and shape.text_frame.text.strip():
-            processor.clean_empty_paragraphs(shape.text_frame)
-            text = processor.normalize_text_whitespace(shape.text_frame.text)
-            
-            max_font = 0
-            font_name = 'Arial'
-            for para in shape.text_frame.paragraphs:
-                for run in para.runs:
-                    if run.text.strip():
-                        if run.font.size:
-                            max_font = max(max_font, run.font.size.pt)
-                        if run.font.name:
-                            font_name = run.font.name
-            
-            print(f'\nShape: {shape.name}')
-            print(f'Original font: {max_font}pt, font_name: {font_name}')
-            print(f'Text: "{text}"')
-            print(f'Text length: {len(text)} chars')
-            
-            margin_pt = 10
-            safety_factor = 0.98
-            
-            height_per_box = dims['available_height']
-            height_pt = emu_to_pt(height_per_box)
-            
-            usable_height = (height_pt - margin_pt * 2) * safety_factor
-            usable_width = (dims['available_width_pt'] - margin_pt * 2) * safety_factor
-            
-            print(f'\nProcessor simulation:')
-            print(f'  height_per_box (EMU): {height_per_box}')
-            print(f'  height_pt: {height_pt:.1f}')
-            print(f'  usable_height: {usable_height:.1f}')
-            print(f'  usable_width: {usable_width:.1f}')
-            
-            # Binary search
-            low_scale = 1.0
-            high_scale = 30.0
-            best_scale = 1.0
-            
-            for iteration in range(25):
-                mid_scale = (low_scale + high_scale) / 2
-                max_scaled_font = max_font * mid_scale
-                
-                text_size = processor.measure_multiline_text_size(
-                    text, font_name, max_scaled_font, dims['available_width_pt'] - margin_pt * 2
-                )
-                
-                if text_size is None:
-                    all_fit = False
-                else:
-                    text_width, text_height = text_size
-                    fits_height = text_height <= usable_height
-                    fits_width = text_width <= usable_width
-                    all_fit = fits_height and fits_width
-                
-                if iteration < 10 or not all_fit:
-                    print(f'  Iter {iteration}: scale={mid_scale:.3f}, font={max_scaled_font:.1f}pt', end='')
-                    if text_size:
-                        print(f', size={text_size[0]:.0f}x{text_size[1]:.0f}pt', end='')
-                        print(f', fits_h={fits_height}, fits_w={fits_width}', end='')
-                    print(f', all_fit={all_fit}')
-                
-                if all_fit:
-                    best_scale = mid_scale
-                    low_scale = mid_scale
-                else:
-                    high_scale = mid_scale
-                
-                if high_scale - low_scale < 0.01:
-                    break
-            
-            print(f'\nFinal best_scale: {best_scale:.3f}')
-            print(f'Final font size: {max_font * best_scale:.1f}pt')
+    text_shapes = processor.collect_slide_text_shapes(slide, dims['available_width_pt'])
+    if not text_shapes:
+        print("No text shapes found")
+        return
+    
+    shape_layout = processor.layout_text_shapes(
+        text_shapes, dims['available_height'], dims['margin_y'], dims['spacing_emu']
+    )
+    
+    def trace(event, **fields):
+        if event == 'search_start':
+            layout = fields['shape_layout']
+            for shape_idx, (item, height) in enumerate(zip(layout.shapes, layout.heights)):
+                usable_height = (emu_to_pt(height) - fields['margin_pt'] * 2) * fields['safety_factor']
+                print(f'\nShape {shape_idx}: {item.name}')
+                print(f'Original font: {item.max_font}pt, font_name: {item.font_name}')
+                print(f'Text: "{item.text}"')
+                print(f'Text length: {len(item.text)} chars')
+                print(f'  height_per_box (EMU): {height}')
+                print(f'  height_pt: {emu_to_pt(height):.1f}')
+                print(f'  usable_height: {usable_height:.1f}')
+            print(f'\nProcessor search:')
+            print(f'  usable_width: {fields["usable_width"]:.1f}')
+            print(f'  safety_factor: {fields["safety_factor"]}')
+            print(f'  scale range: [{fields["low_scale"]}, {fields["high_scale"]}]')
+        elif event == 'measurement':
+            text_size = fields['text_size']
+            print(f'  Iter {fields["iteration"]}: shape={fields["shape_idx"]}, '
+                  f'scale={fields["scale"]:.3f}, font={fields["font_size"]:.1f}pt', end='')
+            if text_size:
+                fits_h = text_size[1] <= fields['usable_height']
+                fits_w = text_size[0] <= fields['usable_width']
+                print(f', size={text_size[0]:.0f}x{text_size[1]:.0f}pt', end='')
+                print(f', fits_h={fits_h}, fits_w={fits_w}', end='')
+            print(f', fits={fields["fits"]}')
+        elif event == 'search_end':
+            print(f'\nFinal best_scale: {fields["best_scale"]:.3f} '
+                  f'({fields["iterations"]} iterations)')
+    
+    best_scale = processor.find_best_scale(
+        shape_layout, dims['available_width_pt'], trace=trace, slide_num=slide_num
+    )
+    
+    for item in shape_layout.shapes:
+        print(f'Final font size ({item.name}): {item.max_font * best_scale:.1f}pt')
 
 
 def print_line_analysis(slide, slide_num, dims):
@@ -525,10 +468,9 @@ def process_and_show_results(prs_path, slide_num):
     print(f'\nFont changes for slide {slide_num}:')
     
     for change in result['font_changes']:
-        if change['slide_num'] == slide_num:
-            scale = change.get('scale', 'N/A')
-            scale_str = f'{scale:.2f}' if isinstance(scale, (int, float)) else str(scale)
-            print(f"  {change['old_size']}pt -> {change['new_size']}pt (scale: {scale_str})")
+        if change.slide_num == slide_num:
+            scale_str = f'{change.scale:.2f}' if change.scale is not None else 'N/A'
+            print(f"  {change.old_size}pt -> {change.new_size}pt (scale: {scale_str})")
     
     # Save and show final state
     prs.save(debug_path)
@@ -666,6 +608,217 @@ def split_presentation(source_path):
     print(f"\nDone! Created {total_slides} individual slide files in '{output_dir}/'")
 
 
+def _part_fingerprint(part, memo):
+    """
+    Content hash of a part and everything it relates to.
+
+    Relationship ids are replaced by the fingerprint of their target, so two
+    masters or layouts copied into different decks hash the same. The layout
+    back-reference to its master is left out to keep the graph acyclic, and
+    slide layout ids are ignored since they are renumbered per package.
+    """
+    if id(part) in memo:
+        return memo[id(part)]
+
+    def target_fingerprint(rel):
+        if rel.is_external:
+            return rel.target_ref
+        if rel.reltype == RT.SLIDE_MASTER:
+            return 'master'
+        return _part_fingerprint(rel.target_part, memo)
+
+    digest = hashlib.sha256(part.content_type.encode('utf-8'))
+    if isinstance(part, XmlPart):
+        element = copy.deepcopy(part._element)
+        for node in element.iter(etree.Element):
+            if node.tag == qn('p:sldLayoutId'):
+                node.attrib.pop('id', None)
+            for attr, value in node.attrib.items():
+                if attr.startswith(RELATIONSHIP_ATTR_PREFIX) and value in part.rels:
+                    node.set(attr, target_fingerprint(part.rels[value]))
+        digest.update(etree.tostring(element))
+    else:
+        digest.update(part.blob)
+        for rel in sorted(part.rels.values(), key=lambda rel: rel.rId):
+            digest.update(target_fingerprint(rel).encode('utf-8'))
+
+    memo[id(part)] = digest.hexdigest()
+    return memo[id(part)]
+
+
+def _next_free_partname(partname, used):
+    """First unused partname following the numbering of partname (slide3.xml -> slideN.xml)."""
+    head, _, ext = re.match(r'^(.*?)(\d*)(\.[^./]+)$', partname).groups()
+    n = 1
+    while f'{head}{n}{ext}' in used:
+        n += 1
+    used.add(f'{head}{n}{ext}')
+    return f'{head}{n}{ext}'
+
+
+def _copy_part(part, package, state):
+    """
+    Copy part, and the parts it relates to, into package.
+
+    Already copied (or mapped) parts are reused through state['copies'], and
+    media is deduplicated by content hash against state['media'].
+    """
+    if id(part) in state['copies']:
+        return state['copies'][id(part)]
+
+    media_digest = None
+    if part.partname.startswith('/ppt/media/'):
+        media_digest = hashlib.sha256(part.blob).hexdigest()
+        existing = state['media'].get(media_digest)
+        if existing is not None:
+            state['copies'][id(part)] = existing
+            state['media_reused'] += 1
+            return existing
+
+    partname = _next_free_partname(part.partname, state['partnames'])
+    new_part = type(part).load(PackURI(partname), part.content_type, package, part.blob)
+    state['copies'][id(part)] = new_part
+    if media_digest is not None:
+        state['media'][media_digest] = new_part
+        state['media_copied'] += 1
+
+    # Keep the original rIds so the copied XML needs no rewriting
+    for rId, rel in part.rels.items():
+        if rel.reltype in MERGE_SKIPPED_RELTYPES:
+            continue
+        if rel.is_external:
+            target_mode, target = RTM.EXTERNAL, rel.target_ref
+        else:
+            target_mode, target = RTM.INTERNAL, _copy_part(rel.target_part, package, state)
+        new_part.rels._rels[rId] = _Relationship(new_part.rels._base_uri, rId, rel.reltype, target_mode, target)
+    return new_part
+
+
+def _add_slide_master(prs, master_part):
+    """Register an imported slide master (and renumber its layout ids) in prs."""
+    presentation = prs.part._element
+    master_ids = presentation.get_or_add_sldMasterIdLst()
+    used_ids = [int(node.get('id')) for node in master_ids]
+    for master in prs.slide_masters:
+        used_ids.extend(int(node.get('id')) for node in master._element.iter(qn('p:sldLayoutId')))
+
+    next_id = max(used_ids + [2147483647]) + 1
+    for node in master_part._element.iter(qn('p:sldLayoutId')):
+        node.set('id', str(next_id))
+        next_id += 1
+
+    rId = prs.part.relate_to(master_part, RT.SLIDE_MASTER)
+    etree.SubElement(master_ids, qn('p:sldMasterId'), {'id': str(next_id), qn('r:id'): rId})
+
+
+def merge_presentations(source_paths, output_path, fix=True, reposition=False):
+    """
+    Merge several decks into one, in the given order.
+
+    The first deck is the base. Slide masters (with their layouts) that are
+    structurally identical to one already in the merged deck are reused
+    instead of imported, and media is deduplicated by content hash. Notes and
+    comments are not carried over. The CLI pipeline (fix_slides_for_obs.run(),
+    with --reset-masters and the CLI defaults) then runs once over the saved
+    merged deck, so it is fixed exactly like a deck processed by the CLI.
+
+    Args:
+        source_paths: Paths of the decks to merge
+        output_path: Where to save the merged deck
+        fix: Run the CLI pipeline over the merged deck
+        reposition: With fix, also reposition text and maximize fonts (--reposition)
+
+    Returns:
+        dict: Statistics (slides, masters_reused, masters_imported,
+              media_reused, media_copied, text_shapes_processed)
+    """
+    prs = Presentation(source_paths[0])
+    package = prs.part.package
+    # Accessing prs.slides renames the slide parts to slide1..N; do it before
+    # collecting the partnames in use
+    stats = {'slides': len(prs.slides), 'masters_reused': 0, 'masters_imported': 0}
+    fingerprints = {}
+    masters = {_part_fingerprint(master.part, fingerprints): master.part for master in prs.slide_masters}
+    state = {
+        'copies': {},
+        'media': {},
+        'partnames': {str(part.partname) for part in package.iter_parts()},
+        'media_reused': 0,
+        'media_copied': 0,
+    }
+    for part in package.iter_parts():
+        if part.partname.startswith('/ppt/media/'):
+            state['media'].setdefault(hashlib.sha256(part.blob).hexdigest(), part)
+
+    # Parts are tracked by id(), so every source deck has to stay alive until the end
+    sources = []
+    for path in source_paths[1:]:
+        source = Presentation(path)
+        sources.append(source)
+        if (source.slide_width, source.slide_height) != (prs.slide_width, prs.slide_height):
+            print(f"Warning: {path} has a different slide size; its slides keep their original positions")
+
+        for master in source.slide_masters:
+            fingerprint = _part_fingerprint(master.part, fingerprints)
+            existing = masters.get(fingerprint)
+            if existing is None:
+                new_master = _copy_part(master.part, package, state)
+                _add_slide_master(prs, new_master)
+                masters[fingerprint] = new_master
+                stats['masters_imported'] += 1
+                continue
+            # Same fingerprint implies the same layouts in the same order
+            state['copies'][id(master.part)] = existing
+            existing_layouts = [rel.target_part for rel in existing.rels.values()
+                                if rel.reltype == RT.SLIDE_LAYOUT]
+            existing_layouts = {_part_fingerprint(layout, fingerprints): layout for layout in existing_layouts}
+            for layout in master.slide_layouts:
+                state['copies'][id(layout.part)] = existing_layouts[_part_fingerprint(layout.part, fingerprints)]
+            stats['masters_reused'] += 1
+
+        for slide in source.slides:
+            slide_part = _copy_part(slide.part, package, state)
+            rId = prs.part.relate_to(slide_part, RT.SLIDE)
+            prs.slides._sldIdLst.add_sldId(rId)
+            stats['slides'] += 1
+    prs.part.rename_slide_parts([slide_id.rId for slide_id in prs.slides._sldIdLst])
+
+    stats['media_reused'] = state['media_reused']
+    stats['media_copied'] = state['media_copied']
+    stats['text_shapes_processed'] = 0
+
+    prs.save(output_path)
+    if fix:
+        if HAS_PROCESSOR:
+            import fix_slides_for_obs as cli
+
+            argv = [output_path, '-o', output_path, '--reset-masters']
+            if reposition:
+                if processor.PILLOW_AVAILABLE:
+                    argv.append('--reposition')
+                else:
+                    print("Warning: reposition needs Pillow; skipped")
+            stats['text_shapes_processed'] = cli.run(cli.build_parser().parse_args(argv))
+        else:
+            print("Warning: processor module not found; merged deck saved without the OBS fix")
+    return stats
+
+
+def merge_and_report(source_paths, output_path, fix=True, reposition=False):
+    """Merge decks and print what was reused."""
+    missing = [path for path in source_paths if not Path(path).exists()]
+    if missing:
+        print(f"Error: File not found: {', '.join(missing)}")
+        return
+
+    stats = merge_presentations(source_paths, output_path, fix, reposition)
+    print(f"Merged {len(source_paths)} decks ({stats['slides']} slides) into {output_path}")
+    print(f"  Masters: {stats['masters_reused']} reused, {stats['masters_imported']} imported")
+    print(f"  Media: {stats['media_reused']} deduplicated, {stats['media_copied']} copied")
+    if fix:
+        print(f"  Text shapes processed: {stats['text_shapes_processed']}")
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='Unified slide debugging script',
@@ -707,6 +860,14 @@ def main():
                         help='Process full presentation and save to test_output.pptx')
     parser.add_argument('--split-slides', action='store_true',
                         help='Split presentation into individual slide files in tests/test_slides/')
+    parser.add_argument('--merge', nargs='+', metavar='PPTX',
+                        help='Merge these decks (in order) and run the OBS fix once over the result')
+    parser.add_argument('--merge-output', default=DEFAULT_MERGED,
+                        help=f'Output file for --merge (default: {DEFAULT_MERGED})')
+    parser.add_argument('--merge-no-fix', action='store_true',
+                        help='With --merge, save the merged deck without the OBS fix')
+    parser.add_argument('--merge-reposition', action='store_true',
+                        help='With --merge, also reposition text and maximize fonts')
     
     args = parser.parse_args()
     
@@ -720,6 +881,11 @@ def main():
         split_presentation(args.original)
         return
     
+    # Check for merge mode
+    if args.merge:
+        merge_and_report(args.merge, args.merge_output, not args.merge_no_fix, args.merge_reposition)
+        return
+    
     # Check for all-slides mode
     if args.all_slides:
         if not Path(args.original).exists():
@@ -732,7 +898,7 @@ def main():
     # Require slide number for other modes
     if args.slide is None:
         parser.print_help()
-        print("\nError: Slide number is required (unless using --all-slides, --generate-output, or --split-slides)")
+        print("\nError: Slide number is required (unless using --all-slides, --generate-output, --split-slides or --merge)")
         sys.exit(1)
     
     slide_num = args.slide
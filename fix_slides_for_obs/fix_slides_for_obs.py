@@ -1,33 +1,17 @@
 import argparse
 import sys
 
-try:
-    from pptx import Presentation
-except ImportError as e:
-    print("Error: The 'python-pptx' package maty be not installed.")
-    print("Please install it by running: pip install python-pptx")
-    print(f"Error details: {e}")
-    sys.exit(1)
-
-try:
-    from fix_slides_for_obs_processor import (
-        process_presentation, reset_master_slides,
-        check_and_report_overflow, auto_fit_all_text, PILLOW_AVAILABLE,
-        reposition_and_resize_text_boxes, reposition_and_maximize_font
-    )
-except ImportError as e:
-    print("Error: Could not import 'fix_slides_for_obs_processor'.")
-    print("Make sure the file 'fix_slides_for_obs_processor.py' exists in the same directory.")
-    print(f"Error details: {e}")
-    sys.exit(1)
-
-# ================= DEFAULT CONFIGURATION =================
-DEFAULT_GLOW_COLOR = "#FFFFE0"  # Lighter, more discrete yellow
-DEFAULT_GLOW_SIZE_PT = 20       # Size of the glow in points (reduce to avoid overlap between letters)
-DEFAULT_TEXT_COLOR = "#050505"  # Hex code for near-black text
-# =========================================================
-
-def main():
+# Only light modules at import time: --help and jobs handed to the service
+# never load python-pptx, lxml or Pillow (see run())
+from fix_slides_for_obs_defaults import (
+    DEFAULT_GLOW_COLOR, DEFAULT_GLOW_SIZE_PT, DEFAULT_TEXT_COLOR,
+    DEFAULT_EXPORT_WIDTH, DEFAULT_RENDER_CACHE_DIR, DEFAULT_RENDER_CACHE_MB, DEFAULT_IMAGE_TARGET,
+    DEFAULT_SCALE_HINTS_FILE
+)
+from fix_slides_for_obs_service import run_via_service
+
+def build_parser():
+    """Command-line parser, shared with fix_slides_for_obs_service."""
     parser = argparse.ArgumentParser(
         description="Fix PowerPoint slides for OBS by adding glow effects to text."
     )
@@ -104,61 +88,271 @@ def main():
         default=0.05,
         help="Margin as percentage of slide size for repositioning (default: 0.05 = 5%%)"
     )
+    parser.add_argument(
+        "--measure-threads",
+        dest="measure_threads",
+        type=int,
+        default=1,
+        help="Threads measuring the slides for --auto-fit and --reposition (0 = one per CPU; default: 1)"
+    )
+    parser.add_argument(
+        "--vectorized-fit",
+        dest="vectorized_fit",
+        action="store_true",
+        help="Evaluate all candidate font sizes at once with NumPy for --auto-fit and --reposition (requires NumPy)"
+    )
+    parser.add_argument(
+        "--scale-hints",
+        dest="scale_hints",
+        default=DEFAULT_SCALE_HINTS_FILE,
+        help=f"Font scales remembered per slide layout to speed up --reposition next time (default: {DEFAULT_SCALE_HINTS_FILE})"
+    )
+    parser.add_argument(
+        "--no-scale-hints",
+        dest="no_scale_hints",
+        action="store_true",
+        help="Search the full font scale range on every slide instead of starting from remembered scales"
+    )
+    parser.add_argument(
+        "--progress",
+        dest="progress",
+        action="store_true",
+        help="Show one updating progress line per step instead of listing every font change and overflow"
+    )
+    parser.add_argument(
+        "--report",
+        dest="report",
+        default=None,
+        help="Append a machine-readable NDJSON report of this run (per-slide timings, scales, overflows, "
+             "cache statistics, options) to this file; summarize with fix_slides_for_obs_report.py"
+    )
+    parser.add_argument(
+        "--memory-profile",
+        dest="memory_profile",
+        action="store_true",
+        help="Print the peak memory of each step (tracemalloc and sampled RSS) and its largest allocators; "
+             "runs in this process and much slower"
+    )
+    parser.add_argument(
+        "--memory-top",
+        dest="memory_top",
+        type=int,
+        default=5,
+        help="Allocating source lines listed per step by --memory-profile (default: %(default)s)"
+    )
     parser.add_argument(
         "-i", "--invert-colors",
         dest="invert_colors",
         action="store_true",
         help="Invert colors (black background with white text instead of white background with black text)"
     )
+    parser.add_argument(
+        "--shape-level-style",
+        dest="shape_level_style",
+        action="store_true",
+        help="Write glow and text color once per shape (list style) instead of into every run, where all runs share them"
+    )
+    parser.add_argument(
+        "--export-png",
+        dest="export_png",
+        metavar="DIR",
+        help="Also render each slide's text and glow to transparent PNGs in DIR, for an OBS Image Slide Show (requires Pillow)"
+    )
+    parser.add_argument(
+        "--png-width",
+        dest="png_width",
+        type=int,
+        default=DEFAULT_EXPORT_WIDTH,
+        help=f"Width in pixels of the exported PNGs (default: {DEFAULT_EXPORT_WIDTH})"
+    )
+    parser.add_argument(
+        "-j", "--jobs",
+        dest="jobs",
+        type=int,
+        default=None,
+        help="Number of processes used to render PNGs and downscale images (default: one per CPU)"
+    )
+    parser.add_argument(
+        "--downscale-images",
+        dest="downscale_images",
+        action="store_true",
+        help="Merge duplicate images and shrink images larger than they are shown at --image-target (requires Pillow)"
+    )
+    parser.add_argument(
+        "--image-target",
+        dest="image_target",
+        default="x".join(str(value) for value in DEFAULT_IMAGE_TARGET),
+        help="Output resolution WIDTHxHEIGHT that images must still cover when downscaled (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--render-cache",
+        dest="render_cache",
+        default=DEFAULT_RENDER_CACHE_DIR,
+        help=f"Cache of rendered slides reused by --export-png (default: {DEFAULT_RENDER_CACHE_DIR})"
+    )
+    parser.add_argument(
+        "--render-cache-mb",
+        dest="render_cache_mb",
+        type=int,
+        default=DEFAULT_RENDER_CACHE_MB,
+        help=f"Maximum size of the render cache in MB (default: {DEFAULT_RENDER_CACHE_MB})"
+    )
+    parser.add_argument(
+        "--no-render-cache",
+        dest="no_render_cache",
+        action="store_true",
+        help="Render every slide again instead of reusing unchanged ones from the cache"
+    )
+    parser.add_argument(
+        "--no-service",
+        dest="no_service",
+        action="store_true",
+        help="Process in this process even if fix_slides_for_obs_service is running"
+    )
+    return parser
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    args = build_parser().parse_args(argv)
     
-    args = parser.parse_args()
+    # Hand the job to the warm service when one is running (a memory profile is of this process)
+    if not args.no_service and not args.memory_profile:
+        result = run_via_service(argv)
+        if result is not None:
+            exit_code, output = result
+            print(output, end="")
+            if exit_code:
+                sys.exit(exit_code)
+            return
     
+    run(args)
+
+
+def print_event_stream(events, progress=False):
+    """
+    Print the events of a processor stream (iter_reposition_changes() and the
+    like) as they arrive, so nothing is held until the step ends.
+    
+    Args:
+        events: Iterable of FontChange, TextOverflow and SlideProgress records
+        progress: Show a single updating "slide N/M" line instead of one line per event
+    
+    Returns:
+        tuple: (slides processed, font changes, overflows)
+    """
+    from fix_slides_for_obs_layout import FontChange, SlideProgress, TextOverflow
+    
+    slides_processed = changes = overflows = 0
+    for event in events:
+        if isinstance(event, SlideProgress):
+            slides_processed += event.processed
+            if progress:
+                print(f"\r  Slide {event.slide_num}/{event.slide_count}", end="", flush=True)
+        elif isinstance(event, FontChange):
+            changes += 1
+            if not progress:
+                old = f"{event.old_size:.1f}pt" if event.old_size else "unknown"
+                print(f"  Slide {event.slide_num}: {event.shape_name} - {old} -> {event.new_size}pt")
+        elif isinstance(event, TextOverflow):
+            overflows += 1
+            if not progress:
+                print(f"  Slide {event.slide_num}: {event.shape_name}")
+                info = event.overflow_info
+                for side in ('right', 'bottom', 'left', 'top'):
+                    if info[f'overflow_{side}'] > 0:
+                        print(f"    - Overflows {side} by {info[f'overflow_{side}'] / 12700:.1f} pt")
+    if progress:
+        print()
+    return slides_processed, changes, overflows
+
+
+def run(args):
+    """
+    Process one presentation as described by the parsed command-line arguments.
+
+    Returns:
+        int: Number of text shapes processed
+    """
+    try:
+        from pptx import Presentation
+    except ImportError as e:
+        print("Error: The 'python-pptx' package maty be not installed.")
+        print("Please install it by running: pip install python-pptx")
+        print(f"Error details: {e}")
+        sys.exit(1)
+
+    try:
+        from fix_slides_for_obs_processor import (
+            process_presentation, reset_master_slides,
+            iter_text_overflows, iter_auto_fit_changes, PILLOW_AVAILABLE, iter_reposition_changes,
+            export_slide_images, RenderCache, downscale_images, compact_text_styles, ScaleHintCache,
+            NUMPY_AVAILABLE
+        )
+    except ImportError as e:
+        print("Error: Could not import 'fix_slides_for_obs_processor'.")
+        print("Make sure the file 'fix_slides_for_obs_processor.py' exists in the same directory.")
+        print(f"Error details: {e}")
+        sys.exit(1)
+
     # Set output file name if not provided
     if args.output_file is None:
         base_name = args.input_file.rsplit('.', 1)[0]
         args.output_file = f"{base_name}_obs_fixed.pptx"
     
+    from fix_slides_for_obs_report import RunReport
+    memory = None
+    if args.memory_profile:
+        from fix_slides_for_obs_memory import MemoryProfiler
+        memory = MemoryProfiler(top=args.memory_top)
+        memory.start()
+    report = RunReport(args.report, memory)
+    report.start(args)
+
     print(f"Opening {args.input_file}...")
     prs = Presentation(args.input_file)
+    report.step("open", slides=len(prs.slides))
     
     # Reset master slides if requested
     if args.reset_masters:
         print("Resetting master slides...")
         reset_master_slides(prs)
+        report.step("reset_masters")
     
     # Check for overflow if requested
     if args.check_overflow:
         print("Checking for text overflow...")
-        overflow_report = check_and_report_overflow(prs)
-        if overflow_report:
-            print(f"\nFound {len(overflow_report)} shape(s) with overflow:")
-            for item in overflow_report:
-                print(f"  Slide {item['slide_num']}: {item['shape_name']}")
-                info = item['overflow_info']
-                if info['overflow_right'] > 0:
-                    print(f"    - Overflows right by {info['overflow_right'] / 12700:.1f} pt")
-                if info['overflow_bottom'] > 0:
-                    print(f"    - Overflows bottom by {info['overflow_bottom'] / 12700:.1f} pt")
-                if info['overflow_left'] > 0:
-                    print(f"    - Overflows left by {info['overflow_left'] / 12700:.1f} pt")
-                if info['overflow_top'] > 0:
-                    print(f"    - Overflows top by {info['overflow_top'] / 12700:.1f} pt")
+        _, _, overflows = print_event_stream(report.track("check_overflow", iter_text_overflows(prs)),
+                                             args.progress)
+        if overflows:
+            print(f"Found {overflows} shape(s) with overflow.")
         else:
             print("No overflow detected.")
+        report.step("check_overflow", overflows=overflows)
     
+    if args.vectorized_fit and not NUMPY_AVAILABLE:
+        print("Error: NumPy is required for --vectorized-fit. Install with: pip install numpy")
+        sys.exit(1)
+
     # Reposition and maximize font if requested
     if args.reposition:
         if not PILLOW_AVAILABLE:
             print("Error: Pillow is required for repositioning with font maximization. Install with: pip install Pillow")
             sys.exit(1)
         print("Repositioning text boxes and maximizing font size...")
-        result = reposition_and_maximize_font(prs, args.margin_percent, args.spacing)
-        print(f"Repositioned text boxes on {result['slides_processed']} slide(s).")
-        if result['font_changes']:
-            print(f"Adjusted font size for {len(result['font_changes'])} shape(s):")
-            for change in result['font_changes']:
-                old = f"{change['old_size']:.1f}pt" if change['old_size'] else "unknown"
-                print(f"  Slide {change['slide_num']}: {change['shape_name']} - {old} -> {change['new_size']}pt")
+        scale_hints = None if args.no_scale_hints else ScaleHintCache(args.scale_hints)
+        slides_processed, changes, _ = print_event_stream(report.track("reposition", iter_reposition_changes(
+            prs, args.margin_percent, args.spacing, scale_hints=scale_hints,
+            vectorized=args.vectorized_fit, threads=args.measure_threads
+        )), args.progress)
+        warm = f" ({scale_hints.hits} warm-started from remembered scales)" if scale_hints and scale_hints.hits else ""
+        print(f"Repositioned text boxes on {slides_processed} slide(s){warm}.")
+        if changes:
+            print(f"Adjusted font size for {changes} shape(s).")
+        report.step("reposition", slides_processed=slides_processed, font_changes=changes)
+        if scale_hints is not None:
+            report.cache("scale_hints", scale_hints)
     
     # Auto-fit text if requested
     if args.auto_fit:
@@ -166,21 +360,74 @@ def main():
             print("Error: Pillow is required for auto-fit. Install with: pip install Pillow")
             sys.exit(1)
         print("Auto-fitting text to maximum size...")
-        changes = auto_fit_all_text(prs, args.margin)
+        _, changes, _ = print_event_stream(report.track("auto_fit", iter_auto_fit_changes(
+            prs, args.margin, args.vectorized_fit, args.measure_threads
+        )), args.progress)
         if changes:
-            print(f"Adjusted font size for {len(changes)} shape(s):")
-            for change in changes:
-                old = f"{change['old_size']:.1f}pt" if change['old_size'] else "unknown"
-                print(f"  Slide {change['slide_num']}: {change['shape_name']} - {old} -> {change['new_size']}pt")
+            print(f"Adjusted font size for {changes} shape(s).")
         else:
             print("No font size changes made.")
+        report.step("auto_fit", font_changes=changes)
     
+    # Downscale oversized images if requested
+    if args.downscale_images:
+        if not PILLOW_AVAILABLE:
+            print("Error: Pillow is required to downscale images. Install with: pip install Pillow")
+            sys.exit(1)
+        try:
+            target_size = tuple(int(value) for value in args.image_target.lower().split("x"))
+            if len(target_size) != 2:
+                raise ValueError
+        except ValueError:
+            print(f"Error: Invalid --image-target '{args.image_target}'. Use WIDTHxHEIGHT, e.g. 1920x1080")
+            sys.exit(1)
+        print("Downscaling oversized images...")
+        result = downscale_images(prs, target_size, args.jobs)
+        print(f"Downscaled {result['images_downscaled']} of {result['images']} image(s), "
+              f"merged {result['duplicates_merged']} duplicate(s): "
+              f"{result['bytes_before'] / 1048576:.1f} MB -> {result['bytes_after'] / 1048576:.1f} MB")
+        report.step("downscale_images", **result)
+
     count = process_presentation(prs, args.glow_color, args.glow_size, args.text_color, args.invert_colors)
 
     print(f"Processed {count} text shapes.")
+    report.step("process", text_shapes=count)
+
+    if args.shape_level_style:
+        result = compact_text_styles(prs)
+        print(f"Moved the style of {result['runs_compacted']} run(s) to {result['shapes_compacted']} shape(s) "
+              f"({result['runs_per_run']} kept per run): slide XML "
+              f"{result['xml_bytes_before'] / 1024:.1f} KB -> {result['xml_bytes_after'] / 1024:.1f} KB")
+        report.step("shape_level_style", **result)
+
     print(f"Saving to {args.output_file}...")
     prs.save(args.output_file)
+    report.step("save")
+
+    # Export the transparent PNG image sequence if requested
+    if args.export_png:
+        if not PILLOW_AVAILABLE:
+            print("Error: Pillow is required for PNG export. Install with: pip install Pillow")
+            sys.exit(1)
+        print(f"Exporting slide images to {args.export_png}...")
+        cache = None
+        if not args.no_render_cache:
+            cache = RenderCache(args.render_cache, args.render_cache_mb * 1024 * 1024)
+        paths = export_slide_images(prs, args.export_png, args.png_width, args.jobs, cache)
+        reused = f" ({cache.hits} unchanged, reused from cache)" if cache and cache.hits else ""
+        print(f"Exported {len(paths)} slide image(s){reused}.")
+        report.step("export_png", images=len(paths))
+        if cache is not None:
+            report.cache("render", cache)
+
+    report.close()
+    if memory is not None:
+        memory.stop()
+        from fix_slides_for_obs_memory import print_memory_summary
+        print("Memory per step:")
+        print_memory_summary(memory.stages)
     print("Done!")
+    return count
 
 if __name__ == "__main__":
     try:
@@ -0,0 +1,30 @@
+"""
+Defaults shared by the processor and the entry points.
+
+Standard library only: the CLI builds its --help from these values, and the GUI
+opens its window, before python-pptx and the processor are imported.
+"""
+import os
+
+# Per-user data directory for caches and the service file
+APP_DATA_DIR = os.path.join(
+    os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), '.cache'),
+    'fix_slides_for_obs'
+)
+
+# OBS fix: glow and text colors
+DEFAULT_GLOW_COLOR = "#FFFFE0"  # Lighter, more discrete yellow
+DEFAULT_GLOW_SIZE_PT = 20       # Size of the glow in points (reduce to avoid overlap between letters)
+DEFAULT_TEXT_COLOR = "#050505"  # Hex code for near-black text
+
+# PNG image-sequence export
+DEFAULT_EXPORT_WIDTH = 1920
+DEFAULT_RENDER_CACHE_DIR = os.path.join(APP_DATA_DIR, 'renders')
+DEFAULT_RENDER_CACHE_MB = 500
+
+# Image downscaling: resolution the images must still cover
+DEFAULT_IMAGE_TARGET = (1920, 1080)
+
+# Font scale search: results remembered per slide content and geometry
+DEFAULT_SCALE_HINTS_FILE = os.path.join(APP_DATA_DIR, 'scale_hints.json')
+DEFAULT_SCALE_HINTS_MAX = 5000
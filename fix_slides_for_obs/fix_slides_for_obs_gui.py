@@ -4,37 +4,19 @@ from pathlib import Path
 import sys
 import json
 import os
+import queue
+import threading
+import importlib.util
 
-try:
-    from pptx import Presentation
-except ImportError as e:
-    root = tk.Tk()
-    root.withdraw()
-    messagebox.showerror(
-        "Missing Package",
-        f"The 'python-pptx' package may be not not installed.\n\n"
-        f"Please install it by running:\n"
-        f"pip install python-pptx\n\n"
-        f"Error details: {e}"
-    )
-    sys.exit(1)
+from fix_slides_for_obs_service import run_via_service
 
-try:
-    from fix_slides_for_obs_processor import (
-        process_presentation, reset_master_slides,
-        check_and_report_overflow, PILLOW_AVAILABLE,
-        reposition_and_maximize_font
-    )
-except ImportError as e:
-    root = tk.Tk()
-    root.withdraw()
-    messagebox.showerror(
-        "Missing File",
-        f"Could not import 'fix_slides_for_obs_processor'.\n\n"
-        f"Make sure the file 'fix_slides_for_obs_processor.py' exists in the same directory.\n\n"
-        f"Error details: {e}"
-    )
-    sys.exit(1)
+# Checked without importing Pillow, so the window opens immediately; python-pptx
+# and the processor are only imported by the first local job (import_processor())
+PILLOW_AVAILABLE = importlib.util.find_spec("PIL") is not None
+NUMPY_AVAILABLE = importlib.util.find_spec("numpy") is not None
+
+# Milliseconds between checks for the answer of the warm service
+SERVICE_POLL_MS = 100
 
 # Default configuration
 DEFAULT_GLOW_COLOR = "#FFFFF0"
@@ -64,6 +46,39 @@ def get_config_path():
 
 CONFIG_FILE = get_config_path()
 
+
+def import_processor():
+    """
+    Import python-pptx and the processor for a local job.
+    
+    Returns:
+        The fix_slides_for_obs_processor module, or None after showing the error
+    """
+    try:
+        import pptx  # noqa: F401
+    except ImportError as e:
+        messagebox.showerror(
+            "Missing Package",
+            f"The 'python-pptx' package may be not not installed.\n\n"
+            f"Please install it by running:\n"
+            f"pip install python-pptx\n\n"
+            f"Error details: {e}"
+        )
+        return None
+    
+    try:
+        import fix_slides_for_obs_processor as processor
+    except ImportError as e:
+        messagebox.showerror(
+            "Missing File",
+            f"Could not import 'fix_slides_for_obs_processor'.\n\n"
+            f"Make sure the file 'fix_slides_for_obs_processor.py' exists in the same directory.\n\n"
+            f"Error details: {e}"
+        )
+        return None
+    return processor
+
+
 class SlideFixerGUI:
     def __init__(self, root):
         self.root = root
@@ -168,6 +183,20 @@ class SlideFixerGUI:
         if not PILLOW_AVAILABLE:
             tk.Label(reposition_frame, text="(requires Pillow)", fg="gray").pack(side="left", padx=5)
         
+        # Vectorized fit checkbox
+        vectorized_frame = tk.Frame(config_frame)
+        vectorized_frame.pack(fill="x", pady=5)
+        self.vectorized_fit_var = tk.BooleanVar(value=False)
+        vectorized_checkbox = tk.Checkbutton(
+            vectorized_frame,
+            text="Fast auto-fit (all font sizes at once)",
+            variable=self.vectorized_fit_var,
+            state="normal" if PILLOW_AVAILABLE and NUMPY_AVAILABLE else "disabled"
+        )
+        vectorized_checkbox.pack(side="left")
+        if not (PILLOW_AVAILABLE and NUMPY_AVAILABLE):
+            tk.Label(vectorized_frame, text="(requires Pillow and NumPy)", fg="gray").pack(side="left", padx=5)
+        
         # Invert colors (dark mode) checkbox
         invert_frame = tk.Frame(config_frame)
         invert_frame.pack(fill="x", pady=5)
@@ -179,6 +208,45 @@ class SlideFixerGUI:
         )
         invert_checkbox.pack(side="left")
         
+        # Shape-level style checkbox
+        shape_style_frame = tk.Frame(config_frame)
+        shape_style_frame.pack(fill="x", pady=5)
+        self.shape_level_style_var = tk.BooleanVar(value=False)
+        shape_style_checkbox = tk.Checkbutton(
+            shape_style_frame,
+            text="Write glow and text color once per shape (smaller file)",
+            variable=self.shape_level_style_var
+        )
+        shape_style_checkbox.pack(side="left")
+        
+        # Downscale images checkbox
+        downscale_frame = tk.Frame(config_frame)
+        downscale_frame.pack(fill="x", pady=5)
+        self.downscale_images_var = tk.BooleanVar(value=False)
+        downscale_checkbox = tk.Checkbutton(
+            downscale_frame,
+            text="Shrink oversized images and merge duplicates (1920x1080)",
+            variable=self.downscale_images_var,
+            state="normal" if PILLOW_AVAILABLE else "disabled"
+        )
+        downscale_checkbox.pack(side="left")
+        if not PILLOW_AVAILABLE:
+            tk.Label(downscale_frame, text="(requires Pillow)", fg="gray").pack(side="left", padx=5)
+        
+        # Export PNG image sequence checkbox
+        export_png_frame = tk.Frame(config_frame)
+        export_png_frame.pack(fill="x", pady=5)
+        self.export_png_var = tk.BooleanVar(value=False)
+        export_png_checkbox = tk.Checkbutton(
+            export_png_frame,
+            text="Export transparent PNGs for OBS (no chroma key)",
+            variable=self.export_png_var,
+            state="normal" if PILLOW_AVAILABLE else "disabled"
+        )
+        export_png_checkbox.pack(side="left")
+        if not PILLOW_AVAILABLE:
+            tk.Label(export_png_frame, text="(requires Pillow)", fg="gray").pack(side="left", padx=5)
+        
         # Progress bar
         self.progress_frame = tk.Frame(self.root)
         self.progress_frame.pack(pady=10, padx=20, fill="x")
@@ -242,8 +310,20 @@ class SlideFixerGUI:
                 if 'reposition' in config:
                     self.reposition_var.set(config['reposition'])
                 
+                if 'vectorized_fit' in config:
+                    self.vectorized_fit_var.set(config['vectorized_fit'])
+                
                 if 'invert_colors' in config:
                     self.invert_colors_var.set(config['invert_colors'])
+                
+                if 'shape_level_style' in config:
+                    self.shape_level_style_var.set(config['shape_level_style'])
+                
+                if 'downscale_images' in config:
+                    self.downscale_images_var.set(config['downscale_images'])
+                
+                if 'export_png' in config:
+                    self.export_png_var.set(config['export_png'])
         except Exception as e:
             # If loading fails, just use defaults (don't show error to user)
             pass
@@ -258,7 +338,11 @@ class SlideFixerGUI:
                 'reset_masters': self.reset_masters_var.get(),
                 'check_overflow': self.check_overflow_var.get(),
                 'reposition': self.reposition_var.get(),
-                'invert_colors': self.invert_colors_var.get()
+                'vectorized_fit': self.vectorized_fit_var.get(),
+                'invert_colors': self.invert_colors_var.get(),
+                'shape_level_style': self.shape_level_style_var.get(),
+                'downscale_images': self.downscale_images_var.get(),
+                'export_png': self.export_png_var.get()
             }
             
             with open(CONFIG_FILE, 'w') as f:
@@ -289,6 +373,68 @@ class SlideFixerGUI:
             self.file_entry.config(state="readonly")
             self.process_btn.config(state="normal")
     
+    def build_cli_args(self, output_path, png_dir, glow_color, glow_size, text_color):
+        """Command-line arguments equivalent to the current settings, for the service."""
+        args = [
+            self.selected_file, "-o", str(output_path),
+            "-g", glow_color, "-s", str(glow_size), "-c", text_color,
+        ]
+        if self.reset_masters_var.get():
+            args.append("--reset-masters")
+        if self.check_overflow_var.get():
+            args.append("--check-overflow")
+        if self.reposition_var.get() and PILLOW_AVAILABLE:
+            args += ["--reposition", "--margin-percent", "0.05", "--spacing", "10", "--measure-threads", "0"]
+            if self.vectorized_fit_var.get() and NUMPY_AVAILABLE:
+                args.append("--vectorized-fit")
+        if self.invert_colors_var.get():
+            args.append("--invert-colors")
+        if self.shape_level_style_var.get():
+            args.append("--shape-level-style")
+        if self.downscale_images_var.get() and PILLOW_AVAILABLE:
+            args.append("--downscale-images")
+        if self.export_png_var.get() and PILLOW_AVAILABLE:
+            args += ["--export-png", str(png_dir)]
+        return args
+    
+    def run_event_stream(self, events, label):
+        """
+        Consume a processor event stream (iter_reposition_changes() and the like),
+        moving the progress bar slide by slide.
+        
+        Args:
+            events: Iterable of FontChange, TextOverflow and SlideProgress records
+            label: Progress text, followed by "slide N/M"
+        
+        Returns:
+            dict: {'slides_processed', 'font_changes', 'overflows': int,
+                   'first_overflows': up to 5 TextOverflow records}
+        """
+        from fix_slides_for_obs_layout import FontChange, SlideProgress, TextOverflow
+        
+        result = {'slides_processed': 0, 'font_changes': 0, 'overflows': 0, 'first_overflows': []}
+        for event in events:
+            if isinstance(event, SlideProgress):
+                result['slides_processed'] += event.processed
+                if str(self.progress_bar['mode']) != 'determinate':
+                    self.progress_bar.stop()
+                    self.progress_bar.config(mode='determinate', maximum=event.slide_count)
+                self.progress_bar.config(value=event.slide_num)
+                self.progress_label.config(text=f"{label} slide {event.slide_num}/{event.slide_count}")
+                self.root.update()
+            elif isinstance(event, FontChange):
+                result['font_changes'] += 1
+            elif isinstance(event, TextOverflow):
+                result['overflows'] += 1
+                if len(result['first_overflows']) < 5:
+                    result['first_overflows'].append(event)
+        
+        # Back to the busy animation for the steps without progress events
+        if str(self.progress_bar['mode']) == 'determinate':
+            self.progress_bar.config(mode='indeterminate', value=0)
+            self.progress_bar.start(10)
+        return result
+    
     def process_file(self):
         if not self.selected_file:
             messagebox.showerror("Error", "Please select a file first!")
@@ -319,42 +465,132 @@ class SlideFixerGUI:
             # Generate output filename
             input_path = Path(self.selected_file)
             output_path = input_path.parent / f"{input_path.stem}_obs_fixed{input_path.suffix}"
+            png_dir = input_path.parent / f"{input_path.stem}_obs_png"
+            cli_args = self.build_cli_args(output_path, png_dir, glow_color, glow_size, text_color)
+        except Exception as e:
+            self.progress_bar.stop()
+            self.progress_bar.pack_forget()
+            self.progress_label.config(text="")
+            self.process_btn.config(state="normal")
+            messagebox.showerror("Error", f"An error occurred:\n{str(e)}")
+            return
+        
+        # Hand the job to the warm service when one is running. The request lasts
+        # as long as the job, so it runs in a worker thread and the answer is
+        # picked up on the Tk thread, keeping the window responsive.
+        answers = queue.Queue(maxsize=1)
+        
+        def ask_service():
+            try:
+                answers.put(run_via_service(cli_args))
+            except Exception:
+                answers.put(None)  # Process here instead
+        
+        threading.Thread(target=ask_service, daemon=True).start()
+        self.root.after(SERVICE_POLL_MS, self.wait_for_service, answers,
+                        (output_path, png_dir, glow_color, glow_size, text_color))
+    
+    def wait_for_service(self, answers, job):
+        """Poll for the answer of the warm service, then show it or process locally."""
+        try:
+            result = answers.get_nowait()
+        except queue.Empty:
+            self.root.after(SERVICE_POLL_MS, self.wait_for_service, answers, job)
+            return
+        
+        if result is None:
+            self.process_locally(*job)
+            return
+        
+        exit_code, output = result
+        self.save_config()
+        self.progress_bar.stop()
+        self.progress_bar.pack_forget()
+        self.progress_label.config(text="")
+        self.process_btn.config(state="normal")
+        if exit_code:
+            messagebox.showerror("Error", f"An error occurred:\n{output}")
+        else:
+            messagebox.showinfo("Success", f"Processed by the running service:\n\n{output}")
+    
+    def process_locally(self, output_path, png_dir, glow_color, glow_size, text_color):
+        """Process the selected file in this process (no warm service running)."""
+        try:
+            processor = import_processor()
+            if processor is None:
+                self.progress_bar.stop()
+                self.progress_bar.pack_forget()
+                self.progress_label.config(text="")
+                self.process_btn.config(state="normal")
+                return
+            from pptx import Presentation
             
             # Open presentation
             prs = Presentation(self.selected_file)
             
             # Reset master slides if requested
             if self.reset_masters_var.get():
-                reset_master_slides(prs)
+                processor.reset_master_slides(prs)
             
             # Check for overflow if requested
             overflow_msg = ""
             if self.check_overflow_var.get():
-                overflow_report = check_and_report_overflow(prs)
-                if overflow_report:
-                    overflow_msg = f"\n\nOverflow detected in {len(overflow_report)} shape(s):"
-                    for item in overflow_report[:5]:  # Show first 5
-                        overflow_msg += f"\n  - Slide {item['slide_num']}: {item['shape_name']}"
-                    if len(overflow_report) > 5:
-                        overflow_msg += f"\n  ... and {len(overflow_report) - 5} more"
+                result = self.run_event_stream(processor.iter_text_overflows(prs), "Checking overflow:")
+                if result['overflows']:
+                    overflow_msg = f"\n\nOverflow detected in {result['overflows']} shape(s):"
+                    for item in result['first_overflows']:
+                        overflow_msg += f"\n  - Slide {item.slide_num}: {item.shape_name}"
+                    if result['overflows'] > 5:
+                        overflow_msg += f"\n  ... and {result['overflows'] - 5} more"
                 else:
                     overflow_msg = "\n\nNo text overflow detected."
             
             # Reposition and auto-fit text if requested
             reposition_msg = ""
             if self.reposition_var.get() and PILLOW_AVAILABLE:
-                result = reposition_and_maximize_font(prs, margin_percent=0.05, spacing_pt=10)
+                result = self.run_event_stream(processor.iter_reposition_changes(
+                    prs, margin_percent=0.05, spacing_pt=10, scale_hints=processor.ScaleHintCache(),
+                    vectorized=self.vectorized_fit_var.get() and NUMPY_AVAILABLE,
+                    threads=0  # Measure slides in threads: no process start-up in the GUI
+                ), "Repositioning:")
                 reposition_msg = f"\n\nRepositioned & auto-fit {result['slides_processed']} slide(s)."
                 if result['font_changes']:
-                    reposition_msg += f" Adjusted {len(result['font_changes'])} font size(s)."
+                    reposition_msg += f" Adjusted {result['font_changes']} font size(s)."
+            
+            # Downscale oversized images if requested
+            downscale_msg = ""
+            if self.downscale_images_var.get() and PILLOW_AVAILABLE:
+                result = processor.downscale_images(prs)
+                downscale_msg = (
+                    f"\n\nDownscaled {result['images_downscaled']} image(s), merged "
+                    f"{result['duplicates_merged']} duplicate(s): "
+                    f"{result['bytes_before'] / 1048576:.1f} MB -> {result['bytes_after'] / 1048576:.1f} MB."
+                )
             
             # Process using shared function
             invert_colors = self.invert_colors_var.get()
-            count = process_presentation(prs, glow_color, glow_size, text_color, invert_colors)
+            count = processor.process_presentation(prs, glow_color, glow_size, text_color, invert_colors)
+            
+            # Move the per-run glow and color to shape level if requested
+            style_msg = ""
+            if self.shape_level_style_var.get():
+                result = processor.compact_text_styles(prs)
+                style_msg = (
+                    f"\n\nStyled {result['shapes_compacted']} shape(s) once instead of per run: slide XML "
+                    f"{result['xml_bytes_before'] / 1024:.1f} KB -> {result['xml_bytes_after'] / 1024:.1f} KB."
+                )
             
             # Save the presentation
             prs.save(str(output_path))
             
+            # Export the transparent PNG image sequence if requested
+            export_msg = ""
+            if self.export_png_var.get() and PILLOW_AVAILABLE:
+                self.progress_label.config(text="Exporting slide images...")
+                self.root.update()
+                paths = processor.export_slide_images(prs, str(png_dir), cache=processor.RenderCache())
+                export_msg = f"\n\nExported {len(paths)} slide image(s) to:\n{png_dir.name}"
+            
             # Save configuration for next time
             self.save_config()
             
@@ -367,7 +603,7 @@ class SlideFixerGUI:
             # Show success message
             messagebox.showinfo(
                 "Success",
-                f"Processed {count} text shapes!\n\nSaved to:\n{output_path.name}{overflow_msg}{reposition_msg}"
+                f"Processed {count} text shapes!\n\nSaved to:\n{output_path.name}{overflow_msg}{reposition_msg}{downscale_msg}{style_msg}{export_msg}"
             )
             
         except Exception as e:
@@ -0,0 +1,84 @@
+"""
+Records of the text layout computed by the processor, and of the changes and
+problems it reports.
+
+Standard library only. The records hold plain values (no python-pptx objects),
+so a slide's layout can be pickled to another process, and use __slots__, so
+large decks do not allocate a dict per shape, run and font change.
+"""
+from dataclasses import dataclass, field
+
+EMU_PER_PT = 12700
+
+
+@dataclass(slots=True)
+class RunStyle:
+    """Original font size of one non-empty run, addressed by its position in the text frame."""
+    paragraph: int
+    run: int
+    size: float
+
+
+@dataclass(slots=True)
+class ShapeText:
+    """
+    A text shape of a slide as collected by collect_slide_text_shapes().
+
+    The shape itself is referenced by its index in slide.shapes.
+    """
+    shape_index: int
+    name: str
+    text: str
+    font_name: str
+    max_font: float
+    weight: float
+    top: int
+    runs: list = field(default_factory=list)  # RunStyle, in paragraph and run order
+
+    @property
+    def line_count(self):
+        return self.text.count('\n') + 1
+
+
+@dataclass(slots=True)
+class SlideLayout:
+    """
+    Boxes given to a slide's text shapes by layout_text_shapes(): one height and
+    top (EMUs) per shape, top to bottom.
+    """
+    shapes: list   # ShapeText
+    heights: list  # int
+    tops: list     # int
+
+    def __len__(self):
+        return len(self.shapes)
+
+    def heights_pt(self):
+        return [height / EMU_PER_PT for height in self.heights]
+
+
+@dataclass(slots=True)
+class FontChange:
+    """A font size set by auto_fit_all_text() or reposition_and_maximize_font()."""
+    slide_num: int
+    shape_name: str
+    old_size: float  # None when the size was inherited
+    new_size: float
+    scale: float = None  # Only set by reposition_and_maximize_font()
+
+
+@dataclass(slots=True)
+class TextOverflow:
+    """A text shape reaching past the slide edges, found by check_and_report_overflow()."""
+    slide_num: int
+    shape_name: str
+    overflow_info: dict  # check_text_overflow() result
+
+
+@dataclass(slots=True)
+class SlideProgress:
+    """Yielded by the iter_*_changes() streams once a slide is done, changed or not."""
+    slide_num: int
+    slide_count: int
+    processed: bool  # Whether the slide was fitted (False e.g. for slides without text)
+    scale: float = None  # Font scale chosen by iter_reposition_changes()
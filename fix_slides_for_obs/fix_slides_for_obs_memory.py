@@ -0,0 +1,243 @@
+"""
+Peak-memory profile of the pipeline steps of fix_slides_for_obs.
+
+`fix_slides_for_obs.py --memory-profile` (and `benchmark.py --only memory`)
+measure every step - open, reset_masters, reposition, process, save, ... - with:
+
+    tracemalloc  Python allocations: the peak above the start of the step, what the
+                 step still holds at its end, and the source lines that allocated it
+    RSS          Resident memory of the whole process (including lxml and Pillow
+                 buffers tracemalloc cannot see), sampled by a background thread
+
+Standard library only. tracemalloc slows Python code down severalfold, so the
+profile is opt-in; the step timings of a profiled run are not representative.
+"""
+import linecache
+import os
+import sys
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+MB = 1024 * 1024
+RSS_SAMPLE_INTERVAL = 0.01  # Seconds between RSS samples
+
+
+def current_rss():
+    """
+    Resident set size of this process in bytes, or None where it cannot be read
+    (platforms other than Linux and Windows).
+    """
+    if sys.platform == 'win32':
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                        ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                        ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                        ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+                        ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                        ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        get_process_memory_info = ctypes.WinDLL('psapi').GetProcessMemoryInfo
+        get_process_memory_info.argtypes = [wintypes.HANDLE, ctypes.POINTER(PROCESS_MEMORY_COUNTERS),
+                                            wintypes.DWORD]
+        get_current_process = ctypes.WinDLL('kernel32').GetCurrentProcess
+        get_current_process.restype = wintypes.HANDLE
+        if get_process_memory_info(get_current_process(), ctypes.byref(counters), counters.cb):
+            return counters.WorkingSetSize
+        return None
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+@dataclass(slots=True)
+class Allocator:
+    """A source line and the memory its allocations still held at the end of a step."""
+    location: str  # "file.py:123"
+    size: int      # Bytes, growth over the step
+    count: int     # Blocks, growth over the step
+    line: str = ''  # Source of the line
+
+
+@dataclass(slots=True)
+class StageMemory:
+    """Memory of one pipeline step, in bytes (RSS values None where RSS cannot be read)."""
+    stage: str
+    traced_peak: int  # Highest Python allocation above the start of the step
+    traced_held: int  # Python allocations left at the end of the step (negative when freed)
+    rss_start: int
+    rss_peak: int
+    rss_end: int
+    top: list = field(default_factory=list)  # Allocator, largest first
+
+    def as_record(self):
+        """Fields of the "memory" record of a run report."""
+        return {'step': self.stage, 'traced_peak': self.traced_peak, 'traced_held': self.traced_held,
+                'rss_start': self.rss_start, 'rss_peak': self.rss_peak, 'rss_end': self.rss_end,
+                'top': [{'location': allocator.location, 'size': allocator.size, 'count': allocator.count}
+                        for allocator in self.top]}
+
+
+class MemoryProfiler:
+    """
+    Profile consecutive steps: each mark() closes the step that started at the
+    previous mark() (or at start()) and starts the next one. With enabled=False
+    every method does nothing, so callers can profile unconditionally.
+
+    Args:
+        enabled: Whether to profile at all
+        top: Allocating source lines kept per step
+        interval: Seconds between RSS samples
+    """
+
+    def __init__(self, enabled=True, top=10, interval=RSS_SAMPLE_INTERVAL):
+        self.enabled = enabled
+        self.top = top
+        self.interval = interval
+        self.stages = []
+        self._snapshot = None
+        self._traced_start = 0
+        self._rss_start = self._rss_peak = None
+        self._rss_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = None
+        self._started_tracing = False
+
+    def start(self):
+        """Start tracing allocations and sampling RSS, and begin the first step."""
+        if not self.enabled or self._sampler is not None:
+            return
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        if current_rss() is not None:
+            self._stop.clear()
+            self._sampler = threading.Thread(target=self._sample_rss, name='rss-sampler', daemon=True)
+            self._sampler.start()
+        self._begin()
+
+    def _sample_rss(self):
+        while not self._stop.wait(self.interval):
+            rss = current_rss()
+            with self._rss_lock:
+                if rss is not None and self._rss_peak is not None and rss > self._rss_peak:
+                    self._rss_peak = rss
+
+    def _begin(self):
+        self._snapshot = self._take_snapshot()
+        tracemalloc.reset_peak()
+        self._traced_start = tracemalloc.get_traced_memory()[0]
+        rss = current_rss()
+        with self._rss_lock:
+            self._rss_start = self._rss_peak = rss
+
+    @staticmethod
+    def _take_snapshot():
+        # Leave out the profiler's own allocations and import machinery
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+            tracemalloc.Filter(False, '<unknown>'),
+        ))
+
+    def mark(self, stage):
+        """
+        End the current step and begin the next one.
+
+        Args:
+            stage: Name of the step that just ended, e.g. 'reposition'
+
+        Returns:
+            StageMemory, or None when the profiler is disabled or not started
+        """
+        if not self.enabled or self._snapshot is None:
+            return None
+        traced_end, traced_peak = tracemalloc.get_traced_memory()
+        rss_end = current_rss()
+        with self._rss_lock:
+            rss_start, rss_peak = self._rss_start, self._rss_peak
+        if rss_end is not None and rss_peak is not None:
+            rss_peak = max(rss_peak, rss_end)
+
+        top = []
+        for stat in self._take_snapshot().compare_to(self._snapshot, 'lineno'):
+            if len(top) == self.top:
+                break
+            if stat.size_diff <= 0:
+                continue
+            frame = stat.traceback[0]
+            top.append(Allocator(f"{os.path.basename(frame.filename)}:{frame.lineno}", stat.size_diff,
+                                 stat.count_diff, linecache.getline(frame.filename, frame.lineno).strip()))
+
+        stats = StageMemory(stage, traced_peak - self._traced_start, traced_end - self._traced_start,
+                            rss_start, rss_peak, rss_end, top)
+        self.stages.append(stats)
+        self._begin()
+        return stats
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Profile the block as one step (whatever ran since the last mark is dropped).
+
+        Yields:
+            None; the StageMemory is appended to self.stages when the block ends
+        """
+        if self.enabled and self._snapshot is not None:
+            self._begin()
+        yield
+        self.mark(name)
+
+    def stop(self):
+        """Stop the RSS sampler, and tracing if start() turned it on."""
+        if self._sampler is not None:
+            self._stop.set()
+            self._sampler.join()
+            self._sampler = None
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        self._snapshot = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def _mb(value):
+    return f"{value / MB:9.1f}" if value is not None else f"{'-':>9}"
+
+
+def print_memory_summary(stages, top=None):
+    """
+    Print the memory of each step and its largest allocators.
+
+    Args:
+        stages: StageMemory records, e.g. MemoryProfiler.stages
+        top: Allocators printed per step (default: all that were kept)
+    """
+    print(f"  {'Step':<20} {'Peak MB':>9} {'Held MB':>9} {'RSS MB':>9} {'RSS peak':>9}")
+    for stats in stages:
+        print(f"  {stats.stage:<20} {_mb(stats.traced_peak)} {_mb(stats.traced_held)} "
+              f"{_mb(stats.rss_end)} {_mb(stats.rss_peak)}")
+    for stats in stages:
+        allocators = stats.top[:top] if top is not None else stats.top
+        if not allocators:
+            continue
+        print(f"\n  Largest allocations held after {stats.stage}:")
+        for allocator in allocators:
+            print(f"    {allocator.size / 1024:10.1f} KB {allocator.count:8d} block(s)  {allocator.location}"
+                  + (f"  {allocator.line}" if allocator.line else ""))
@@ -1,11 +1,32 @@
 """
 Shared functions for PowerPoint slide processing with OBS chroma key support.
 """
+import copy
+import functools
+import importlib.util
+import os
+import re
+import threading
+
+from lxml import etree
 from pptx.oxml import parse_xml
 from pptx.dml.color import RGBColor
-from pptx.util import Pt, Emu
+from pptx.util import Pt
 from pptx.enum.shapes import MSO_SHAPE_TYPE, PP_PLACEHOLDER
-from pptx.enum.text import MSO_AUTO_SIZE
+from pptx.enum.text import MSO_ANCHOR, MSO_AUTO_SIZE, PP_ALIGN
+
+from fix_slides_for_obs_defaults import (
+    DEFAULT_EXPORT_WIDTH, DEFAULT_RENDER_CACHE_DIR, DEFAULT_RENDER_CACHE_MB, DEFAULT_IMAGE_TARGET,
+    DEFAULT_SCALE_HINTS_FILE, DEFAULT_SCALE_HINTS_MAX
+)
+from fix_slides_for_obs_layout import (
+    RunStyle, ShapeText, SlideLayout, FontChange, TextOverflow, SlideProgress
+)
+# Code run in worker processes lives in a module without python-pptx and lxml
+from fix_slides_for_obs_workers import (
+    RENDER_LINE_SPACING, DOWNSCALE_JPEG_QUALITY, render_slide_image, _render_slide_to_file,
+    _downscale_image_blob
+)
 
 try:
     from PIL import ImageFont, ImageDraw, Image
@@ -13,8 +34,10 @@ try:
 except ImportError:
     PILLOW_AVAILABLE = False
 
+# NumPy (optional) is imported where used, by the vectorized fit only
+NUMPY_AVAILABLE = importlib.util.find_spec("numpy") is not None
+
 # Common Windows fonts paths
-import os
 WINDOWS_FONTS_DIR = os.path.join(os.environ.get('WINDIR', 'C:\\Windows'), 'Fonts')
 
 # Default/fallback font
@@ -89,8 +112,6 @@ def slide_has_visual_elements(slide):
     return False
 
 
-import re
-
 def normalize_text_whitespace(text):
     """
     Normalize whitespace in text:
@@ -168,10 +189,13 @@ def clean_empty_paragraphs(text_frame):
             parent.remove(p_elem)
 
 
+@functools.lru_cache(maxsize=None)
 def get_font_path(font_name):
     """
     Get the path to a font file based on font name.
     
+    Cached, since it is called for every measurement and stats the font files.
+    
     Args:
         font_name: Name of the font (e.g., 'Arial', 'Calibri')
     
@@ -214,6 +238,95 @@ def get_font_path(font_name):
     return None
 
 
+# Fonts kept for measuring, shared by all threads (see load_font())
+FONT_CACHE_SIZE = 256
+
+# Per-thread measuring state: the draw context
+_measure_local = threading.local()
+
+# Process-wide font cache: (font_path, size) -> FreeTypeFont
+_font_cache = {}
+_font_cache_lock = threading.Lock()
+
+
+def get_measure_draw():
+    """
+    This thread's ImageDraw for measuring text.
+    
+    Measuring never draws, so one 1x1 image per thread serves every call instead
+    of a new image and draw context per measurement.
+    """
+    draw = getattr(_measure_local, 'draw', None)
+    if draw is None:
+        draw = _measure_local.draw = ImageDraw.Draw(Image.new('RGB', (1, 1)))
+    return draw
+
+
+def load_font(font_path, size):
+    """
+    Load a TrueType font for measuring, cached for the whole process.
+    
+    The scale search measures the same few font/size pairs over and over. The
+    cache is shared by all threads, so it stays warm across measurement batches
+    and across the requests of a long-running process (fix_slides_for_obs_service),
+    which each run on a new thread. Pillow holds the GIL while FreeType measures,
+    so threads can share the fonts; the lock only guards the cache itself.
+    """
+    key = (font_path, size)
+    with _font_cache_lock:
+        font = _font_cache.get(key)
+    if font is None:
+        # Loaded outside the lock: two threads may both load a missing font, and
+        # the first one stored wins
+        loaded = ImageFont.truetype(font_path, size)
+        with _font_cache_lock:
+            font = _font_cache.get(key)
+            if font is None:
+                if len(_font_cache) >= FONT_CACHE_SIZE:
+                    del _font_cache[next(iter(_font_cache))]  # Oldest first
+                font = _font_cache[key] = loaded
+    return font
+
+
+def map_measurement(function, items, threads=1):
+    """
+    Call function(*item) for every item, concurrently in a thread pool.
+    
+    Threads avoid the start-up and pickling cost of a process pool (expensive
+    on Windows, and in the service), and measure in parallel where Pillow
+    releases the GIL. Every thread measures with its own draw context; the fonts
+    are shared (see load_font()).
+    
+    Args:
+        function: Callable run for each item; must not modify shared state
+        items: List of argument tuples
+        threads: Worker threads; 1 runs serially, 0 or None one per CPU
+    
+    Returns:
+        list: The results, in the order of items
+    """
+    return list(iter_measurement(function, items, threads))
+
+
+def iter_measurement(function, items, threads=1):
+    """
+    Like map_measurement(), but yield each result as soon as it and the ones
+    before it are done, so the caller can apply it while later items are
+    still being measured.
+    
+    Yields:
+        The results, in the order of items
+    """
+    if threads == 1 or len(items) < 2:
+        for item in items:
+            yield function(*item)
+        return
+    
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=threads or os.cpu_count()) as executor:
+        yield from executor.map(lambda item: function(*item), items)
+
+
 def measure_text_size(text, font_name, font_size_pt):
     """
     Measure the rendered size of text using Pillow.
@@ -234,10 +347,8 @@ def measure_text_size(text, font_name, font_size_pt):
         return None
     
     try:
-        font = ImageFont.truetype(font_path, int(font_size_pt))
-        # Create a temporary image to get text bbox
-        img = Image.new('RGB', (1, 1))
-        draw = ImageDraw.Draw(img)
+        font = load_font(font_path, int(font_size_pt))
+        draw = get_measure_draw()
         bbox = draw.textbbox((0, 0), text, font=font)
         width = bbox[2] - bbox[0]
         height = bbox[3] - bbox[1]
@@ -267,9 +378,8 @@ def measure_multiline_text_size(text, font_name, font_size_pt, max_width=None):
         return None
     
     try:
-        font = ImageFont.truetype(font_path, int(font_size_pt))
-        img = Image.new('RGB', (1, 1))
-        draw = ImageDraw.Draw(img)
+        font = load_font(font_path, int(font_size_pt))
+        draw = get_measure_draw()
         
         lines = text.split('\n')
         total_height = 0
@@ -319,6 +429,135 @@ def measure_multiline_text_size(text, font_name, font_size_pt, max_width=None):
         return None
 
 
+# Reference size for the unit measurements of the vectorized fit (larger = less rounding)
+FIT_MODEL_REFERENCE_SIZE = 1000
+
+
+def build_text_fit_model(text, font_name):
+    """
+    Measure a text once, at unit size, for evaluating many font sizes at once.
+    
+    Every word is measured with Pillow at FIT_MODEL_REFERENCE_SIZE and stored as
+    unit extents (advance width, ink left/right and top/bottom, divided by the
+    size). measure_text_sizes() then wraps the words like
+    measure_multiline_text_size() does, for a whole array of font sizes.
+    
+    Args:
+        text: The text to measure (may contain newlines)
+        font_name: Name of the font
+    
+    Returns:
+        dict: {'space', 'lines'}; each line is None (empty) or {'words', 'whole'},
+              with 'words' an array of (advance, left, right, top, bottom) rows and
+              'whole' the same for the unwrapped line. None if measurement fails.
+    """
+    if not PILLOW_AVAILABLE or not NUMPY_AVAILABLE:
+        return None
+    
+    font_path = get_font_path(font_name)
+    if not font_path:
+        return None
+    
+    import numpy as np
+    
+    try:
+        font = load_font(font_path, FIT_MODEL_REFERENCE_SIZE)
+        draw = get_measure_draw()
+        
+        def unit_extents(fragment):
+            left, top, right, bottom = draw.textbbox((0, 0), fragment, font=font)
+            return [value / FIT_MODEL_REFERENCE_SIZE
+                    for value in (draw.textlength(fragment, font=font), left, right, top, bottom)]
+        
+        lines = []
+        for line in text.split('\n'):
+            if not line.strip():
+                lines.append(None)
+                continue
+            lines.append({
+                'words': np.array([unit_extents(word) for word in line.split()]),
+                'whole': unit_extents(line),
+            })
+        return {'space': draw.textlength(' ', font=font) / FIT_MODEL_REFERENCE_SIZE, 'lines': lines}
+    except Exception:
+        return None
+
+
+def measure_text_sizes(model, font_sizes_pt, max_width=None):
+    """
+    Vectorized measure_multiline_text_size() for an array of font sizes.
+    
+    The words of each line are wrapped greedily for all sizes at once: the loop
+    runs over the words, each step is a handful of NumPy operations on arrays of
+    len(font_sizes_pt). Widths follow from the unit advances (kerning across the
+    spaces is ignored), so results can differ from Pillow by a pixel or so.
+    
+    Args:
+        model: Dict returned by build_text_fit_model()
+        font_sizes_pt: Array of font sizes in points
+        max_width: Maximum width for word wrapping (pixels), None for no wrapping
+    
+    Returns:
+        tuple: (widths, heights) arrays in pixels
+    """
+    import numpy as np
+    
+    sizes = np.asarray(font_sizes_pt, dtype=float)
+    glyph_sizes = np.floor(sizes)  # Pillow loads the font at int(font_size_pt)
+    # Same line spacing as measure_multiline_text_size()
+    line_spacing_factor = 0.40
+    
+    total_height = np.zeros_like(sizes)
+    max_line_width = np.zeros_like(sizes)
+    
+    def ink_extent(start, end):
+        """Pixel extent between two unit coordinates, rounded outwards like Pillow's bounding boxes."""
+        return np.ceil(end * glyph_sizes) - np.floor(start * glyph_sizes)
+    
+    for line in model['lines']:
+        if line is None:
+            total_height += sizes * 1.35
+            continue
+        
+        if not max_width:
+            _, left, right, top, bottom = line['whole']
+            max_line_width = np.maximum(max_line_width, ink_extent(left, right))
+            total_height += ink_extent(top, bottom) + sizes * line_spacing_factor
+            continue
+        
+        # Current line per size: advance so far, ink left of its first word, ink right/top/bottom
+        empty = np.ones(sizes.shape, dtype=bool)
+        advance = np.zeros_like(sizes)
+        left = np.zeros_like(sizes)
+        right = np.zeros_like(sizes)
+        top = np.zeros_like(sizes)
+        bottom = np.zeros_like(sizes)
+        
+        for word_advance, word_left, word_right, word_top, word_bottom in line['words']:
+            test_left = np.where(empty, word_left, left)
+            test_right = np.where(empty, word_right, advance + model['space'] + word_right)
+            fits = ink_extent(test_left, test_right) <= max_width
+            
+            # A non-empty line that cannot take the word is finished
+            finished = ~fits & ~empty
+            max_line_width = np.where(finished, np.maximum(max_line_width, ink_extent(left, right)), max_line_width)
+            total_height += np.where(finished, ink_extent(top, bottom) + sizes * line_spacing_factor, 0)
+            
+            # The word either extends the line or starts the next one
+            extend = fits & ~empty
+            left = np.where(extend, left, word_left)
+            right = np.where(extend, test_right, word_right)
+            advance = np.where(extend, advance + model['space'] + word_advance, word_advance)
+            top = np.where(extend, np.minimum(top, word_top), word_top)
+            bottom = np.where(extend, np.maximum(bottom, word_bottom), word_bottom)
+            empty[:] = False
+        
+        max_line_width = np.maximum(max_line_width, ink_extent(left, right))
+        total_height += ink_extent(top, bottom) + sizes * line_spacing_factor
+    
+    return max_line_width, total_height
+
+
 def check_text_overflow(shape, slide_width, slide_height):
     """
     Check if a shape's text overflows the slide boundaries.
@@ -393,10 +632,14 @@ def get_shape_font_info(shape):
     return {'font_name': font_name, 'font_size': font_size, 'text': full_text.strip()}
 
 
-def calculate_max_font_size(shape, slide_width, slide_height, margin_pt=10, min_size=8, max_size=200):
+def calculate_max_font_size(shape, slide_width, slide_height, margin_pt=10, min_size=8, max_size=200,
+                            vectorized=False):
     """
     Calculate the maximum font size that fits text within the shape without overflow.
-    Uses binary search for efficiency.
+    Uses binary search for efficiency, or with vectorized=True measures all sizes
+    at once with NumPy (see measure_text_sizes()). The vectorized size is checked
+    with measure_multiline_text_size(), and bisected down to a measured fit if it
+    does not fit, so it is never larger than a size the binary search would reject.
     
     Args:
         shape: PowerPoint shape with text
@@ -405,6 +648,7 @@ def calculate_max_font_size(shape, slide_width, slide_height, margin_pt=10, min_
         margin_pt: Margin in points to leave around text
         min_size: Minimum font size to try
         max_size: Maximum font size to try
+        vectorized: Evaluate every size from min_size to max_size in one NumPy pass
     
     Returns:
         int: Maximum font size in points that fits, or None if calculation fails
@@ -430,6 +674,23 @@ def calculate_max_font_size(shape, slide_width, slide_height, margin_pt=10, min_
     if available_width <= 0 or available_height <= 0:
         return min_size
     
+    if vectorized:
+        import numpy as np
+        
+        model = build_text_fit_model(text, font_name)
+        if model is None:
+            return None
+        sizes = np.arange(min_size, max_size + 1)
+        widths, heights = measure_text_sizes(model, sizes, available_width)
+        fits = (widths <= available_width) & (heights <= available_height)
+        
+        def size_fits(size):
+            text_size = measure_multiline_text_size(text, font_name, int(size), available_width)
+            return (text_size is not None and
+                    text_size[0] <= available_width and text_size[1] <= available_height)
+        
+        return int(_largest_measured_fit(sizes, _first_misfit(fits) - 1, size_fits))
+    
     # Binary search for maximum font size
     low = min_size
     high = max_size
@@ -455,7 +716,7 @@ def calculate_max_font_size(shape, slide_width, slide_height, margin_pt=10, min_
     return best_size
 
 
-def auto_fit_text_to_shape(shape, slide_width, slide_height, margin_pt=10):
+def auto_fit_text_to_shape(shape, slide_width, slide_height, margin_pt=10, vectorized=False):
     """
     Automatically adjust font size to maximize text size while fitting in shape.
     
@@ -464,21 +725,25 @@ def auto_fit_text_to_shape(shape, slide_width, slide_height, margin_pt=10):
         slide_width: Slide width in EMUs
         slide_height: Slide height in EMUs
         margin_pt: Margin in points to leave around text
+        vectorized: Measure all candidate sizes at once with NumPy
     
     Returns:
         int: New font size applied, or None if no change made
     """
-    max_font_size = calculate_max_font_size(shape, slide_width, slide_height, margin_pt)
+    max_font_size = calculate_max_font_size(shape, slide_width, slide_height, margin_pt, vectorized=vectorized)
     
     if max_font_size is None:
         return None
     
-    # Apply the new font size to all runs
+    _apply_font_size(shape, max_font_size)
+    return max_font_size
+
+
+def _apply_font_size(shape, font_size):
+    """Apply the new font size to all runs."""
     for paragraph in shape.text_frame.paragraphs:
         for run in paragraph.runs:
-            run.font.size = Pt(max_font_size)
-    
-    return max_font_size
+            run.font.size = Pt(font_size)
 
 
 def check_and_report_overflow(prs):
@@ -489,10 +754,21 @@ def check_and_report_overflow(prs):
         prs: PowerPoint Presentation object
     
     Returns:
-        list: List of overflow reports [{slide_num, shape_name, overflow_info}]
+        list: TextOverflow records, in slide order
     """
-    overflow_report = []
+    return list(iter_text_overflows(prs))
+
+
+def iter_text_overflows(prs):
+    """
+    Stream variant of check_and_report_overflow(): yield each overflow as it is found.
+    
+    Args:
+        prs: PowerPoint Presentation object
     
+    Yields:
+        TextOverflow: One per text shape reaching past the slide edges
+    """
     slide_width = prs.slide_width
     slide_height = prs.slide_height
     
@@ -507,58 +783,81 @@ def check_and_report_overflow(prs):
             overflow_info = check_text_overflow(shape, slide_width, slide_height)
             
             if overflow_info['overflows']:
-                overflow_report.append({
-                    'slide_num': slide_num,
-                    'shape_name': shape.name if hasattr(shape, 'name') else 'Unknown',
-                    'overflow_info': overflow_info
-                })
-    
-    return overflow_report
+                yield TextOverflow(
+                    slide_num, shape.name if hasattr(shape, 'name') else 'Unknown', overflow_info
+                )
 
 
-def auto_fit_all_text(prs, margin_pt=10):
+def auto_fit_all_text(prs, margin_pt=10, vectorized=False, threads=1):
     """
     Automatically fit all text in the presentation to maximum size without overflow.
     
+    Collects the changes of iter_auto_fit_changes(), which does the work.
+    
     Args:
         prs: PowerPoint Presentation object
         margin_pt: Margin in points to leave around text
+        vectorized: Measure all candidate sizes at once with NumPy
+        threads: Measuring threads (see map_measurement()); 1 measures serially
     
     Returns:
-        list: List of changes made [{slide_num, shape_name, old_size, new_size}]
+        list: FontChange records, in slide order
+    """
+    return [event for event in iter_auto_fit_changes(prs, margin_pt, vectorized, threads)
+            if isinstance(event, FontChange)]
+
+
+def iter_auto_fit_changes(prs, margin_pt=10, vectorized=False, threads=1):
+    """
+    Stream variant of auto_fit_all_text(): apply the new sizes slide by slide and
+    yield each change as it is made, so large decks are never held as one list.
+    The shapes are measured read-only (concurrently with threads != 1, ahead of
+    the shapes being resized), and the sizes applied in slide order.
+    
+    Args:
+        prs: PowerPoint Presentation object
+        margin_pt: Margin in points to leave around text
+        vectorized: Measure all candidate sizes at once with NumPy
+        threads: Measuring threads (see iter_measurement()); 1 measures serially
+    
+    Yields:
+        FontChange for every resized shape, then SlideProgress once its slide is done
     """
     if not PILLOW_AVAILABLE:
         raise ImportError("Pillow is required for auto-fit. Install with: pip install Pillow")
     
-    changes = []
     slide_width = prs.slide_width
     slide_height = prs.slide_height
     
-    for slide_num, slide in enumerate(prs.slides, 1):
-        for shape in slide.shapes:
-            if not shape.has_text_frame:
-                continue
-            
-            if not shape.text_frame.text.strip():
-                continue
+    shapes_by_slide = [
+        [shape for shape in slide.shapes if shape.has_text_frame and shape.text_frame.text.strip()]
+        for slide in prs.slides
+    ]
+    
+    # Calculate the new sizes (read-only, so the shapes can be measured concurrently)
+    new_sizes = iter_measurement(
+        lambda shape: calculate_max_font_size(shape, slide_width, slide_height, margin_pt,
+                                              vectorized=vectorized),
+        [(shape,) for shapes in shapes_by_slide for shape in shapes], threads
+    )
+    
+    for slide_num, shapes in enumerate(shapes_by_slide, 1):
+        changed = False
+        for shape in shapes:
+            new_size = next(new_sizes)
             
             # Get current font size
             font_info = get_shape_font_info(shape)
             old_size = font_info['font_size']
             old_size_pt = old_size.pt if old_size else None
             
-            # Calculate and apply new size
-            new_size = auto_fit_text_to_shape(shape, slide_width, slide_height, margin_pt)
-            
             if new_size is not None:
-                changes.append({
-                    'slide_num': slide_num,
-                    'shape_name': shape.name if hasattr(shape, 'name') else 'Unknown',
-                    'old_size': old_size_pt,
-                    'new_size': new_size
-                })
-    
-    return changes
+                _apply_font_size(shape, new_size)
+                changed = True
+                yield FontChange(
+                    slide_num, shape.name if hasattr(shape, 'name') else 'Unknown', old_size_pt, new_size
+                )
+        yield SlideProgress(slide_num, len(shapes_by_slide), changed)
 
 
 def reposition_and_resize_text_boxes(prs, margin_percent=0.05, spacing_pt=10):
@@ -574,9 +873,6 @@ def reposition_and_resize_text_boxes(prs, margin_percent=0.05, spacing_pt=10):
     Returns:
         int: Number of slides processed
     """
-    from pptx.util import Pt, Emu
-    from pptx.enum.text import PP_ALIGN
-    
     slide_width = prs.slide_width
     slide_height = prs.slide_height
     
@@ -664,7 +960,448 @@ def reposition_and_resize_text_boxes(prs, margin_percent=0.05, spacing_pt=10):
     return slides_processed
 
 
-def reposition_and_maximize_font(prs, margin_percent=0.05, spacing_pt=10):
+def collect_slide_text_shapes(slide, available_width_pt):
+    """
+    Collect the text shapes of a slide with their original font sizes and layout weight.
+    Empty paragraphs are cleaned from each text frame as a side effect.
+    
+    Args:
+        slide: A PowerPoint slide object
+        available_width_pt: Available width in points, used to measure the weight
+    
+    Returns:
+        list: ShapeText records, sorted top to bottom
+    """
+    text_shapes = []
+    for shape_index, shape in enumerate(slide.shapes):
+        if shape.has_text_frame and shape.text_frame.text.strip():
+            # Clean empty paragraphs from the text frame first
+            clean_empty_paragraphs(shape.text_frame)
+            
+            text = normalize_text_whitespace(shape.text_frame.text)
+            
+            # Store original sizes by position
+            runs = []
+            max_font_in_shape = 0
+            font_name = 'Arial'
+            
+            for para_idx, paragraph in enumerate(shape.text_frame.paragraphs):
+                for run_idx, run in enumerate(paragraph.runs):
+                    if run.text.strip():
+                        if run.font.size:
+                            font_size = run.font.size.pt
+                        else:
+                            font_size = 12  # Default
+                        
+                        runs.append(RunStyle(para_idx, run_idx, font_size))
+                        max_font_in_shape = max(max_font_in_shape, font_size)
+                        
+                        if run.font.name:
+                            font_name = run.font.name
+            
+            if max_font_in_shape == 0:
+                max_font_in_shape = 12
+            
+            # Count lines at ORIGINAL font size for weight calculation
+            # This determines box height distribution
+            text_size = measure_multiline_text_size(
+                text, font_name, max_font_in_shape, available_width_pt - 20
+            )
+            if text_size:
+                # Weight = measured height at original font size
+                weight = text_size[1]
+            else:
+                # Fallback: simple line count * font size
+                lines = text.count('\n') + 1
+                weight = max_font_in_shape * lines
+            
+            text_shapes.append(ShapeText(
+                shape_index, shape.name if hasattr(shape, 'name') else 'Unknown', text, font_name,
+                max_font_in_shape, weight, shape.top, runs
+            ))
+    
+    # Sort shapes by their original vertical position (top to bottom)
+    # This preserves the visual order from the original slide
+    text_shapes.sort(key=lambda item: item.top)
+    return text_shapes
+
+
+def layout_text_shapes(text_shapes, available_height, margin_y, spacing_emu):
+    """
+    Distribute the available height between text shapes proportionally to their weight.
+    
+    Args:
+        text_shapes: List returned by collect_slide_text_shapes()
+        available_height: Available height in EMUs
+        margin_y: Top margin in EMUs
+        spacing_emu: Spacing between text boxes in EMUs
+    
+    Returns:
+        SlideLayout: The shapes with the height and top of their boxes
+    """
+    num_shapes = len(text_shapes)
+    total_weight = sum(item.weight for item in text_shapes)
+    total_spacing = spacing_emu * (num_shapes - 1) if num_shapes > 1 else 0
+    height_for_boxes = available_height - total_spacing
+    
+    current_y = margin_y
+    heights = []
+    tops = []
+    
+    for item in text_shapes:
+        height_ratio = item.weight / total_weight
+        height_per_box = int(height_for_boxes * height_ratio)
+        min_height = int(available_height * 0.1)
+        height_per_box = max(height_per_box, min_height)
+        
+        heights.append(height_per_box)
+        tops.append(current_y)
+        current_y += height_per_box + spacing_emu
+    
+    return SlideLayout(list(text_shapes), heights, tops)
+
+
+# Scale search bounds: fonts never shrink, and grow at most 20x
+MIN_SCALE = 1.0
+MAX_SCALE = 20.0
+SCALE_TOLERANCE = 0.01
+# Half-width of the warm-start bracket around a remembered scale (fraction of it)
+WARM_START_SPAN = 0.05
+# Measured height in font-size units grows by about one per line (line height ~1.1-1.4x
+# the font size), so a jump larger than this between two scales means a wrap changed
+WRAP_CHANGE_THRESHOLD = 0.5
+
+
+def find_best_scale(shape_layout, available_width_pt, margin_pt=10, trace=None, slide_num=None, hints=None):
+    """
+    Binary search for the largest single scale factor that fits ALL shapes in their boxes.
+    Never shrinks below the original size (scale >= 1.0).
+    
+    With hints, a previous answer for the same content and geometry gives a
+    bracket around it (the wrap segment it fell in). Both edges are measured
+    first: if the lower one fits and the upper one does not, the search still
+    bisects the full range through the same midpoints as without hints, but the
+    midpoints outside the bracket are decided without measuring them. The result
+    is therefore the same as a cold search, whatever the hint. If an edge check
+    fails, the hint is ignored.
+    
+    Args:
+        shape_layout: SlideLayout returned by layout_text_shapes()
+        available_width_pt: Available width in points
+        margin_pt: Margin for text box padding in points
+        trace: Optional callable ``trace(event, **fields)`` receiving the search events
+               'search_start', 'warm_start', 'measurement', 'iteration' and 'search_end'.
+               Nothing is formatted or measured for tracing when it is None.
+        slide_num: Slide number passed along to the trace events
+        hints: Optional ScaleHintCache; read for a warm start and updated with the result
+    
+    Returns:
+        float: The best scale factor found
+    """
+    num_shapes = len(shape_layout)
+    # Use smaller safety factor for single shapes, larger for multiple
+    safety_factor = 0.98 if num_shapes == 1 else 0.95
+    low_scale = MIN_SCALE  # Never shrink fonts below original
+    high_scale = MAX_SCALE
+    best_scale = MIN_SCALE  # Default: keep original size
+    
+    # Calculate usable dimensions once (same for wrap and check)
+    usable_width = (available_width_pt - margin_pt * 2) * safety_factor
+    
+    # shape_idx -> {scale: measured height in font-size units}, to find the wrap changes
+    line_units = [{} for _ in shape_layout.shapes]
+    heights_pt = shape_layout.heights_pt()
+    
+    def all_shapes_fit(scale, iteration):
+        """Check if ALL shapes fit at this scale."""
+        for shape_idx, (item, height_pt) in enumerate(zip(shape_layout.shapes, heights_pt)):
+            # Scale the largest font in this shape
+            max_scaled_font = item.max_font * scale
+            
+            # Measure text at this scaled font size
+            # Use usable_width for wrapping to ensure wrapped text fits in usable area
+            text_size = measure_multiline_text_size(
+                item.text, 
+                item.font_name, 
+                max_scaled_font,
+                usable_width
+            )
+            
+            # Check if it fits in this shape's allocated box
+            # Use safety_factor to account for PowerPoint's actual text rendering
+            usable_height = (height_pt - margin_pt * 2) * safety_factor
+            if text_size is None:
+                fits = False
+            else:
+                text_width, text_height = text_size
+                fits = text_height <= usable_height and text_width <= usable_width
+                line_units[shape_idx][scale] = text_height / max_scaled_font
+            
+            if trace is not None:
+                trace('measurement', slide_num=slide_num, iteration=iteration,
+                      shape_idx=shape_idx, scale=scale, font_size=max_scaled_font,
+                      text_size=text_size, usable_width=usable_width,
+                      usable_height=usable_height, fits=fits)
+            
+            if not fits:
+                return False
+        return True
+    
+    key = hint = None
+    if hints is not None:
+        key = ScaleHintCache.key(shape_layout, usable_width, margin_pt)
+        hint = hints.get(key)
+    
+    if trace is not None:
+        trace('search_start', slide_num=slide_num, shape_layout=shape_layout,
+              usable_width=usable_width, margin_pt=margin_pt, safety_factor=safety_factor,
+              low_scale=low_scale, high_scale=high_scale)
+    
+    if hint is not None:
+        warm_low, warm_high = warm_start_bracket(hint)
+        # Same assumptions as the full search: MIN_SCALE is kept even if it does
+        # not fit, and MAX_SCALE is never reached
+        accepted = ((warm_low == MIN_SCALE or all_shapes_fit(warm_low, 'warm_start')) and
+                    (warm_high == MAX_SCALE or not all_shapes_fit(warm_high, 'warm_start')))
+        if trace is not None:
+            trace('warm_start', slide_num=slide_num, hint_scale=hint['best_scale'],
+                  low_scale=warm_low, high_scale=warm_high, accepted=accepted)
+        hints.count(accepted)
+        if not accepted:
+            hint = None  # Its wrap changes are stale too
+    
+    iterations = 0
+    while iterations < 25 and high_scale - low_scale >= SCALE_TOLERANCE:  # Binary search iterations
+        mid_scale = (low_scale + high_scale) / 2
+        # Fitting only gets harder as the scale grows, so the checked bracket edges
+        # decide every midpoint outside the bracket
+        if hint is not None and mid_scale <= warm_low:
+            all_fit = True
+        elif hint is not None and mid_scale >= warm_high:
+            all_fit = False
+        else:
+            all_fit = all_shapes_fit(mid_scale, iterations)
+        
+        if trace is not None:
+            trace('iteration', slide_num=slide_num, iteration=iterations, scale=mid_scale,
+                  low_scale=low_scale, high_scale=high_scale, all_fit=all_fit)
+        iterations += 1
+        
+        if all_fit:
+            best_scale = mid_scale
+            low_scale = mid_scale
+        else:
+            high_scale = mid_scale
+    
+    if trace is not None:
+        trace('search_end', slide_num=slide_num, best_scale=best_scale,
+              iterations=iterations)
+    
+    if hints is not None:
+        wrap_scales = set(hint['wrap_scales']) if hint is not None else set()
+        for measured in line_units:
+            scales = sorted(measured)
+            for below, above in zip(scales, scales[1:]):
+                if abs(measured[above] - measured[below]) > WRAP_CHANGE_THRESHOLD:
+                    wrap_scales.add(round(above, 4))  # First measured scale with the new wrapping
+        hints.put(key, best_scale, sorted(wrap_scales))
+    
+    return best_scale
+
+
+def warm_start_bracket(hint):
+    """
+    Search bracket around a remembered scale.
+    
+    The bracket is WARM_START_SPAN around the previous best scale, narrowed to the
+    remembered wrap changes next to it: between two wrap changes the line count
+    stays the same, so that is the segment the answer fell in last time.
+    
+    Args:
+        hint: Dict from ScaleHintCache.get(): {'best_scale', 'wrap_scales'}
+    
+    Returns:
+        tuple: (low_scale, high_scale) within [MIN_SCALE, MAX_SCALE]
+    """
+    best = hint['best_scale']
+    span = max(best * WARM_START_SPAN, SCALE_TOLERANCE * 2)
+    low = max(MIN_SCALE, best - span)
+    high = min(MAX_SCALE, best + span)
+    for wrap_scale in hint['wrap_scales']:
+        if low < wrap_scale <= best:
+            low = wrap_scale
+        elif best < wrap_scale < high:
+            high = wrap_scale
+    return low, high
+
+
+def find_best_scale_vectorized(shape_layout, available_width_pt, margin_pt=10):
+    """
+    Vectorized find_best_scale(): evaluate every candidate scale at once with NumPy.
+    
+    The candidates are MIN_SCALE to MAX_SCALE in SCALE_TOLERANCE steps. Each shape
+    is measured once per word (build_text_fit_model()) and wrapped for all
+    candidates in one pass, so there are no search iterations. The answer is the
+    largest candidate up to which every smaller one fits too, matching the
+    monotonic assumption of the binary search. That candidate is then checked
+    with measure_multiline_text_size() like find_best_scale() does; if it does
+    not fit, the smaller candidates are bisected (at most about 11 measurements).
+    
+    Args:
+        shape_layout: SlideLayout returned by layout_text_shapes()
+        available_width_pt: Available width in points
+        margin_pt: Margin for text box padding in points
+    
+    Returns:
+        float: The best scale factor found
+    """
+    import numpy as np
+    
+    # Same safety factors as find_best_scale()
+    safety_factor = 0.98 if len(shape_layout) == 1 else 0.95
+    usable_width = (available_width_pt - margin_pt * 2) * safety_factor
+    scales = np.arange(MIN_SCALE, MAX_SCALE, SCALE_TOLERANCE)
+    all_fit = np.ones(scales.shape, dtype=bool)
+    
+    for item, height_pt in zip(shape_layout.shapes, shape_layout.heights_pt()):
+        model = build_text_fit_model(item.text, item.font_name)
+        if model is None:
+            return MIN_SCALE  # Like a failed measurement in find_best_scale()
+        widths, heights = measure_text_sizes(model, item.max_font * scales, usable_width)
+        usable_height = (height_pt - margin_pt * 2) * safety_factor
+        all_fit &= (heights <= usable_height) & (widths <= usable_width)
+    
+    return float(_largest_measured_fit(
+        scales, _first_misfit(all_fit) - 1,
+        lambda scale: _scale_fits_measured(shape_layout, scale, usable_width, margin_pt, safety_factor)
+    ))
+
+
+def _scale_fits_measured(shape_layout, scale, usable_width, margin_pt, safety_factor):
+    """Whether every shape fits at this scale, measured with Pillow as in find_best_scale()."""
+    for item, height_pt in zip(shape_layout.shapes, shape_layout.heights_pt()):
+        text_size = measure_multiline_text_size(item.text, item.font_name, item.max_font * scale, usable_width)
+        usable_height = (height_pt - margin_pt * 2) * safety_factor
+        if text_size is None or text_size[1] > usable_height or text_size[0] > usable_width:
+            return False
+    return True
+
+
+def _first_misfit(fits):
+    """Index of the first candidate that does not fit (len(fits) if all do)."""
+    return len(fits) if fits.all() else int(fits.argmin())
+
+
+def _largest_measured_fit(candidates, index, fits):
+    """
+    Largest of candidates[:index + 1] that fits(candidate), measuring as few as possible.
+    
+    candidates[index], the vectorized pick, usually fits and costs one measurement.
+    Otherwise the candidates below it are bisected, assuming like the binary search
+    that fitting only gets harder as the size grows. candidates[0] is kept without
+    measuring, like the minimum of the binary search (also for index < 0).
+    """
+    if index <= 0 or fits(candidates[index]):
+        return candidates[max(index, 0)]
+    low, high = 0, index  # candidates[high] does not fit
+    while high - low > 1:
+        mid = (low + high) // 2
+        if fits(candidates[mid]):
+            low = mid
+        else:
+            high = mid
+    return candidates[low]
+
+
+class ScaleHintCache:
+    """
+    Remembered results of the font scale search, for warm starts.
+    
+    Keyed by a fingerprint of the slide's content and geometry: per shape the
+    font, font size, paragraph count and box height, plus the usable width. The
+    words themselves are left out, so a slide re-processed after a small text edit
+    still finds its previous answer. A hint never changes the result, only how
+    many measurements it takes: find_best_scale() measures its bracket edges
+    before using it, and a hint from an unrelated slide that shares the
+    fingerprint just fails that check.
+    Each entry holds the best scale and the scales at which the wrapping changed.
+    
+    Entries are kept in memory and saved as JSON (least recently used dropped
+    beyond max_entries); with path=None nothing is read or written. Slides
+    measured in threads (map_measurement()) share one cache, so it is locked.
+    """
+    
+    def __init__(self, path=DEFAULT_SCALE_HINTS_FILE, max_entries=DEFAULT_SCALE_HINTS_MAX):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.hints = {}
+        self.changed = False
+        self.lock = threading.Lock()
+        if path:
+            try:
+                import json
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.hints = json.load(f)
+            except (OSError, ValueError):
+                pass  # No hints yet, or unreadable: start cold
+    
+    @staticmethod
+    def key(shape_layout, usable_width, margin_pt):
+        """Fingerprint of the slide content and geometry the search depends on."""
+        import hashlib
+        import json
+        
+        shapes = [
+            [item.font_name, item.max_font, item.line_count, round(height_pt, 1)]
+            for item, height_pt in zip(shape_layout.shapes, shape_layout.heights_pt())
+        ]
+        payload = json.dumps([shapes, round(usable_width, 1), margin_pt])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+    
+    def get(self, key):
+        """The remembered {'best_scale', 'wrap_scales'} for key, or None."""
+        with self.lock:
+            hint = self.hints.pop(key, None)
+            if hint is not None:
+                self.hints[key] = hint  # Most recently used last
+            return hint
+    
+    def put(self, key, best_scale, wrap_scales):
+        with self.lock:
+            self.hints.pop(key, None)
+            self.hints[key] = {'best_scale': best_scale, 'wrap_scales': wrap_scales}
+            while len(self.hints) > self.max_entries:
+                del self.hints[next(iter(self.hints))]
+            self.changed = True
+    
+    def count(self, accepted):
+        """Count a warm start that was used (hit) or fell back to the full range (miss)."""
+        with self.lock:
+            if accepted:
+                self.hits += 1
+            else:
+                self.misses += 1
+    
+    def save(self):
+        """Write the hints to path (atomically); failures are ignored."""
+        if not self.path or not self.changed:
+            return
+        import json
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            temp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.hints, f)
+            os.replace(temp_path, self.path)
+            self.changed = False
+        except OSError:
+            pass  # The hints only save time; never fail the processing for them
+
+
+def reposition_and_maximize_font(prs, margin_percent=0.05, spacing_pt=10, trace=None, scale_hints=None,
+                                 vectorized=False, threads=1):
     """
     Reposition text boxes to fill the page and maximize font size.
     
@@ -674,20 +1411,64 @@ def reposition_and_maximize_font(prs, margin_percent=0.05, spacing_pt=10):
     2. Then, calculate a single scale factor that fits ALL text in their boxes
     3. Apply that scale factor to all fonts (preserving original proportions)
     
+    Collects the events of iter_reposition_changes(), which does the work.
+    
     Args:
         prs: PowerPoint Presentation object
         margin_percent: Margin as percentage of slide dimensions (0.05 = 5%)
         spacing_pt: Spacing between text boxes in points
+        trace: Optional callable receiving the scale search events (see find_best_scale())
+        scale_hints: Optional ScaleHintCache to warm-start the scale search per slide;
+                     saved when done
+        vectorized: Evaluate all candidate scales at once with NumPy
+                    (find_best_scale_vectorized(); trace and scale_hints are not used)
+        threads: Measuring threads (see map_measurement()); with a trace the
+                 slides are always measured serially, so its events stay in order
     
     Returns:
-        dict: {'slides_processed': int, 'font_changes': list}
+        dict: {'slides_processed': int, 'font_changes': list of FontChange}
+    """
+    slides_processed = 0
+    font_changes = []
+    for event in iter_reposition_changes(prs, margin_percent, spacing_pt, trace, scale_hints,
+                                         vectorized, threads):
+        if isinstance(event, FontChange):
+            font_changes.append(event)
+        elif event.processed:
+            slides_processed += 1
+    
+    return {'slides_processed': slides_processed, 'font_changes': font_changes}
+
+
+def iter_reposition_changes(prs, margin_percent=0.05, spacing_pt=10, trace=None, scale_hints=None,
+                            vectorized=False, threads=1):
+    """
+    Stream variant of reposition_and_maximize_font(): fit and apply slide by
+    slide, yielding each change as it is made.
+    
+    Collecting and laying out the shapes and the scale search touch one slide
+    each (collecting the shapes also cleans their empty paragraphs), so with
+    threads != 1 later slides are measured while earlier ones are applied, in
+    slide order.
+    
+    Args:
+        prs: PowerPoint Presentation object
+        margin_percent: Margin as percentage of slide dimensions (0.05 = 5%)
+        spacing_pt: Spacing between text boxes in points
+        trace: Optional callable receiving the scale search events (see find_best_scale())
+        scale_hints: Optional ScaleHintCache to warm-start the scale search per slide;
+                     saved when done
+        vectorized: Evaluate all candidate scales at once with NumPy
+                    (find_best_scale_vectorized(); trace and scale_hints are not used)
+        threads: Measuring threads (see map_measurement()); with a trace the
+                 slides are always measured serially, so its events stay in order
+    
+    Yields:
+        FontChange for every scaled run, then SlideProgress once its slide is done
     """
     if not PILLOW_AVAILABLE:
         raise ImportError("Pillow is required for font maximization. Install with: pip install Pillow")
     
-    from pptx.util import Pt
-    from pptx.enum.text import PP_ALIGN
-    
     slide_width = prs.slide_width
     slide_height = prs.slide_height
     
@@ -700,222 +1481,80 @@ def reposition_and_maximize_font(prs, margin_percent=0.05, spacing_pt=10):
     available_width = slide_width - (2 * margin_x)
     available_height = slide_height - (2 * margin_y)
     available_width_pt = available_width / 12700
-    available_height_pt = available_height / 12700
     
-    slides_processed = 0
-    font_changes = []
-    
-    for slide_num, slide in enumerate(prs.slides, 1):
-        # Skip slides with visual elements (images, charts, videos, etc. shouldn't have text repositioned)
-        if slide_has_visual_elements(slide):
-            continue
-        
+    def fit_slide(slide_num, slide):
+        """Steps 1-3 for one slide: (shape_layout, best_scale), or None without text."""
         # STEP 1: Collect all shapes and their original font sizes
-        text_shapes = []
-        for shape in slide.shapes:
-            if shape.has_text_frame and shape.text_frame.text.strip():
-                # Clean empty paragraphs from the text frame first
-                clean_empty_paragraphs(shape.text_frame)
-                
-                text = normalize_text_whitespace(shape.text_frame.text)
-                
-                # Store original position for sorting
-                original_top = shape.top
-                
-                # Store original sizes indexed by position
-                original_sizes = {}  # (para_idx, run_idx) -> original_size
-                max_font_in_shape = 0
-                font_name = 'Arial'
-                
-                for para_idx, paragraph in enumerate(shape.text_frame.paragraphs):
-                    for run_idx, run in enumerate(paragraph.runs):
-                        if run.text.strip():
-                            if run.font.size:
-                                font_size = run.font.size.pt
-                            else:
-                                font_size = 12  # Default
-                            
-                            original_sizes[(para_idx, run_idx)] = font_size
-                            max_font_in_shape = max(max_font_in_shape, font_size)
-                            
-                            if run.font.name:
-                                font_name = run.font.name
-                
-                if max_font_in_shape == 0:
-                    max_font_in_shape = 12
-                
-                # Count lines at ORIGINAL font size for weight calculation
-                # This determines box height distribution
-                text_size = measure_multiline_text_size(
-                    text, font_name, max_font_in_shape, available_width_pt - 20
-                )
-                if text_size:
-                    # Weight = measured height at original font size
-                    weight = text_size[1]
-                else:
-                    # Fallback: simple line count * font size
-                    lines = text.count('\n') + 1
-                    weight = max_font_in_shape * lines
-                
-                text_shapes.append({
-                    'shape': shape, 
-                    'weight': weight,
-                    'text': text,
-                    'original_sizes': original_sizes,
-                    'max_font': max_font_in_shape,
-                    'font_name': font_name,
-                    'original_top': original_top  # Store for sorting
-                })
+        text_shapes = collect_slide_text_shapes(slide, available_width_pt)
         
         if not text_shapes:
-            continue
-        
-        # Sort shapes by their original vertical position (top to bottom)
-        # This preserves the visual order from the original slide
-        text_shapes.sort(key=lambda x: x['original_top'])
-        
-        slides_processed += 1
-        num_shapes = len(text_shapes)
+            return None
         
         # STEP 2: Calculate text box heights based on content weight
-        total_weight = sum(item['weight'] for item in text_shapes)
-        total_spacing = spacing_emu * (num_shapes - 1) if num_shapes > 1 else 0
-        height_for_boxes = available_height - total_spacing
-        
-        current_y = margin_y
-        shape_layout = []
-        
-        for item in text_shapes:
-            height_ratio = item['weight'] / total_weight
-            height_per_box = int(height_for_boxes * height_ratio)
-            min_height = int(available_height * 0.1)
-            height_per_box = max(height_per_box, min_height)
-            
-            shape_layout.append({
-                'item': item,
-                'height': height_per_box,
-                'height_pt': height_per_box / 12700,
-                'y': current_y
-            })
-            current_y += height_per_box + spacing_emu
+        shape_layout = layout_text_shapes(text_shapes, available_height, margin_y, spacing_emu)
         
         # STEP 3: Find the maximum scale factor that fits ALL shapes
-        # Binary search for a single global scale factor
-        # IMPORTANT: Never shrink below original size (scale >= 1.0)
-        margin_pt = 10  # Margin for text box padding
-        # Use smaller safety factor for single shapes, larger for multiple
-        safety_factor = 0.98 if num_shapes == 1 else 0.95
-        low_scale = 1.0  # Never shrink fonts below original
-        high_scale = 20.0
-        best_scale = 1.0  # Default: keep original size
-
-        # Calculate usable dimensions once (same for wrap and check)
-        usable_width = (available_width_pt - margin_pt * 2) * safety_factor
-        
-        for _ in range(25):  # Binary search iterations
-            mid_scale = (low_scale + high_scale) / 2
-            all_fit = True
-            
-            # Check if ALL shapes fit at this scale
-            for layout in shape_layout:
-                item = layout['item']
-                height_pt = layout['height_pt']
-                max_font = item['max_font']
-                font_name = item['font_name']
-                text_content = item['text']
-                
-                # Scale the largest font in this shape
-                max_scaled_font = max_font * mid_scale
-                
-                # Measure text at this scaled font size
-                # Use usable_width for wrapping to ensure wrapped text fits in usable area
-                text_size = measure_multiline_text_size(
-                    text_content, 
-                    font_name, 
-                    max_scaled_font,
-                    usable_width
-                )
-                
-                if text_size is None:
-                    all_fit = False
-                    break
-                
-                text_width, text_height = text_size
-                
-                # Check if it fits in this shape's allocated box
-                # Use safety_factor to account for PowerPoint's actual text rendering
-                usable_height = (height_pt - margin_pt * 2) * safety_factor
-                if text_height > usable_height or text_width > usable_width:
-                    all_fit = False
-                    break
-            
-            if all_fit:
-                best_scale = mid_scale
-                low_scale = mid_scale
-            else:
-                high_scale = mid_scale
+        if vectorized:
+            best_scale = find_best_scale_vectorized(shape_layout, available_width_pt)
+        else:
+            best_scale = find_best_scale(shape_layout, available_width_pt, trace=trace, slide_num=slide_num,
+                                         hints=scale_hints)
+        return shape_layout, best_scale
+    
+    # Skip slides with visual elements (images, charts, videos, etc. shouldn't have text repositioned)
+    slides = list(enumerate(prs.slides, 1))
+    skipped = [slide_has_visual_elements(slide) for _, slide in slides]
+    fits = iter_measurement(fit_slide, [item for item, skip in zip(slides, skipped) if not skip],
+                            threads if trace is None else 1)
+    
+    try:
+        for (slide_num, slide), skip in zip(slides, skipped):
+            fit = None if skip else next(fits)
+            if fit is None:
+                yield SlideProgress(slide_num, len(slides), False)
+                continue
             
-            if high_scale - low_scale < 0.01:
-                break
-        
-        # Print debug info for slide 57 specifically, or slides that didn't scale much
-        if slide_num == 57 or best_scale < 1.5:
-            print(f"DEBUG Slide {slide_num}: best_scale={best_scale:.2f}, num_shapes={num_shapes}")
-            for layout in shape_layout:
-                item = layout['item']
-                print(f"  - height_pt={layout['height_pt']:.1f}, max_font={item['max_font']}, text='{item['text'][:50]}...'")
-                # Test measurement at scale 2.0
-                test_size = measure_multiline_text_size(
-                    item['text'], item['font_name'], item['max_font'] * 2.0,
-                    usable_width
-                )
-                if test_size:
-                    usable_h = (layout['height_pt'] - margin_pt * 2) * safety_factor
-                    print(f"    at scale 2.0: text_height={test_size[1]:.1f}, usable_height={usable_h:.1f}")
-        
-        # STEP 4: Apply positions, sizes, and scaled fonts
-        for layout in shape_layout:
-            item = layout['item']
-            shape = item['shape']
-            original_sizes = item['original_sizes']
+            shape_layout, best_scale = fit
+            changes = []
             
-            try:
-                # Set text box position and size
-                shape.left = margin_x
-                shape.top = layout['y']
-                shape.width = available_width
-                shape.height = layout['height']
-                
-                # Enable "Shrink text on overflow" to prevent text from going outside the box
-                shape.text_frame.auto_size = MSO_AUTO_SIZE.TEXT_TO_FIT_SHAPE
+            # STEP 4: Apply positions, sizes, and scaled fonts
+            shapes = list(slide.shapes)
+            for item, height, top in zip(shape_layout.shapes, shape_layout.heights, shape_layout.tops):
+                shape = shapes[item.shape_index]
                 
-                # Apply scaled font sizes (same scale for all, preserving ratios)
-                for para_idx, paragraph in enumerate(shape.text_frame.paragraphs):
-                    paragraph.alignment = PP_ALIGN.CENTER
-                    for run_idx, run in enumerate(paragraph.runs):
-                        if run.text.strip():
-                            key = (para_idx, run_idx)
-                            if key in original_sizes:
-                                original_size = original_sizes[key]
-                                new_size = round(original_size * best_scale)
-                                new_size = max(8, min(200, new_size))
-                                run.font.size = Pt(new_size)
-                                
-                                font_changes.append({
-                                    'slide_num': slide_num,
-                                    'shape_name': shape.name if hasattr(shape, 'name') else 'Unknown',
-                                    'old_size': original_size,
-                                    'new_size': new_size,
-                                    'scale': best_scale
-                                })
-            except Exception:
-                pass
-    
-    return {'slides_processed': slides_processed, 'font_changes': font_changes}
-
-
-from pptx.enum.text import PP_ALIGN
-from pptx.util import Pt
+                try:
+                    # Set text box position and size
+                    shape.left = margin_x
+                    shape.top = top
+                    shape.width = available_width
+                    shape.height = height
+                    
+                    # Enable "Shrink text on overflow" to prevent text from going outside the box
+                    shape.text_frame.auto_size = MSO_AUTO_SIZE.TEXT_TO_FIT_SHAPE
+                    
+                    paragraphs = shape.text_frame.paragraphs
+                    for paragraph in paragraphs:
+                        paragraph.alignment = PP_ALIGN.CENTER
+                    
+                    # Apply scaled font sizes (same scale for all, preserving ratios)
+                    runs_by_paragraph = {}
+                    for style in item.runs:
+                        if style.paragraph not in runs_by_paragraph:
+                            runs_by_paragraph[style.paragraph] = paragraphs[style.paragraph].runs
+                        run = runs_by_paragraph[style.paragraph][style.run]
+                        new_size = round(style.size * best_scale)
+                        new_size = max(8, min(200, new_size))
+                        run.font.size = Pt(new_size)
+                        
+                        changes.append(FontChange(slide_num, item.name, style.size, new_size, best_scale))
+                except Exception:
+                    pass
+            
+            yield from changes
+            yield SlideProgress(slide_num, len(slides), True, best_scale)
+    finally:
+        if scale_hints is not None:
+            scale_hints.save()
 
 
 def auto_fit_and_center_text_frame(text_frame, slide_width, slide_height, margin=0.05):
@@ -1232,3 +1871,564 @@ def process_presentation(prs, glow_color, glow_size, text_color, invert_colors=F
                 count += 1
     
     return count
+
+
+# ================= SHAPE-LEVEL TEXT STYLE =================
+# process_presentation() writes the same a:solidFill + a:effectLst into every run.
+# compact_text_styles() hoists that block into the shape's list style (one
+# a:defRPr per paragraph level), which the runs inherit once their own copy is gone.
+
+DRAWINGML_NS = '{http://schemas.openxmlformats.org/drawingml/2006/main}'
+TEXT_FILL_TAGS = {f'{DRAWINGML_NS}{name}' for name in
+                  ('noFill', 'solidFill', 'gradFill', 'blipFill', 'pattFill', 'grpFill')}
+TEXT_EFFECT_TAGS = {f'{DRAWINGML_NS}effectLst', f'{DRAWINGML_NS}effectDag'}
+# Children of a:lstStyle, in schema order
+LIST_STYLE_ORDER = [f'{DRAWINGML_NS}defPPr'] + [f'{DRAWINGML_NS}lvl{n}pPr' for n in range(1, 10)] + [
+    f'{DRAWINGML_NS}extLst']
+
+
+def _text_style_children(rPr):
+    """The fill and effect children of a run/default properties element, as (fill, effect)."""
+    fill = effect = None
+    if rPr is not None:
+        for child in rPr:
+            if child.tag in TEXT_FILL_TAGS:
+                fill = child
+            elif child.tag in TEXT_EFFECT_TAGS:
+                effect = child
+    return fill, effect
+
+
+def _paragraph_level(p):
+    """Outline level (0-8) of an a:p element."""
+    pPr = p.find(f'{DRAWINGML_NS}pPr')
+    return int(pPr.get('lvl', '0')) if pPr is not None else 0
+
+
+def get_shape_level_defRPr(run):
+    """
+    The a:defRPr the run inherits from its own shape's list style, if any.
+    
+    Args:
+        run: The text run
+    
+    Returns:
+        The a:lstStyle/a:lvlNpPr/a:defRPr element for the run's paragraph level, or None
+    """
+    p = run._r.getparent()
+    list_style = p.getparent().find(f'{DRAWINGML_NS}lstStyle')
+    if list_style is None:
+        return None
+    return list_style.find(f'{DRAWINGML_NS}lvl{_paragraph_level(p) + 1}pPr/{DRAWINGML_NS}defRPr')
+
+
+def _set_level_defaults(txBody, level, fill, effect):
+    """Write fill and effect into the a:defRPr of the given level in the shape's list style."""
+    list_style = txBody.find(f'{DRAWINGML_NS}lstStyle')
+    if list_style is None:
+        list_style = parse_xml(f'<a:lstStyle xmlns:a="{DRAWINGML_NS[1:-1]}"/>')
+        body_pr = txBody.find(f'{DRAWINGML_NS}bodyPr')
+        txBody.insert(list(txBody).index(body_pr) + 1 if body_pr is not None else 0, list_style)
+    
+    tag = f'{DRAWINGML_NS}lvl{level + 1}pPr'
+    level_pPr = list_style.find(tag)
+    if level_pPr is None:
+        level_pPr = list_style.makeelement(tag, {})
+        order = LIST_STYLE_ORDER.index(tag)
+        later = [child for child in list_style
+                 if child.tag in LIST_STYLE_ORDER and LIST_STYLE_ORDER.index(child.tag) > order]
+        if later:
+            later[0].addprevious(level_pPr)
+        else:
+            list_style.append(level_pPr)
+    
+    defRPr = level_pPr.find(f'{DRAWINGML_NS}defRPr')
+    if defRPr is None:
+        defRPr = level_pPr.makeelement(f'{DRAWINGML_NS}defRPr', {})
+        ext_lst = level_pPr.find(f'{DRAWINGML_NS}extLst')
+        if ext_lst is not None:
+            ext_lst.addprevious(defRPr)
+        else:
+            level_pPr.append(defRPr)
+    
+    for child in _text_style_children(defRPr):
+        if child is not None:
+            defRPr.remove(child)
+    # Fill and effect come right after an optional a:ln
+    index = 1 if len(defRPr) and defRPr[0].tag == f'{DRAWINGML_NS}ln' else 0
+    for child in (fill, effect):
+        if child is not None:
+            defRPr.insert(index, copy.deepcopy(child))
+            index += 1
+
+
+def compact_text_styles(prs):
+    """
+    Move the glow and text color that process_presentation() wrote into every run
+    up to the shape's list style, once per paragraph level.
+    
+    A level is only hoisted when all its non-blank runs carry the exact same fill
+    and effect and there is more than one of them. Everything else keeps the
+    per-run style: levels with mixed styles, single runs (nothing to share) and
+    hyperlink runs, which PowerPoint colors from the theme unless the run says otherwise.
+    
+    Args:
+        prs: PowerPoint Presentation object, after process_presentation()
+    
+    Returns:
+        dict: {'shapes_compacted', 'runs_compacted', 'runs_per_run',
+               'xml_bytes_before', 'xml_bytes_after'}
+    """
+    result = {
+        'shapes_compacted': 0,
+        'runs_compacted': 0,
+        'runs_per_run': 0,
+        'xml_bytes_before': 0,
+        'xml_bytes_after': 0,
+    }
+    
+    for slide in prs.slides:
+        result['xml_bytes_before'] += len(slide.part.blob)
+        
+        for shape in slide.shapes:
+            if not shape.has_text_frame:
+                continue
+            txBody = shape.text_frame._txBody
+            
+            # Group the styled runs by paragraph level
+            levels = {}
+            for p in txBody.iterchildren(f'{DRAWINGML_NS}p'):
+                runs = [r for r in p.iterchildren(f'{DRAWINGML_NS}r')
+                        if (r.findtext(f'{DRAWINGML_NS}t') or '').strip()]
+                levels.setdefault(_paragraph_level(p), []).extend(runs)
+            
+            shape_compacted = False
+            for level, runs in levels.items():
+                shared = [r for r in runs if r.find(f'{DRAWINGML_NS}rPr/{DRAWINGML_NS}hlinkClick') is None]
+                styles = {
+                    tuple(etree.tostring(child) if child is not None else None
+                          for child in _text_style_children(r.find(f'{DRAWINGML_NS}rPr')))
+                    for r in shared
+                }
+                if len(shared) < 2 or len(styles) != 1 or styles == {(None, None)}:
+                    result['runs_per_run'] += len(runs)
+                    continue
+                
+                fill, effect = _text_style_children(shared[0].find(f'{DRAWINGML_NS}rPr'))
+                _set_level_defaults(txBody, level, fill, effect)
+                for r in shared:
+                    rPr = r.find(f'{DRAWINGML_NS}rPr')
+                    for child in _text_style_children(rPr):
+                        if child is not None:
+                            rPr.remove(child)
+                result['runs_compacted'] += len(shared)
+                result['runs_per_run'] += len(runs) - len(shared)
+                shape_compacted = True
+            
+            if shape_compacted:
+                result['shapes_compacted'] += 1
+        
+        result['xml_bytes_after'] += len(slide.part.blob)
+    
+    return result
+
+
+# ================= PNG IMAGE-SEQUENCE EXPORT =================
+# Renders the processed slides (text + solid glow) straight to transparent PNGs,
+# so OBS can show them with an Image Slide Show source and no chroma key filter.
+
+DEFAULT_RENDER_FONT_SIZE_PT = 18  # PowerPoint's default text box size, for runs without an explicit size
+EXPORT_FILENAME_PATTERN = re.compile(r'^slide_\d+\.png$')
+
+# Bump when render_slide_image() changes its output, so cached renders are not reused
+RENDER_CACHE_VERSION = 1
+
+
+def get_run_glow(run):
+    """
+    Read the glow written by apply_solid_glow_to_run() back from a run.
+    
+    Args:
+        run: The text run
+    
+    Returns:
+        tuple: (color_hex, radius_emu), or None if the run has no solid-color glow
+    """
+    # A run without its own effects inherits them from its shape (compact_text_styles())
+    effect = _text_style_children(run._r.rPr)[1]
+    if effect is None:
+        effect = _text_style_children(get_shape_level_defRPr(run))[1]
+    if effect is None:
+        return None
+    glow = effect.find(f'{DRAWINGML_NS}glow')
+    if glow is None:
+        return None
+    color = glow.find(f'{DRAWINGML_NS}srgbClr')
+    if color is None:
+        return None
+    return color.get('val'), int(glow.get('rad', '0'))
+
+
+def build_slide_render_spec(slide, slide_width, slide_height, width_px=DEFAULT_EXPORT_WIDTH):
+    """
+    Extract everything needed to render a slide's text into plain data, so the
+    rendering can run in worker processes without the Presentation object.
+    
+    Uses the fonts, sizes, text colors and glows already in the slide, i.e. the
+    result of reposition_and_maximize_font() and process_presentation().
+    
+    Args:
+        slide: A processed PowerPoint slide
+        slide_width: Slide width in EMUs
+        slide_height: Slide height in EMUs
+        width_px: Width of the rendered image in pixels (height keeps the slide aspect)
+    
+    Returns:
+        dict: {'width', 'height', 'shapes': [{'box', 'anchor', 'paragraphs': [{'align', 'runs'}]}]}
+              with every length already converted to pixels
+    """
+    px_per_emu = width_px / slide_width
+    px_per_pt = px_per_emu * 12700
+    shapes = []
+    
+    for shape in slide.shapes:
+        if not shape.has_text_frame or not shape.text_frame.text.strip():
+            continue
+        if is_insignificant_placeholder(shape):
+            continue
+        if shape.left is None or shape.top is None or shape.width is None or shape.height is None:
+            continue
+        
+        text_frame = shape.text_frame
+        box = (
+            (shape.left + text_frame.margin_left) * px_per_emu,
+            (shape.top + text_frame.margin_top) * px_per_emu,
+            (shape.width - text_frame.margin_left - text_frame.margin_right) * px_per_emu,
+            (shape.height - text_frame.margin_top - text_frame.margin_bottom) * px_per_emu,
+        )
+        anchor = {MSO_ANCHOR.MIDDLE: 'middle', MSO_ANCHOR.BOTTOM: 'bottom'}.get(
+            text_frame.vertical_anchor, 'top'
+        )
+        
+        paragraphs = []
+        last_size_px = DEFAULT_RENDER_FONT_SIZE_PT * px_per_pt
+        for paragraph in text_frame.paragraphs:
+            align = {PP_ALIGN.CENTER: 'center', PP_ALIGN.RIGHT: 'right'}.get(paragraph.alignment, 'left')
+            runs = []
+            for run in paragraph.runs:
+                if not run.text:
+                    continue
+                size_pt = run.font.size.pt if run.font.size else DEFAULT_RENDER_FONT_SIZE_PT
+                last_size_px = size_pt * px_per_pt
+                
+                try:
+                    color = str(run.font.color.rgb)
+                except AttributeError:
+                    # No explicit RGB color: use the shape-level one, else black (theme colors)
+                    fill = _text_style_children(get_shape_level_defRPr(run))[0]
+                    srgb = fill.find(f'{DRAWINGML_NS}srgbClr') if fill is not None else None
+                    color = srgb.get('val') if srgb is not None else '000000'
+                
+                glow = get_run_glow(run)
+                runs.append({
+                    'text': run.text,
+                    'font_path': get_font_path(run.font.name or 'Arial'),
+                    'size_px': last_size_px,
+                    'color': color,
+                    'glow_color': glow[0] if glow else None,
+                    'glow_px': glow[1] * px_per_emu if glow else 0,
+                })
+            # Empty paragraphs still take a line, at the size of the previous text
+            paragraphs.append({'align': align, 'runs': runs, 'empty_size_px': last_size_px})
+        
+        shapes.append({'box': box, 'anchor': anchor, 'paragraphs': paragraphs})
+    
+    return {
+        'width': int(width_px),
+        'height': int(round(slide_height * px_per_emu)),
+        'shapes': shapes,
+    }
+
+
+class RenderCache:
+    """
+    Content-addressed cache of rendered slide PNGs.
+    
+    The key is a hash of the slide render spec (normalized text, font files,
+    computed sizes, boxes, text/glow colors and glow radius, so the invert flag is
+    included through the colors). Hits are copied into the export directory
+    instead of re-rendered. When the cache grows past max_bytes, the least
+    recently used renders (oldest mtime; hits refresh it) are removed.
+    
+    Entries are copies, never hardlinks of exported files: linking would be
+    cheaper on disk, but editing an exported PNG in place would then corrupt the
+    cache for every later deck, and refreshing an entry would touch the export.
+    A copy costs a file write per slide, still far less than rendering it.
+    """
+    
+    def __init__(self, directory=DEFAULT_RENDER_CACHE_DIR, max_bytes=DEFAULT_RENDER_CACHE_MB * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+    
+    @staticmethod
+    def key(spec):
+        """Hash of everything that changes the rendered image."""
+        import hashlib
+        import json
+        
+        payload = json.dumps({'version': RENDER_CACHE_VERSION, 'spec': spec}, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.png")
+    
+    def fetch(self, key, dest):
+        """
+        Copy the cached render for key to dest.
+        
+        Returns:
+            bool: True on a cache hit
+        """
+        import shutil
+        
+        cached = self.path(key)
+        try:
+            os.utime(cached)  # Mark as recently used
+            shutil.copyfile(cached, dest)
+        except OSError:
+            self.misses += 1
+            return False
+        self.hits += 1
+        return True
+    
+    def store(self, key, src):
+        """Add a private copy of a freshly rendered PNG to the cache."""
+        import shutil
+        import tempfile
+        
+        path = self.path(key)
+        if os.path.exists(path):
+            return
+        try:
+            # Copy under a temporary name, so a concurrent fetch never reads half a file
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            os.close(fd)
+            try:
+                shutil.copyfile(src, temp_path)
+                os.replace(temp_path, path)
+            except OSError:
+                os.remove(temp_path)
+                raise
+        except OSError:
+            pass  # Unwritable: the cache must never make the export fail
+    
+    def evict(self):
+        """Remove the least recently used renders until the cache fits in max_bytes."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.png'):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+
+def export_slide_images(prs, output_dir, width_px=DEFAULT_EXPORT_WIDTH, jobs=None, cache=None):
+    """
+    Render every slide of a processed presentation to a numbered PNG with a true
+    alpha channel (slide_001.png, slide_002.png, ...), in parallel.
+    
+    Slides without text become fully transparent images, so the numbering always
+    matches the deck. PNGs from a previous export in output_dir are removed first,
+    so an OBS Image Slide Show pointed at it never shows stale slides.
+    
+    Args:
+        prs: PowerPoint Presentation object, already processed
+        output_dir: Directory for the PNG files (created if missing)
+        width_px: Image width in pixels (height keeps the slide aspect)
+        jobs: Number of worker processes (None = one per CPU, 1 = render in this process)
+        cache: Optional RenderCache; unchanged slides are copied from it instead of rendered
+    
+    Returns:
+        list: Paths of the written PNG files, in slide order
+    """
+    if not PILLOW_AVAILABLE:
+        raise ImportError("Pillow is required to export slide images. Install with: pip install Pillow")
+    
+    specs = [build_slide_render_spec(slide, prs.slide_width, prs.slide_height, width_px)
+             for slide in prs.slides]
+    
+    os.makedirs(output_dir, exist_ok=True)
+    for name in os.listdir(output_dir):
+        if EXPORT_FILENAME_PATTERN.match(name):
+            os.remove(os.path.join(output_dir, name))
+    
+    digits = max(3, len(str(len(specs))))
+    paths = [os.path.join(output_dir, f"slide_{num:0{digits}d}.png") for num in range(1, len(specs) + 1)]
+    
+    # Copy unchanged slides from the cache, render only the rest
+    pending = []
+    for spec, path in zip(specs, paths):
+        key = RenderCache.key(spec) if cache is not None else None
+        if key is None or not cache.fetch(key, path):
+            pending.append((spec, path, key))
+    
+    if jobs == 1 or len(pending) <= 1:
+        for spec, path, _ in pending:
+            _render_slide_to_file(spec, path)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            list(executor.map(_render_slide_to_file, [item[0] for item in pending], [item[1] for item in pending]))
+    
+    if cache is not None:
+        for _, path, key in pending:
+            cache.store(key, path)
+        cache.evict()
+    
+    return paths
+
+
+# ================= MEDIA DOWNSCALING =================
+# Phone photos of 20+ megapixels are far larger than anything the 1080p stream
+# can show; shrinking them makes prs.save() and loading the deck much faster.
+
+RELATIONSHIP_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+PRESENTATIONML_NS = '{http://schemas.openxmlformats.org/presentationml/2006/main}'
+
+
+def _blip_display_size(blip, slide_width, slide_height):
+    """
+    Size in EMUs the whole image of an a:blip would have on the slide, i.e. the
+    size of the shape it fills, enlarged by any cropping (a:srcRect).
+    Backgrounds and shapes without their own size count as the full slide.
+    """
+    width, height = slide_width, slide_height
+    node = blip.getparent()
+    while node is not None:
+        if node.tag == f'{PRESENTATIONML_NS}bg':
+            break
+        ext = node.find(f'{PRESENTATIONML_NS}spPr/{DRAWINGML_NS}xfrm/{DRAWINGML_NS}ext')
+        if ext is not None:
+            width, height = int(ext.get('cx', width)), int(ext.get('cy', height))
+            break
+        node = node.getparent()
+    
+    src_rect = blip.getparent().find(f'{DRAWINGML_NS}srcRect')
+    if src_rect is not None:
+        crop = {side: int(src_rect.get(side, '0')) / 100000 for side in ('l', 't', 'r', 'b')}
+        width /= max(0.01, 1 - crop['l'] - crop['r'])
+        height /= max(0.01, 1 - crop['t'] - crop['b'])
+    return width, height
+
+
+def downscale_images(prs, target_size=DEFAULT_IMAGE_TARGET, jobs=None):
+    """
+    Deduplicate identical images and shrink the ones larger than they are shown.
+    
+    Every a:blip in slides, layouts and masters is inspected. Image parts with the
+    same content (SHA-256) are merged into one, so each image is stored and resized
+    once. Each remaining image is scaled down to what it needs to cover at the target
+    output resolution: target_size times the fraction of the slide its largest use
+    occupies (before cropping). JPEG and PNG images are re-encoded in a process pool;
+    other formats are left untouched.
+    
+    Args:
+        prs: PowerPoint Presentation object
+        target_size: (width, height) in pixels of the final output, e.g. the stream resolution
+        jobs: Number of worker processes (None = one per CPU, 1 = work in this process)
+    
+    Returns:
+        dict: {'images': int, 'duplicates_merged': int, 'images_downscaled': int,
+               'bytes_before': int, 'bytes_after': int}
+    """
+    if not PILLOW_AVAILABLE:
+        raise ImportError("Pillow is required to downscale images. Install with: pip install Pillow")
+    
+    import hashlib
+    from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+    from pptx.parts.image import ImagePart
+    
+    slide_width, slide_height = prs.slide_width, prs.slide_height
+    canonical = {}    # sha256 -> kept ImagePart
+    needed = {}       # id(kept part) -> [part, width_px, height_px]
+    merged = set()    # ids of duplicate parts no longer referenced
+    bytes_before = 0
+    
+    for part in list(prs.part.package.iter_parts()):
+        element = getattr(part, '_element', None)
+        if element is None:
+            continue
+        
+        replaced = set()
+        for blip in element.iter(f'{DRAWINGML_NS}blip'):
+            rId = blip.get(f'{RELATIONSHIP_NS}embed')
+            if not rId:
+                continue
+            try:
+                image_part = part.related_part(rId)
+            except KeyError:
+                continue
+            if not isinstance(image_part, ImagePart):
+                continue
+            
+            digest = hashlib.sha256(image_part.blob).hexdigest()
+            if digest not in canonical:
+                canonical[digest] = image_part
+                bytes_before += len(image_part.blob)
+            keeper = canonical[digest]
+            if keeper is not image_part:
+                # Point this reference at the kept copy; the duplicate part is not saved anymore
+                blip.set(f'{RELATIONSHIP_NS}embed', part.relate_to(keeper, RT.IMAGE))
+                replaced.add(rId)
+                if id(image_part) not in merged:
+                    merged.add(id(image_part))
+                    bytes_before += len(image_part.blob)
+            
+            width, height = _blip_display_size(blip, slide_width, slide_height)
+            entry = needed.setdefault(id(keeper), [keeper, 0, 0])
+            entry[1] = max(entry[1], target_size[0] * width / slide_width)
+            entry[2] = max(entry[2], target_size[1] * height / slide_height)
+        
+        # Drop relationships of merged duplicates once nothing in this part uses them
+        if replaced:
+            in_use = {value for node in element.iter() for value in node.attrib.values()}
+            for rId in replaced - in_use:
+                part.drop_rel(rId)
+    
+    entries = list(needed.values())
+    work = [(entry[0].blob, (max(1, round(entry[1])), max(1, round(entry[2])))) for entry in entries]
+    if jobs == 1 or len(work) <= 1:
+        results = [_downscale_image_blob(blob, size) for blob, size in work]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(_downscale_image_blob, *zip(*work)))
+    
+    downscaled = 0
+    for entry, result in zip(entries, results):
+        if result is not None:
+            entry[0]._blob = result
+            downscaled += 1
+    
+    return {
+        'images': len(entries),
+        'duplicates_merged': len(merged),
+        'images_downscaled': downscaled,
+        'bytes_before': bytes_before,
+        'bytes_after': sum(len(entry[0].blob) for entry in entries),
+    }
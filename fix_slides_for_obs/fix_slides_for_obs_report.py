@@ -0,0 +1,238 @@
+"""
+Machine-readable run reports for fix_slides_for_obs.
+
+`fix_slides_for_obs.py --report FILE` appends one JSON object per line (NDJSON)
+to FILE while the deck is processed. Every line is flushed as it is written,
+so an interrupted run still leaves a usable report (it just has no "end"
+record), and one file can collect many runs.
+
+Records:
+    run          The input and output files, every CLI option and the start time
+    slide        A slide done by a step: slide_num, slide_count, processed, scale
+                 (reposition only) and seconds since the previous slide of the step
+    font_change  slide_num, shape_name, old_size, new_size, scale
+    overflow     slide_num, shape_name and the check_text_overflow() geometry (EMUs)
+    step         A pipeline step finished: seconds since the previous step, plus its counts
+    cache        hits and misses of the scale hints or the render cache
+    memory       With --memory-profile, after each step record: the step's tracemalloc
+                 peak and held bytes, RSS at its start, peak and end, and top allocators
+    end          Total seconds of the run
+
+Summarize reports, e.g. the slowest slides across a month of decks:
+    python fix_slides_for_obs_report.py reports/*.ndjson --top 20
+"""
+import json
+import sys
+import time
+
+
+class RunReport:
+    """
+    NDJSON report of one CLI run. With path=None every method does nothing, so
+    the CLI can report unconditionally.
+
+    Args:
+        path: Report file, appended to
+        memory: Optional started MemoryProfiler; every step() also marks it
+    """
+
+    def __init__(self, path=None, memory=None):
+        self.file = open(path, 'a', encoding='utf-8') if path else None
+        self.memory = memory
+        self.started = self.last_step = time.perf_counter()
+
+    def write(self, record_type, **fields):
+        """Append one record and flush it."""
+        if self.file is None:
+            return
+        self.file.write(json.dumps({'type': record_type, **fields}, ensure_ascii=False, default=str) + '\n')
+        self.file.flush()
+
+    def start(self, args):
+        """Write the run record: files and options of the parsed CLI arguments."""
+        self.write('run', input=args.input_file, output=args.output_file, options=vars(args),
+                   started=time.strftime('%Y-%m-%dT%H:%M:%S%z'))
+
+    def step(self, name, **counts):
+        """Mark the end of a pipeline step, timed from the end of the previous one."""
+        now = time.perf_counter()
+        self.write('step', step=name, seconds=round(now - self.last_step, 4), **counts)
+        if self.memory is not None:
+            stats = self.memory.mark(name)
+            if stats is not None:
+                self.write('memory', **stats.as_record())
+            # The snapshots are not part of the next step
+            now = time.perf_counter()
+        self.last_step = now
+
+    def cache(self, name, cache):
+        """Write the hit and miss counts of a ScaleHintCache or RenderCache."""
+        self.write('cache', cache=name, hits=cache.hits, misses=cache.misses)
+
+    def track(self, step, events):
+        """
+        Pass the events of a processor stream through, writing a record for each.
+
+        Args:
+            step: Name of the pipeline step, e.g. 'reposition'
+            events: Iterable of FontChange, TextOverflow and SlideProgress records
+
+        Yields:
+            The events, unchanged
+        """
+        if self.file is None:
+            yield from events
+            return
+
+        from fix_slides_for_obs_layout import FontChange, SlideProgress, TextOverflow
+
+        last_slide = time.perf_counter()
+        for event in events:
+            if isinstance(event, SlideProgress):
+                now = time.perf_counter()
+                self.write('slide', step=step, slide_num=event.slide_num, slide_count=event.slide_count,
+                           processed=event.processed, scale=event.scale, seconds=round(now - last_slide, 4))
+                last_slide = now
+            elif isinstance(event, FontChange):
+                self.write('font_change', step=step, slide_num=event.slide_num, shape_name=event.shape_name,
+                           old_size=event.old_size, new_size=event.new_size, scale=event.scale)
+            elif isinstance(event, TextOverflow):
+                geometry = {key: value for key, value in event.overflow_info.items() if key != 'overflows'}
+                self.write('overflow', step=step, slide_num=event.slide_num, shape_name=event.shape_name,
+                           **geometry)
+            yield event
+
+    def close(self):
+        """Write the end record and close the file."""
+        if self.file is None:
+            return
+        self.write('end', seconds=round(time.perf_counter() - self.started, 4))
+        self.file.close()
+        self.file = None
+
+
+# ================= AGGREGATION =================
+
+def read_records(paths):
+    """
+    Read the records of NDJSON reports, skipping lines that are not valid JSON
+    (e.g. the last line of a report whose run was killed while writing).
+
+    Yields:
+        tuple: (input file of the run the record belongs to, record dict)
+    """
+    for path in paths:
+        input_file = None
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get('type') == 'run':
+                    input_file = record.get('input')
+                yield input_file, record
+
+
+def summarize_reports(paths, top=10):
+    """
+    Aggregate any number of reports.
+
+    Args:
+        paths: NDJSON report files
+        top: Number of slowest slides to keep
+
+    Returns:
+        dict: {'runs', 'finished', 'seconds', 'slides', 'font_changes', 'overflows',
+               'step_seconds': {step: total}, 'caches': {name: {'hits', 'misses'}},
+               'memory_peaks': {step: {'traced_peak', 'rss_peak'}} (highest of all runs, bytes),
+               'slowest_slides': [{'input', 'step', 'slide_num', 'seconds', 'scale'}]}
+    """
+    import heapq
+
+    summary = {'runs': 0, 'finished': 0, 'seconds': 0.0, 'slides': 0, 'font_changes': 0, 'overflows': 0,
+               'step_seconds': {}, 'caches': {}, 'memory_peaks': {}}
+    slides = []  # Min-heap of the slowest (seconds, counter, slide)
+
+    for input_file, record in read_records(paths):
+        record_type = record.get('type')
+        if record_type == 'run':
+            summary['runs'] += 1
+        elif record_type == 'end':
+            summary['finished'] += 1
+            summary['seconds'] += record['seconds']
+        elif record_type == 'step':
+            summary['step_seconds'][record['step']] = (
+                summary['step_seconds'].get(record['step'], 0.0) + record['seconds'])
+        elif record_type == 'slide':
+            summary['slides'] += 1
+            slide = {'input': input_file, 'step': record['step'], 'slide_num': record['slide_num'],
+                     'seconds': record['seconds'], 'scale': record.get('scale')}
+            entry = (record['seconds'], summary['slides'], slide)
+            if len(slides) < top:
+                heapq.heappush(slides, entry)
+            else:
+                heapq.heappushpop(slides, entry)
+        elif record_type == 'font_change':
+            summary['font_changes'] += 1
+        elif record_type == 'overflow':
+            summary['overflows'] += 1
+        elif record_type == 'cache':
+            totals = summary['caches'].setdefault(record['cache'], {'hits': 0, 'misses': 0})
+            totals['hits'] += record['hits']
+            totals['misses'] += record['misses']
+        elif record_type == 'memory':
+            peaks = summary['memory_peaks'].setdefault(record['step'], {'traced_peak': 0, 'rss_peak': None})
+            peaks['traced_peak'] = max(peaks['traced_peak'], record['traced_peak'])
+            if record.get('rss_peak') is not None:
+                peaks['rss_peak'] = max(peaks['rss_peak'] or 0, record['rss_peak'])
+
+    summary['slowest_slides'] = [slide for _, _, slide in sorted(slides, reverse=True)]
+    return summary
+
+
+def print_summary(summary):
+    print(f"{summary['runs']} run(s), {summary['finished']} finished, {summary['seconds']:.1f} s in total")
+    print(f"{summary['slides']} slide step(s), {summary['font_changes']} font change(s), "
+          f"{summary['overflows']} overflow(s)")
+    if summary['step_seconds']:
+        print("\nTime per step:")
+        for step, seconds in sorted(summary['step_seconds'].items(), key=lambda item: -item[1]):
+            print(f"  {step:<20} {seconds:10.2f} s")
+    if summary['caches']:
+        print("\nCaches:")
+        for name, totals in summary['caches'].items():
+            lookups = totals['hits'] + totals['misses']
+            rate = f" ({totals['hits'] / lookups:.0%} hits)" if lookups else ""
+            print(f"  {name:<20} {totals['hits']} hit(s), {totals['misses']} miss(es){rate}")
+    if summary['memory_peaks']:
+        print("\nMemory peak per step (highest run):")
+        for step, peaks in summary['memory_peaks'].items():
+            rss = f", RSS {peaks['rss_peak'] / 1048576:.1f} MB" if peaks['rss_peak'] is not None else ""
+            print(f"  {step:<20} Python {peaks['traced_peak'] / 1048576:.1f} MB{rss}")
+    if summary['slowest_slides']:
+        print("\nSlowest slides:")
+        for slide in summary['slowest_slides']:
+            scale = f", scale {slide['scale']:.2f}" if slide['scale'] is not None else ""
+            print(f"  {slide['seconds']:8.3f} s  {slide['input']} slide {slide['slide_num']} "
+                  f"({slide['step']}{scale})")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Summarize fix_slides_for_obs --report files.")
+    parser.add_argument("reports", nargs="+", help="NDJSON report files")
+    parser.add_argument("--top", type=int, default=10, help="Slowest slides to list (default: %(default)s)")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args()
+
+    summary = summarize_reports(args.reports, args.top)
+    if args.json:
+        print(json.dumps(summary, indent=2, ensure_ascii=False))
+    else:
+        print_summary(summary)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
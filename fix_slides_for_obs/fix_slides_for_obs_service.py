@@ -0,0 +1,336 @@
+"""
+Warm processing service for fix_slides_for_obs.
+
+Each CLI run or GUI click otherwise starts cold: python-pptx, lxml and Pillow
+are imported again and the processor's font and measurement caches start
+empty. The service keeps all of that loaded in one long-running process that
+listens on localhost HTTP. While it runs, the CLI and the GUI hand their jobs
+to it transparently (use --no-service to opt out).
+
+The service writes its port and a random token to SERVICE_FILE, readable only
+by its owner (mode 0600; on Windows the file is in the user's own AppData).
+Clients read that file and send the token with every request, so only programs
+of the same user can use it (web pages cannot read the file nor send the header).
+
+Endpoints:
+    GET  /health   -> {"status": "ok", "pid": ..., "jobs": ...}
+    POST /run      JSON {"argv": [...], "cwd": "..."} -> {"exit_code": ..., "output": "..."}
+                   Runs the CLI with argv as if started in cwd; files are read and written in place.
+    POST /process  Body: the .pptx bytes, CLI options as a JSON list in the X-Fix-Options header.
+                   Returns the fixed .pptx bytes, the CLI output (JSON string) in X-Fix-Output.
+
+Jobs run one at a time: they change the working directory and capture stdout.
+
+Usage:
+    python fix_slides_for_obs_service.py
+    python fix_slides_for_obs_service.py --port 8765
+"""
+import json
+import os
+import sys
+
+from fix_slides_for_obs_defaults import APP_DATA_DIR
+
+SERVICE_HOST = '127.0.0.1'
+SERVICE_FILE = os.path.join(APP_DATA_DIR, 'service.json')
+TOKEN_HEADER = 'X-Fix-Token'
+OPTIONS_HEADER = 'X-Fix-Options'
+OUTPUT_HEADER = 'X-Fix-Output'
+EXIT_CODE_HEADER = 'X-Fix-Exit-Code'
+PPTX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.presentationml.presentation'
+HEALTH_TIMEOUT = 2  # Seconds the service gets to answer /health before a job is sent
+JOB_TIMEOUT = 600   # Seconds a job may wait for an answer (queued behind other jobs included)
+
+
+# ================= CLIENT =================
+# Standard library only, so checking for the service costs the CLI nothing.
+
+def read_service_info(service_file=SERVICE_FILE):
+    """
+    Read the port and token of the running service.
+
+    Returns:
+        dict: {'port', 'token', 'pid'}, or None if no service has been started
+    """
+    try:
+        with open(service_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _service_request(method, path, body=None, headers=None, service_file=SERVICE_FILE, timeout=JOB_TIMEOUT):
+    """
+    Send one request to the service.
+
+    Args:
+        timeout: Seconds to wait for the connection and for each read of the answer
+
+    Returns:
+        tuple: (status, headers, body), or None when no service answers in time
+    """
+    info = read_service_info(service_file)
+    if info is None:
+        return None
+
+    import http.client
+
+    headers = dict(headers or {})
+    headers[TOKEN_HEADER] = info['token']
+    connection = http.client.HTTPConnection(SERVICE_HOST, info['port'], timeout=timeout)
+    try:
+        connection.request(method, path, body=body, headers=headers)
+        response = connection.getresponse()
+        return response.status, response.headers, response.read()
+    except (OSError, http.client.HTTPException):
+        return None  # Stale service file (the service is gone), or a hung service (timeout)
+    finally:
+        connection.close()
+
+
+def _service_alive(service_file=SERVICE_FILE):
+    """
+    Whether a service answers /health within HEALTH_TIMEOUT. Checked before every
+    job, so a hung service costs clients seconds, not JOB_TIMEOUT.
+    """
+    response = _service_request('GET', '/health', service_file=service_file, timeout=HEALTH_TIMEOUT)
+    return response is not None and response[0] == 200
+
+
+def run_via_service(argv, cwd=None, service_file=SERVICE_FILE):
+    """
+    Run the CLI in the warm service, if one is running.
+
+    Args:
+        argv: Command-line arguments, as for fix_slides_for_obs.py
+        cwd: Directory relative paths in argv refer to (default: the current one)
+
+    Returns:
+        tuple: (exit_code, output), or None if no service is available
+    """
+    if not _service_alive(service_file):
+        return None
+    body = json.dumps({'argv': list(argv), 'cwd': cwd or os.getcwd()}).encode('utf-8')
+    response = _service_request('POST', '/run', body, {'Content-Type': 'application/json'}, service_file)
+    if response is None or response[0] != 200:
+        return None
+    result = json.loads(response[2].decode('utf-8'))
+    return result['exit_code'], result['output']
+
+
+def process_bytes_via_service(data, options=(), service_file=SERVICE_FILE):
+    """
+    Fix a presentation given as bytes in the warm service.
+
+    Args:
+        data: The .pptx file contents
+        options: CLI options (without input and output files), e.g. ['--reposition']
+
+    Returns:
+        tuple: (fixed .pptx bytes, output), or None if no service is available
+
+    Raises:
+        RuntimeError: If the service ran the job and it failed
+    """
+    if not _service_alive(service_file):
+        return None
+    headers = {'Content-Type': PPTX_CONTENT_TYPE, OPTIONS_HEADER: json.dumps(list(options))}
+    response = _service_request('POST', '/process', data, headers, service_file)
+    if response is None or response[0] == 403:
+        return None
+    status, response_headers, body = response
+    output = json.loads(response_headers.get(OUTPUT_HEADER, '""'))
+    if status != 200:
+        raise RuntimeError(output or f"Service error {status}")
+    return body, output
+
+
+# ================= SERVER =================
+
+def run_cli_job(argv, cwd):
+    """
+    Run the CLI with argv in this process, capturing its output.
+
+    Returns:
+        tuple: (exit_code, output)
+    """
+    import contextlib
+    import io
+    import fix_slides_for_obs as cli
+
+    output = io.StringIO()
+    previous_cwd = os.getcwd()
+    exit_code = 0
+    try:
+        os.chdir(cwd)
+        with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+            try:
+                cli.run(cli.build_parser().parse_args(argv))
+            except SystemExit as e:
+                exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+            # Same messages as a local run (see fix_slides_for_obs.py)
+            except FileNotFoundError as e:
+                print(f"Error: Could not find file. {e}")
+                exit_code = 1
+            except Exception as e:
+                print(f"Error: {e}")
+                exit_code = 1
+    finally:
+        os.chdir(previous_cwd)
+    return exit_code, output.getvalue()
+
+
+def make_handler(token, job_lock, stats):
+    """Request handler class bound to the service token."""
+    from http.server import BaseHTTPRequestHandler
+
+    class ServiceHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass  # Keep the console for job summaries
+
+        def _authorized(self):
+            if self.headers.get(TOKEN_HEADER) == token:
+                return True
+            self._send(403, b'{"error": "invalid token"}')
+            return False
+
+        def _send(self, status, body, content_type='application/json', headers=None):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _body(self):
+            return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+        def do_GET(self):
+            if not self._authorized():
+                return
+            if self.path != '/health':
+                self._send(404, b'{"error": "not found"}')
+                return
+            self._send(200, json.dumps({'status': 'ok', 'pid': os.getpid(), 'jobs': stats['jobs']}).encode())
+
+        def do_POST(self):
+            if not self._authorized():
+                return
+            if self.path == '/run':
+                try:
+                    request = json.loads(self._body().decode('utf-8'))
+                    argv = [str(arg) for arg in request['argv']]
+                    cwd = str(request['cwd'])
+                except (ValueError, KeyError, TypeError):
+                    self._send(400, b'{"error": "expected JSON {\"argv\": [...], \"cwd\": \"...\"}"}')
+                    return
+                with job_lock:
+                    exit_code, output = run_cli_job(argv, cwd)
+                    stats['jobs'] += 1
+                    # Inside the lock: no other job has sys.stdout redirected now
+                    print(f"Job {stats['jobs']}: {' '.join(argv)} -> exit {exit_code}")
+                self._send(200, json.dumps({'exit_code': exit_code, 'output': output}).encode('utf-8'))
+            elif self.path == '/process':
+                self._process_bytes()
+            else:
+                self._send(404, b'{"error": "not found"}')
+
+        def _process_bytes(self):
+            import shutil
+            import tempfile
+
+            try:
+                options = [str(option) for option in json.loads(self.headers.get(OPTIONS_HEADER, '[]'))]
+            except (ValueError, TypeError):
+                self._send(400, b'{"error": "expected a JSON list of CLI options in X-Fix-Options"}')
+                return
+            work_dir = tempfile.mkdtemp(prefix='fix_slides_for_obs_')
+            try:
+                input_path = os.path.join(work_dir, 'input.pptx')
+                output_path = os.path.join(work_dir, 'output.pptx')
+                with open(input_path, 'wb') as f:
+                    f.write(self._body())
+                with job_lock:
+                    exit_code, output = run_cli_job([input_path, '-o', output_path] + options, work_dir)
+                    stats['jobs'] += 1
+                    print(f"Job {stats['jobs']}: <bytes> {' '.join(options)} -> exit {exit_code}")
+
+                headers = {OUTPUT_HEADER: json.dumps(output), EXIT_CODE_HEADER: str(exit_code)}
+                if exit_code or not os.path.exists(output_path):
+                    self._send(500, b'', headers=headers)
+                    return
+                with open(output_path, 'rb') as f:
+                    self._send(200, f.read(), PPTX_CONTENT_TYPE, headers)
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+    return ServiceHandler
+
+
+def serve(port=0, service_file=SERVICE_FILE):
+    """
+    Run the service until interrupted.
+
+    Args:
+        port: TCP port on 127.0.0.1 (0 picks a free one)
+        service_file: Where to publish the port and token for clients
+    """
+    import secrets
+    import threading
+    from http.server import ThreadingHTTPServer
+
+    # Pay for the heavy imports once, before the first job
+    import fix_slides_for_obs_processor  # noqa: F401 (imports python-pptx, lxml and Pillow)
+
+    token = secrets.token_hex(16)
+    server = ThreadingHTTPServer((SERVICE_HOST, port), make_handler(token, threading.Lock(), {'jobs': 0}))
+
+    os.makedirs(os.path.dirname(service_file), exist_ok=True)
+    info = {'port': server.server_address[1], 'token': token, 'pid': os.getpid()}
+    temp_file = f"{service_file}.{os.getpid()}.tmp"
+    # The token must only be readable by this user: create the file with mode 0600
+    # (a leftover temporary file would keep its old mode, so it is removed first)
+    try:
+        os.remove(temp_file)
+    except FileNotFoundError:
+        pass
+    with open(os.open(temp_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), 'w', encoding='utf-8') as f:
+        json.dump(info, f)
+    os.replace(temp_file, service_file)
+
+    print(f"fix_slides_for_obs service listening on http://{SERVICE_HOST}:{info['port']} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        # Only remove the file if a newer service has not replaced it
+        if read_service_info(service_file) == info:
+            os.remove(service_file)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Keep fix_slides_for_obs loaded and serve CLI/GUI jobs on localhost."
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=0,
+        help="TCP port on 127.0.0.1 (default: any free port, published in the service file)"
+    )
+    parser.add_argument(
+        "--service-file",
+        default=SERVICE_FILE,
+        help=f"Where clients find the port and token (default: {SERVICE_FILE})"
+    )
+    args = parser.parse_args()
+    serve(args.port, args.service_file)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
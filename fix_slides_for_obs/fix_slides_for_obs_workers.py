@@ -0,0 +1,190 @@
+"""
+Code that runs in the worker processes of the PNG export and image downscaling.
+
+Standard library and Pillow only. Process pools on Windows and macOS start their
+workers by importing the pool function's module; keeping python-pptx and lxml
+out of this one makes each worker start faster and use less memory (see the
+workers benchmark in benchmark.py).
+"""
+import re
+
+try:
+    from PIL import ImageFont, ImageDraw, Image
+    PILLOW_AVAILABLE = True
+except ImportError:
+    PILLOW_AVAILABLE = False
+
+RENDER_LINE_SPACING = 1.2         # PowerPoint single line spacing is ~1.2x the font size
+DOWNSCALE_JPEG_QUALITY = 90
+
+
+# ================= PNG IMAGE-SEQUENCE EXPORT =================
+
+_render_font_cache = {}
+
+
+def _load_render_font(font_path, size_px):
+    """Load (and cache per process) a font for rendering; falls back to Pillow's default font."""
+    key = (font_path, int(round(size_px)))
+    font = _render_font_cache.get(key)
+    if font is None:
+        try:
+            font = ImageFont.truetype(font_path, key[1])
+        except (OSError, TypeError, AttributeError):
+            font = ImageFont.load_default(size=key[1])
+        _render_font_cache[key] = font
+    return font
+
+
+def _layout_paragraph(paragraph, max_width):
+    """
+    Word-wrap a paragraph's runs into lines.
+    
+    Returns:
+        list: Lines as lists of (text, run, font) pieces
+    """
+    lines = [[]]
+    line_width = 0
+    for run in paragraph['runs']:
+        font = _load_render_font(run['font_path'], run['size_px'])
+        # Keep the whitespace attached to each word so the original spacing is kept
+        for word in re.findall(r'\S+\s*|\s+', run['text']):
+            word_width = font.getlength(word.rstrip())
+            if lines[-1] and line_width + word_width > max_width:
+                lines.append([])
+                line_width = 0
+            lines[-1].append((word, run, font))
+            line_width += font.getlength(word)
+    return lines
+
+
+def render_slide_image(spec):
+    """
+    Render a slide spec (see build_slide_render_spec()) into an RGBA image with a
+    transparent background. Each glow is drawn as the text mask dilated by the
+    glow radius (a stroke around the glyphs), with a slightly softened edge.
+    
+    Args:
+        spec: Dict returned by build_slide_render_spec()
+    
+    Returns:
+        PIL.Image.Image: The rendered RGBA image
+    """
+    if not PILLOW_AVAILABLE:
+        raise ImportError("Pillow is required to render slides. Install with: pip install Pillow")
+    
+    from PIL import ImageFilter
+    
+    size = (spec['width'], spec['height'])
+    text_masks = {}  # color -> 'L' mask
+    glow_masks = {}  # (color, radius) -> 'L' mask
+    
+    def mask(masks, key):
+        if key not in masks:
+            masks[key] = Image.new('L', size, 0)
+        return ImageDraw.Draw(masks[key])
+    
+    for shape in spec['shapes']:
+        left, top, width, height = shape['box']
+        
+        # Lay out every line first to know the block height for vertical anchoring
+        lines = []
+        for paragraph in shape['paragraphs']:
+            for pieces in _layout_paragraph(paragraph, width):
+                if pieces:
+                    ascent = max(font.getmetrics()[0] for _, _, font in pieces)
+                    line_height = max(run['size_px'] for _, run, _ in pieces) * RENDER_LINE_SPACING
+                else:
+                    ascent, line_height = 0, paragraph['empty_size_px'] * RENDER_LINE_SPACING
+                lines.append((pieces, paragraph['align'], ascent, line_height))
+        
+        block_height = sum(line[3] for line in lines)
+        y = top
+        if shape['anchor'] == 'middle':
+            y = top + (height - block_height) / 2
+        elif shape['anchor'] == 'bottom':
+            y = top + height - block_height
+        
+        for pieces, align, ascent, line_height in lines:
+            line_width = sum(font.getlength(text) for text, _, font in pieces[:-1])
+            if pieces:
+                line_width += pieces[-1][2].getlength(pieces[-1][0].rstrip())
+            x = left
+            if align == 'center':
+                x = left + (width - line_width) / 2
+            elif align == 'right':
+                x = left + width - line_width
+            
+            # Center the glyphs in the line box, like PowerPoint's extra leading above the text
+            baseline = y + (line_height - line_height / RENDER_LINE_SPACING) / 2 + ascent
+            for text, run, font in pieces:
+                if run['glow_color'] and run['glow_px'] > 0:
+                    stroke = max(1, int(round(run['glow_px'])))
+                    draw = mask(glow_masks, (run['glow_color'], stroke))
+                    draw.text((x, baseline), text, font=font, fill=255, anchor='ls',
+                              stroke_width=stroke, stroke_fill=255)
+                draw = mask(text_masks, run['color'])
+                draw.text((x, baseline), text, font=font, fill=255, anchor='ls')
+                x += font.getlength(text)
+            y += line_height
+    
+    # Glows first, text on top; each layer is only blurred and composited within its bounding box
+    image = Image.new('RGBA', size, (0, 0, 0, 0))
+    layers = [(color, glow_mask, max(1, radius / 8)) for (color, radius), glow_mask in glow_masks.items()]
+    layers += [(color, text_mask, 0) for color, text_mask in text_masks.items()]
+    for color_hex, layer_mask, blur in layers:
+        bbox = layer_mask.getbbox()
+        if bbox is None:
+            continue
+        pad = int(blur * 3)
+        box = (max(0, bbox[0] - pad), max(0, bbox[1] - pad),
+               min(size[0], bbox[2] + pad), min(size[1], bbox[3] + pad))
+        region = layer_mask.crop(box)
+        if blur:
+            region = region.filter(ImageFilter.GaussianBlur(blur))
+        
+        rgb = tuple(int(color_hex[i:i + 2], 16) for i in (0, 2, 4))
+        layer = Image.new('RGBA', region.size, rgb + (0,))
+        layer.putalpha(region)
+        image.alpha_composite(layer, dest=box[:2])
+    return image
+
+
+def _render_slide_to_file(spec, path):
+    """Worker entry point: render one slide spec and save it as PNG."""
+    render_slide_image(spec).save(path, 'PNG')
+    return path
+
+
+# ================= MEDIA DOWNSCALING =================
+
+def _downscale_image_blob(blob, target_size):
+    """
+    Worker entry point: shrink a JPEG or PNG so it still covers target_size pixels.
+    
+    Returns:
+        bytes: The re-encoded image, or None if it is already small enough, is in
+               another format, or would not get smaller
+    """
+    import io
+    
+    with Image.open(io.BytesIO(blob)) as image:
+        image_format = image.format
+        if image_format not in ('JPEG', 'PNG'):
+            return None
+        scale = max(target_size[0] / image.width, target_size[1] / image.height)
+        if scale >= 1:
+            return None
+        
+        new_size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+        resized = image.resize(new_size, Image.LANCZOS)
+        output = io.BytesIO()
+        if image_format == 'JPEG':
+            # Keep EXIF (orientation) and the color profile of phone photos
+            resized.save(output, 'JPEG', quality=DOWNSCALE_JPEG_QUALITY,
+                         exif=image.info.get('exif', b''), icc_profile=image.info.get('icc_profile'))
+        else:
+            resized.save(output, 'PNG', optimize=True, icc_profile=image.info.get('icc_profile'))
+    
+    data = output.getvalue()
+    return data if len(data) < len(blob) else None
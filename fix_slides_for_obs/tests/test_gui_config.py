@@ -123,7 +123,8 @@ class TestConfigSaveLoad(unittest.TestCase):
             # Check all expected keys are present
             expected_keys = [
                 'glow_color', 'glow_size', 'text_color',
-                'reset_masters', 'check_overflow', 'reposition', 'invert_colors'
+                'reset_masters', 'check_overflow', 'reposition', 'vectorized_fit', 'invert_colors', 'shape_level_style',
+                'downscale_images', 'export_png'
             ]
             for key in expected_keys:
                 self.assertIn(key, config)
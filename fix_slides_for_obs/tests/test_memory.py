@@ -0,0 +1,78 @@
+"""
+Unit tests for fix_slides_for_obs_memory.
+
+Run with: python -m pytest tests/test_memory.py -v
+Or from tests/: python -m pytest test_memory.py -v
+"""
+import unittest
+import contextlib
+import io
+import json
+import os
+import sys
+import shutil
+import tempfile
+import tracemalloc
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from fix_slides_for_obs_memory import MemoryProfiler
+
+TEST_SLIDE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test_slides', 'slide_aleluia.pptx')
+MB = 1024 * 1024
+
+
+class TestMemoryProfiler(unittest.TestCase):
+    """Test the per-step memory profile."""
+
+    def test_step_peak_held_and_allocators(self):
+        """A step's peak counts freed memory, held only what is left, and the allocating line is named."""
+        with MemoryProfiler(top=3) as memory:
+            with memory.stage('held'):
+                kept = bytearray(4 * MB)
+            with memory.stage('freed'):
+                freed = bytearray(8 * MB)
+                del freed
+        self.assertFalse(tracemalloc.is_tracing())
+
+        held, freed = memory.stages
+        self.assertEqual((held.stage, freed.stage), ('held', 'freed'))
+        self.assertGreaterEqual(held.traced_held, 4 * MB)
+        self.assertTrue(held.top[0].location.startswith('test_memory.py:'))
+        self.assertIn('bytearray(4 * MB)', held.top[0].line)
+        self.assertGreaterEqual(freed.traced_peak, 8 * MB)
+        self.assertLess(freed.traced_held, MB)
+        self.assertEqual(len(kept), 4 * MB)
+
+    def test_disabled_profiler_does_nothing(self):
+        """MemoryProfiler(enabled=False) neither traces nor records."""
+        memory = MemoryProfiler(enabled=False)
+        memory.start()
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertIsNone(memory.mark('open'))
+        memory.stop()
+        self.assertEqual(memory.stages, [])
+
+    def test_cli_memory_profile(self):
+        """--memory-profile prints every step and adds a memory record per step to --report."""
+        import fix_slides_for_obs as cli
+
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        report = os.path.join(tmp, 'report.ndjson')
+        argv = [TEST_SLIDE, '-o', os.path.join(tmp, 'fixed.pptx'), '--reset-masters',
+                '--memory-profile', '--report', report]
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            cli.run(cli.build_parser().parse_args(argv))
+
+        self.assertIn('Memory per step:', output.getvalue())
+        with open(report, 'r', encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+        memory_steps = [record['step'] for record in records if record['type'] == 'memory']
+        self.assertEqual(memory_steps, ['open', 'reset_masters', 'process', 'save'])
+        self.assertFalse(tracemalloc.is_tracing())
+
+
+if __name__ == '__main__':
+    unittest.main()
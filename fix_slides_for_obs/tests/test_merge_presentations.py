@@ -0,0 +1,124 @@
+"""
+Unit tests for debug_slide.merge_presentations.
+
+Run with: python -m pytest tests/test_merge_presentations.py -v
+Or from tests/: python -m pytest test_merge_presentations.py -v
+"""
+import unittest
+import unittest.mock
+import os
+import sys
+import shutil
+import tempfile
+import zipfile
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import debug_slide
+
+TEST_SLIDES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test_slides')
+
+
+class TestMergePresentations(unittest.TestCase):
+    """Test merging decks with shared masters and media."""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.output = os.path.join(self.tmp, 'merged.pptx')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def picture_deck(self, name, text):
+        """A default-template deck with one picture and one text box."""
+        import io
+        from PIL import Image
+        from pptx import Presentation
+        from pptx.util import Inches
+
+        image = io.BytesIO()
+        Image.new('RGB', (200, 100), 'red').save(image, 'PNG')
+        prs = Presentation()
+        slide = prs.slides.add_slide(prs.slide_layouts[6])
+        slide.shapes.add_picture(image, 0, 0)
+        slide.shapes.add_textbox(0, 0, Inches(3), Inches(1)).text_frame.text = text
+        path = os.path.join(self.tmp, name)
+        prs.save(path)
+        return path
+
+    def test_identical_masters_are_reused(self):
+        """Slides split from the same deck share one master after merging."""
+        from pptx import Presentation
+
+        sources = [os.path.join(TEST_SLIDES_DIR, name) for name in
+                   ('slide_aleluia.pptx', 'slide_anamnese_1.pptx', 'slide_anamnese_2.pptx')]
+        stats = debug_slide.merge_presentations(sources, self.output, fix=False)
+
+        self.assertEqual(stats['masters_reused'], 2)
+        self.assertEqual(stats['masters_imported'], 0)
+        merged = Presentation(self.output)
+        self.assertEqual(len(merged.slides), 3)
+        self.assertEqual(len(merged.slide_masters), 1)
+        for slide, source in zip(merged.slides, sources):
+            expected = Presentation(source).slides[0]
+            self.assertEqual(slide.slide_layout.name, expected.slide_layout.name)
+            self.assertEqual([shape.name for shape in slide.shapes], [shape.name for shape in expected.shapes])
+
+    def test_different_master_is_imported_and_media_deduplicated(self):
+        """A foreign master is imported once, and identical pictures share one media part."""
+        from pptx import Presentation
+
+        sources = [
+            os.path.join(TEST_SLIDES_DIR, 'slide_aleluia.pptx'),
+            self.picture_deck('first.pptx', 'first'),
+            self.picture_deck('second.pptx', 'second'),
+        ]
+        stats = debug_slide.merge_presentations(sources, self.output, fix=False)
+
+        self.assertEqual(stats['masters_imported'], 1)
+        self.assertEqual(stats['masters_reused'], 1)
+        self.assertEqual(stats['media_copied'], 1)
+        self.assertEqual(stats['media_reused'], 1)
+
+        with zipfile.ZipFile(self.output) as package:
+            names = package.namelist()
+        self.assertEqual(len(names), len(set(names)))
+        self.assertEqual(len([name for name in names if name.startswith('ppt/media/')]), 1)
+
+        merged = Presentation(self.output)
+        self.assertEqual(len(merged.slide_masters), 2)
+        layout_ids = [layout_id.get('id') for master in merged.slide_masters
+                      for layout_id in master._element.sldLayoutIdLst]
+        master_ids = [master_id.get('id') for master_id in merged.part._element.sldMasterIdLst]
+        self.assertEqual(len(layout_ids + master_ids), len(set(layout_ids + master_ids)))
+        texts = [shape.text_frame.text for slide in list(merged.slides)[1:]
+                 for shape in slide.shapes if shape.has_text_frame]
+        self.assertEqual(texts, ['first', 'second'])
+
+    def test_obs_fix_runs_once_over_merged_deck(self):
+        """With fix=True the merged slides get the glow applied."""
+        from pptx import Presentation
+
+        sources = [os.path.join(TEST_SLIDES_DIR, name) for name in
+                   ('slide_aleluia.pptx', 'slide_anamnese_1.pptx')]
+        stats = debug_slide.merge_presentations(sources, self.output)
+
+        self.assertGreater(stats['text_shapes_processed'], 0)
+        merged = Presentation(self.output)
+        for slide in merged.slides:
+            self.assertIn('glow', slide.part.blob.decode('utf-8'))
+
+    def test_obs_fix_is_the_cli_pipeline(self):
+        """The merged deck goes through the CLI's run(), master reset included."""
+        import fix_slides_for_obs_processor as processor
+
+        sources = [os.path.join(TEST_SLIDES_DIR, name) for name in
+                   ('slide_aleluia.pptx', 'slide_anamnese_1.pptx')]
+        with unittest.mock.patch.object(processor, 'reset_master_slides',
+                                        wraps=processor.reset_master_slides) as reset:
+            debug_slide.merge_presentations(sources, self.output)
+        reset.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
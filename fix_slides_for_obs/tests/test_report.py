@@ -0,0 +1,113 @@
+"""
+Unit tests for fix_slides_for_obs_report.
+
+Run with: python -m pytest tests/test_report.py -v
+Or from tests/: python -m pytest test_report.py -v
+"""
+import unittest
+import contextlib
+import io
+import json
+import os
+import sys
+import shutil
+import tempfile
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fix_slides_for_obs_report as report_module
+from fix_slides_for_obs_layout import FontChange, SlideProgress, TextOverflow
+
+TEST_SLIDE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test_slides', 'slide_aleluia.pptx')
+
+
+class TestRunReport(unittest.TestCase):
+    """Test writing and summarizing NDJSON run reports."""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.path = os.path.join(self.tmp, 'report.ndjson')
+
+    def read(self, path=None):
+        with open(path or self.path, 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+    def test_track_writes_records_as_events_pass(self):
+        """Each event is written (and flushed) before the consumer gets it."""
+        events = [
+            FontChange(1, 'Título 1', 20.0, 40, 2.0),
+            SlideProgress(1, 2, True, 2.0),
+            TextOverflow(2, 'Box', {'overflows': True, 'overflow_right': 12700, 'overflow_bottom': -1}),
+            SlideProgress(2, 2, False),
+        ]
+        report = report_module.RunReport(self.path)
+        stream = report.track('reposition', events)
+
+        self.assertIs(next(stream), events[0])
+        self.assertEqual([record['type'] for record in self.read()], ['font_change'])
+        self.assertEqual(list(stream), events[1:])
+        report.close()
+
+        records = self.read()
+        self.assertEqual([record['type'] for record in records],
+                         ['font_change', 'slide', 'overflow', 'slide', 'end'])
+        self.assertEqual(records[1]['scale'], 2.0)
+        self.assertEqual(records[2]['overflow_right'], 12700)
+        self.assertNotIn('overflows', records[2])
+        self.assertTrue(all(record.get('step', 'reposition') == 'reposition' for record in records))
+
+    def test_without_path_nothing_is_written(self):
+        """RunReport(None) passes events through and writes no file."""
+        report = report_module.RunReport(None)
+        events = [SlideProgress(1, 1, True)]
+        self.assertEqual(list(report.track('auto_fit', events)), events)
+        report.step('save')
+        report.close()
+        self.assertEqual(os.listdir(self.tmp), [])
+
+    def test_summary_over_several_reports(self):
+        """Runs from several files are added up, and the slowest slides are listed first."""
+        for name, seconds in (('a.ndjson', [0.5, 0.1]), ('b.ndjson', [0.3])):
+            with open(os.path.join(self.tmp, name), 'w', encoding='utf-8') as f:
+                f.write(json.dumps({'type': 'run', 'input': name}) + '\n')
+                for slide_num, slide_seconds in enumerate(seconds, 1):
+                    f.write(json.dumps({'type': 'slide', 'step': 'reposition', 'slide_num': slide_num,
+                                        'seconds': slide_seconds, 'scale': 1.5}) + '\n')
+                f.write(json.dumps({'type': 'step', 'step': 'reposition', 'seconds': sum(seconds)}) + '\n')
+                f.write(json.dumps({'type': 'cache', 'cache': 'scale_hints', 'hits': 1, 'misses': 0}) + '\n')
+        # A run killed while writing: no end record, last line cut
+        with open(os.path.join(self.tmp, 'b.ndjson'), 'a', encoding='utf-8') as f:
+            f.write('{"type": "slide", "st')
+
+        summary = report_module.summarize_reports(
+            [os.path.join(self.tmp, name) for name in ('a.ndjson', 'b.ndjson')], top=2
+        )
+
+        self.assertEqual((summary['runs'], summary['finished'], summary['slides']), (2, 0, 3))
+        self.assertAlmostEqual(summary['step_seconds']['reposition'], 0.9)
+        self.assertEqual(summary['caches']['scale_hints'], {'hits': 2, 'misses': 0})
+        self.assertEqual([(slide['input'], slide['slide_num']) for slide in summary['slowest_slides']],
+                         [('a.ndjson', 1), ('b.ndjson', 1)])
+
+    def test_cli_appends_report(self):
+        """--report writes the run, its steps and the end record; a second run is appended."""
+        import fix_slides_for_obs as cli
+
+        output = os.path.join(self.tmp, 'fixed.pptx')
+        argv = [TEST_SLIDE, '-o', output, '--check-overflow', '--report', self.path]
+        for _ in range(2):
+            with contextlib.redirect_stdout(io.StringIO()):
+                cli.run(cli.build_parser().parse_args(argv))
+
+        records = self.read()
+        types = [record['type'] for record in records]
+        self.assertEqual(types.count('run'), 2)
+        self.assertEqual(types.count('end'), 2)
+        self.assertEqual(records[0]['options']['check_overflow'], True)
+        steps = [record['step'] for record in records[:types.index('end')] if record['type'] == 'step']
+        self.assertEqual(steps, ['open', 'check_overflow', 'process', 'save'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+"""
+Unit tests for fix_slides_for_obs_service.
+
+Run with: python -m pytest tests/test_service.py -v
+Or from tests/: python -m pytest test_service.py -v
+"""
+import unittest
+import unittest.mock
+import json
+import os
+import sys
+import shutil
+import tempfile
+import threading
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fix_slides_for_obs_processor as processor
+import fix_slides_for_obs_service as service
+
+TEST_SLIDE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test_slides', 'slide_aleluia.pptx')
+
+
+class TestService(unittest.TestCase):
+    """Test the warm service and its client helpers on a real localhost server."""
+
+    def setUp(self):
+        from http.server import ThreadingHTTPServer
+
+        self.tmp = tempfile.mkdtemp()
+        self.service_file = os.path.join(self.tmp, 'service.json')
+        handler = service.make_handler('secret', threading.Lock(), {'jobs': 0})
+        self.server = ThreadingHTTPServer((service.SERVICE_HOST, 0), handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.write_service_file(self.server.server_address[1], 'secret')
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.tmp)
+
+    def write_service_file(self, port, token):
+        with open(self.service_file, 'w') as f:
+            json.dump({'port': port, 'token': token, 'pid': os.getpid()}, f)
+
+    def test_run_writes_output_relative_to_cwd(self):
+        """The CLI runs in the service, with paths relative to the client's directory."""
+        shutil.copy(TEST_SLIDE, os.path.join(self.tmp, 'deck.pptx'))
+        result = service.run_via_service(['deck.pptx', '-o', 'fixed.pptx'], self.tmp, self.service_file)
+
+        self.assertIsNotNone(result)
+        exit_code, output = result
+        self.assertEqual(exit_code, 0)
+        self.assertIn('Processed 2 text shapes.', output)
+        self.assertTrue(os.path.exists(os.path.join(self.tmp, 'fixed.pptx')))
+
+    @unittest.skipUnless(processor.get_font_path('Arial'), "Arial is required to measure text")
+    def test_second_job_reuses_fonts(self):
+        """Fonts loaded by one job stay cached for the next, although each request runs on a new thread."""
+        from PIL import ImageFont
+
+        shutil.copy(TEST_SLIDE, os.path.join(self.tmp, 'deck.pptx'))
+        argv = ['deck.pptx', '-o', 'fixed.pptx', '--auto-fit']
+        with unittest.mock.patch.dict(processor._font_cache, clear=True), \
+                unittest.mock.patch.object(ImageFont, 'truetype', wraps=ImageFont.truetype) as truetype:
+            self.assertEqual(service.run_via_service(argv, self.tmp, self.service_file)[0], 0)
+            first_job_loads = truetype.call_count
+            self.assertEqual(service.run_via_service(argv, self.tmp, self.service_file)[0], 0)
+
+        self.assertGreater(first_job_loads, 0)
+        self.assertEqual(truetype.call_count, first_job_loads)
+
+    def test_process_bytes_returns_fixed_deck(self):
+        """A deck sent as bytes comes back fixed."""
+        import io
+        from pptx import Presentation
+
+        with open(TEST_SLIDE, 'rb') as f:
+            data, output = service.process_bytes_via_service(f.read(), ['--invert-colors'], self.service_file)
+
+        self.assertIn('Processed 2 text shapes.', output)
+        prs = Presentation(io.BytesIO(data))
+        self.assertEqual(str(prs.slides[0].background.fill.fore_color.rgb), '000000')
+
+    def test_failed_job_reports_exit_code(self):
+        """Errors of the job come back as output and a non-zero exit code."""
+        exit_code, output = service.run_via_service(['missing.pptx'], self.tmp, self.service_file)
+        self.assertEqual(exit_code, 1)
+        self.assertIn('Error:', output)
+
+    def test_wrong_token_or_stale_file_falls_back(self):
+        """Clients get None (process locally) without a usable service."""
+        self.write_service_file(self.server.server_address[1], 'wrong')
+        self.assertIsNone(service.run_via_service(['deck.pptx'], self.tmp, self.service_file))
+
+        os.remove(self.service_file)
+        self.assertIsNone(service.run_via_service(['deck.pptx'], self.tmp, self.service_file))
+
+    def test_malformed_run_request_gets_400(self):
+        """A /run body that is not the expected JSON is answered, not dropped."""
+        for body in (b'not json', b'{"argv": ["deck.pptx"]}', b'[1, 2]'):
+            response = service._service_request('POST', '/run', body, service_file=self.service_file)
+            self.assertIsNotNone(response)
+            self.assertEqual(response[0], 400)
+
+    def test_hung_service_falls_back(self):
+        """A service that accepts connections but never answers counts as no service."""
+        import socket
+        import time
+
+        hung = socket.socket()
+        self.addCleanup(hung.close)
+        hung.bind((service.SERVICE_HOST, 0))
+        hung.listen()
+        self.write_service_file(hung.getsockname()[1], 'secret')
+
+        start = time.perf_counter()
+        with unittest.mock.patch.object(service, 'HEALTH_TIMEOUT', 0.2):
+            self.assertIsNone(service.run_via_service(['deck.pptx'], self.tmp, self.service_file))
+        self.assertLess(time.perf_counter() - start, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,6 +8,7 @@ Run with: python -m pytest tests/test_slides_processor.py -v
 Or from tests/: python -m pytest test_slides_processor.py -v
 """
 import unittest
+import unittest.mock
 import os
 import sys
 
@@ -446,5 +447,764 @@ class TestProcessPresentationInvertColors(unittest.TestCase):
         self.assertEqual(fill.fore_color.rgb, RGBColor(255, 255, 255))
 
 
+
+def fake_measure_multiline_text_size(text, font_name, font_size_pt, max_width=None):
+    """Deterministic stand-in for Pillow measurement: fixed advance and line height."""
+    lines = text.split('\n')
+    width = max(len(line) for line in lines) * font_size_pt * 0.5
+    height = len(lines) * font_size_pt * 1.4
+    return (width, height)
+
+
+class TestScaleSearchTrace(unittest.TestCase):
+    """Test the trace hooks of the font scale search."""
+    
+    def setUp(self):
+        """Create a minimal presentation with one text box."""
+        from pptx import Presentation
+        from pptx.util import Inches, Pt
+        
+        self.prs = Presentation()
+        self.prs.slide_width = Inches(10)
+        self.prs.slide_height = Inches(5.625)
+        slide = self.prs.slides.add_slide(self.prs.slide_layouts[6])
+        txBox = slide.shapes.add_textbox(Inches(1), Inches(1), Inches(8), Inches(2))
+        run = txBox.text_frame.paragraphs[0].add_run()
+        run.text = "Glória a Deus"
+        run.font.size = Pt(20)
+        
+        patcher = unittest.mock.patch.object(
+            processor, 'measure_multiline_text_size', fake_measure_multiline_text_size
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def test_trace_receives_search_events(self):
+        """The trace callback sees the search start, measurements, iterations and the end."""
+        events = []
+        result = processor.reposition_and_maximize_font(
+            self.prs, trace=lambda event, **fields: events.append((event, fields))
+        )
+        names = [event for event, _ in events]
+        self.assertEqual(names[0], 'search_start')
+        self.assertEqual(names[-1], 'search_end')
+        self.assertIn('measurement', names)
+        self.assertIn('iteration', names)
+        
+        end_fields = events[-1][1]
+        self.assertEqual(end_fields['slide_num'], 1)
+        self.assertEqual(end_fields['best_scale'], result['font_changes'][0].scale)
+        self.assertEqual(end_fields['iterations'], names.count('iteration'))
+    
+    def test_no_output_without_trace(self):
+        """Without a trace the processor must not print anything."""
+        import io
+        import contextlib
+        
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            processor.reposition_and_maximize_font(self.prs)
+        self.assertEqual(output.getvalue(), "")
+    
+    def test_trace_does_not_change_result(self):
+        """Enabling the trace must not change the chosen scale."""
+        available_width_pt = 400
+        slide = self.prs.slides[0]
+        text_shapes = processor.collect_slide_text_shapes(slide, available_width_pt)
+        layout = processor.layout_text_shapes(text_shapes, 300 * 12700, 0, 10 * 12700)
+        
+        untraced = processor.find_best_scale(layout, available_width_pt)
+        traced = processor.find_best_scale(
+            layout, available_width_pt, trace=lambda event, **fields: None
+        )
+        self.assertEqual(untraced, traced)
+        self.assertGreater(untraced, 1.0)
+
+
+class TestLayoutModel(unittest.TestCase):
+    """Test the layout records used by the reposition step."""
+    
+    def setUp(self):
+        """Create a slide with a two-run text box above a one-run text box."""
+        from pptx import Presentation
+        from pptx.util import Inches, Pt
+        
+        self.prs = Presentation()
+        self.prs.slide_width = Inches(10)
+        self.prs.slide_height = Inches(5.625)
+        slide = self.prs.slides.add_slide(self.prs.slide_layouts[6])
+        lower = slide.shapes.add_textbox(Inches(1), Inches(3), Inches(8), Inches(1))
+        lower.text_frame.text = "Amém"
+        lower.text_frame.paragraphs[0].runs[0].font.size = Pt(20)
+        upper = slide.shapes.add_textbox(Inches(1), Inches(1), Inches(8), Inches(1))
+        paragraph = upper.text_frame.paragraphs[0]
+        for text, size in (("Glória ", 30), ("a Deus", 24)):
+            run = paragraph.add_run()
+            run.text = text
+            run.font.size = Pt(size)
+        self.slide = slide
+        
+        patcher = unittest.mock.patch.object(
+            processor, 'measure_multiline_text_size', fake_measure_multiline_text_size
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def test_collect_returns_records_top_to_bottom(self):
+        """Shapes are sorted by position and keep their index in slide.shapes and run sizes."""
+        text_shapes = processor.collect_slide_text_shapes(self.slide, 400)
+        
+        self.assertEqual([item.shape_index for item in text_shapes], [1, 0])
+        upper = text_shapes[0]
+        self.assertEqual(upper.max_font, 30)
+        self.assertEqual(upper.runs, [processor.RunStyle(0, 0, 30), processor.RunStyle(0, 1, 24)])
+        self.assertFalse(hasattr(upper, '__dict__'))
+    
+    def test_layout_is_picklable(self):
+        """A slide's layout holds no python-pptx objects, so it can go to another process."""
+        import pickle
+        
+        text_shapes = processor.collect_slide_text_shapes(self.slide, 400)
+        layout = processor.layout_text_shapes(text_shapes, 300 * 12700, 0, 10 * 12700)
+        
+        self.assertEqual(pickle.loads(pickle.dumps(layout)), layout)
+        self.assertEqual(layout.tops[0], 0)
+        self.assertEqual(layout.tops[1], layout.heights[0] + 10 * 12700)
+    
+    def test_font_changes_are_records(self):
+        """Every scaled run is reported with its shape name, sizes and the slide scale."""
+        result = processor.reposition_and_maximize_font(self.prs)
+        
+        changes = result['font_changes']
+        self.assertEqual([change.old_size for change in changes], [30, 24, 20])
+        self.assertEqual(len({change.scale for change in changes}), 1)
+        self.assertEqual(changes[0].shape_name, self.slide.shapes[1].name)
+        self.assertEqual(changes[0].new_size, round(30 * changes[0].scale))
+
+
+class TestThreadedMeasurement(unittest.TestCase):
+    """Test measuring slides in a thread pool."""
+    
+    def setUp(self):
+        """Five one-box slides with different texts, measured deterministically."""
+        from pptx import Presentation
+        from pptx.util import Inches, Pt
+        
+        self.prs = Presentation()
+        for index in range(5):
+            slide = self.prs.slides.add_slide(self.prs.slide_layouts[6])
+            txBox = slide.shapes.add_textbox(Inches(1), Inches(1), Inches(8), Inches(2))
+            run = txBox.text_frame.paragraphs[0].add_run()
+            run.text = "Aleluia " * (index + 1)
+            run.font.size = Pt(20)
+        
+        patcher = unittest.mock.patch.object(
+            processor, 'measure_multiline_text_size', fake_measure_multiline_text_size
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def test_map_measurement_keeps_order(self):
+        """Results come back in the order of the items, serially or in threads."""
+        items = [(n,) for n in range(20)]
+        self.assertEqual(processor.map_measurement(lambda n: n * n, items, threads=4),
+                         [n * n for n in range(20)])
+        self.assertEqual(processor.map_measurement(lambda n: n * n, items), [n * n for n in range(20)])
+    
+    def test_threads_give_same_result_as_serial(self):
+        """Reposition and auto-fit choose the same sizes with threads."""
+        import copy
+        
+        serial_prs = copy.deepcopy(self.prs)
+        serial = processor.reposition_and_maximize_font(serial_prs)
+        threaded = processor.reposition_and_maximize_font(self.prs, threads=3)
+        self.assertEqual(serial, threaded)
+        
+        self.assertEqual(processor.auto_fit_all_text(serial_prs),
+                         processor.auto_fit_all_text(self.prs, threads=3))
+    
+    @unittest.skipUnless(processor.PILLOW_AVAILABLE, "Pillow is required for measuring")
+    def test_draw_context_is_per_thread(self):
+        """Each thread reuses its own draw context."""
+        from concurrent.futures import ThreadPoolExecutor
+        
+        draw = processor.get_measure_draw()
+        self.assertIs(processor.get_measure_draw(), draw)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            other = executor.submit(processor.get_measure_draw).result()
+        self.assertIsNot(other, draw)
+    
+    @unittest.skipUnless(processor.get_font_path("Arial"), "Arial is required to load a font")
+    def test_fonts_are_shared_by_threads(self):
+        """A font loaded by one thread is reused by the next, e.g. the next batch's pool."""
+        from concurrent.futures import ThreadPoolExecutor
+        
+        font_path = processor.get_font_path("Arial")
+        with unittest.mock.patch.dict(processor._font_cache, clear=True):
+            font = processor.load_font(font_path, 31)
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                other = executor.submit(processor.load_font, font_path, 31).result()
+        self.assertIs(other, font)
+
+
+class TestChangeStreams(unittest.TestCase):
+    """Test the iter_* streams behind reposition, auto-fit and the overflow check."""
+    
+    def setUp(self):
+        """Three slides: text, no text, text reaching past the right edge."""
+        from pptx import Presentation
+        from pptx.util import Inches, Pt
+        
+        self.prs = Presentation()
+        self.prs.slide_width = Inches(10)
+        self.prs.slide_height = Inches(5.625)
+        for left in (Inches(1), None, Inches(6)):
+            slide = self.prs.slides.add_slide(self.prs.slide_layouts[6])
+            if left is None:
+                continue
+            txBox = slide.shapes.add_textbox(left, Inches(1), Inches(8), Inches(2))
+            run = txBox.text_frame.paragraphs[0].add_run()
+            run.text = "Glória a Deus"
+            run.font.size = Pt(20)
+        
+        patcher = unittest.mock.patch.object(
+            processor, 'measure_multiline_text_size', fake_measure_multiline_text_size
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def test_reposition_stream_reports_every_slide(self):
+        """Each slide ends with a SlideProgress; the list API collects the same changes."""
+        import copy
+        
+        expected = processor.reposition_and_maximize_font(copy.deepcopy(self.prs))
+        events = list(processor.iter_reposition_changes(self.prs))
+        
+        progress = [event for event in events if isinstance(event, processor.SlideProgress)]
+        self.assertEqual([(event.slide_num, event.slide_count, event.processed) for event in progress],
+                         [(1, 3, True), (2, 3, False), (3, 3, True)])
+        self.assertEqual([event for event in events if isinstance(event, processor.FontChange)],
+                         expected['font_changes'])
+        self.assertIsInstance(events[-1], processor.SlideProgress)
+    
+    def test_reposition_stream_is_lazy(self):
+        """Later slides are not touched before the consumer asks for them."""
+        original_left = self.prs.slides[2].shapes[0].left
+        events = processor.iter_reposition_changes(self.prs)
+        for event in events:
+            if isinstance(event, processor.SlideProgress):
+                break
+        
+        self.assertEqual(self.prs.slides[2].shapes[0].left, original_left)
+        self.assertNotEqual(self.prs.slides[0].shapes[0].left, self.prs.slides[2].shapes[0].left)
+        events.close()
+    
+    def test_auto_fit_stream_matches_list(self):
+        """auto_fit_all_text() returns the FontChange events of its stream."""
+        import copy
+        
+        expected = processor.auto_fit_all_text(copy.deepcopy(self.prs))
+        events = list(processor.iter_auto_fit_changes(self.prs))
+        
+        self.assertEqual([event for event in events if isinstance(event, processor.FontChange)], expected)
+        self.assertEqual(sum(isinstance(event, processor.SlideProgress) for event in events), 3)
+    
+    def test_overflow_stream(self):
+        """The box starting at 6in and 8in wide reaches 4in past the 10in slide."""
+        overflows = list(processor.iter_text_overflows(self.prs))
+        
+        self.assertEqual([overflow.slide_num for overflow in overflows], [3])
+        self.assertEqual(overflows[0].overflow_info['overflow_right'], 4 * 914400)
+        self.assertEqual(processor.check_and_report_overflow(self.prs), overflows)
+
+
+class TestScaleHints(unittest.TestCase):
+    """Test the warm-started font scale search."""
+    
+    def setUp(self):
+        """One text box laid out on a 400pt wide area, with deterministic measurement."""
+        from pptx import Presentation
+        from pptx.util import Inches, Pt
+        
+        prs = Presentation()
+        slide = prs.slides.add_slide(prs.slide_layouts[6])
+        txBox = slide.shapes.add_textbox(Inches(1), Inches(1), Inches(8), Inches(2))
+        self.run = txBox.text_frame.paragraphs[0].add_run()
+        self.run.text = "Glória a Deus"
+        self.run.font.size = Pt(20)
+        self.slide = slide
+        
+        patcher = unittest.mock.patch.object(
+            processor, 'measure_multiline_text_size', fake_measure_multiline_text_size
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def search(self, hints=None):
+        """Run the scale search; returns (best_scale, number of measurements)."""
+        text_shapes = processor.collect_slide_text_shapes(self.slide, 400)
+        layout = processor.layout_text_shapes(text_shapes, 300 * 12700, 0, 10 * 12700)
+        events = []
+        best_scale = processor.find_best_scale(
+            layout, 400, trace=lambda event, **fields: events.append(event), hints=hints
+        )
+        return best_scale, events.count('measurement')
+    
+    def test_warm_start_finds_same_scale_with_fewer_measurements(self):
+        """A remembered scale narrows the search without changing the answer."""
+        cold_scale, cold_measurements = self.search()
+        hints = processor.ScaleHintCache(None)
+        self.search(hints)
+        warm_scale, warm_measurements = self.search(hints)
+        
+        self.assertEqual(hints.hits, 1)
+        self.assertAlmostEqual(warm_scale, cold_scale, delta=processor.SCALE_TOLERANCE)
+        self.assertLess(warm_measurements, cold_measurements)
+    
+    def test_warm_start_returns_exact_cold_scale(self):
+        """Sharing a hints file never changes the chosen scale, not even within the tolerance."""
+        cold_scale, _ = self.search()
+        hints = processor.ScaleHintCache(None)
+        self.search(hints)
+        key = next(iter(hints.hints))
+        hints.put(key, cold_scale + processor.SCALE_TOLERANCE / 3, [])
+        warm_scale, _ = self.search(hints)
+        
+        self.assertEqual(hints.hits, 1)
+        self.assertEqual(warm_scale, cold_scale)
+    
+    def test_small_text_edit_reuses_hint(self):
+        """The words are not part of the fingerprint; the edited slide still gets its own answer."""
+        hints = processor.ScaleHintCache(None)
+        self.search(hints)
+        self.run.text = "Glória ao Rei"
+        cold_scale, _ = self.search()
+        warm_scale, _ = self.search(hints)
+        
+        self.assertEqual(hints.hits, 1)
+        self.assertAlmostEqual(warm_scale, cold_scale, delta=processor.SCALE_TOLERANCE)
+    
+    def test_wrong_hint_falls_back_to_full_range(self):
+        """A remembered scale the slide no longer fits around is not trusted."""
+        cold_scale, _ = self.search()
+        hints = processor.ScaleHintCache(None)
+        self.search(hints)
+        key = next(iter(hints.hints))
+        hints.put(key, cold_scale / 2, [])
+        warm_scale, _ = self.search(hints)
+        
+        self.assertEqual(hints.misses, 1)
+        self.assertEqual(warm_scale, cold_scale)
+    
+    def test_bracket_is_narrowed_to_wrap_changes(self):
+        """The bracket stops at the wrap changes next to the remembered scale."""
+        low, high = processor.warm_start_bracket({'best_scale': 4.0, 'wrap_scales': [2.0, 3.9, 4.1, 6.0]})
+        self.assertEqual((low, high), (3.9, 4.1))
+        low, high = processor.warm_start_bracket({'best_scale': 1.0, 'wrap_scales': []})
+        self.assertEqual(low, processor.MIN_SCALE)
+    
+    def test_hints_saved_and_loaded(self):
+        """Hints written by one run are read by the next."""
+        import tempfile
+        import shutil
+        
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'scale_hints.json')
+        hints = processor.ScaleHintCache(path)
+        self.search(hints)
+        hints.save()
+        
+        reloaded = processor.ScaleHintCache(path)
+        self.search(reloaded)
+        self.assertEqual(reloaded.hits, 1)
+
+
+@unittest.skipUnless(processor.NUMPY_AVAILABLE, "NumPy is required for the vectorized fit")
+class TestVectorizedFit(unittest.TestCase):
+    """Test the NumPy measurement of many font sizes at once."""
+    
+    def model(self, words=4):
+        """Words 0.5 wide (ink 0 to 0.5, top 0.2, bottom 1.0) separated by 0.25 wide spaces."""
+        import numpy as np
+        
+        return {
+            'space': 0.25,
+            'lines': [{'words': np.array([[0.5, 0.0, 0.5, 0.2, 1.0]] * words),
+                       'whole': [0.5 * words + 0.25 * (words - 1), 0.0, 0.5 * words + 0.25 * (words - 1), 0.2, 1.0]}],
+        }
+    
+    def test_wraps_greedily_per_size(self):
+        """Each size wraps on its own: one word per line at 100pt, three then one at 50pt."""
+        widths, heights = processor.measure_text_sizes(self.model(), [100, 50], max_width=100)
+        # Line height: ink (bottom - top) plus 0.40 of the font size
+        self.assertEqual(list(heights), [4 * (80 + 40), 2 * (40 + 20)])
+        self.assertEqual(list(widths), [50, 100])  # Three words: 2 units at 50pt
+    
+    def test_unwrapped_and_empty_lines(self):
+        """Without max_width lines are measured whole; empty lines add 1.35x the font size."""
+        model = self.model(2)
+        model['lines'].append(None)
+        widths, heights = processor.measure_text_sizes(model, [10.5], max_width=None)
+        self.assertEqual(widths[0], 13)  # 1.25 units at the 10px font Pillow loads, rounded out
+        self.assertAlmostEqual(heights[0], 8 + 4.2 + 10.5 * 1.35)
+    
+    def test_first_misfit_stops_the_candidates(self):
+        """Like the binary search, sizes past the first misfit are not considered."""
+        import numpy as np
+        
+        self.assertEqual(processor._first_misfit(np.array([1, 1, 0, 1, 0], dtype=bool)), 2)
+        self.assertEqual(processor._first_misfit(np.ones(5, dtype=bool)), 5)
+        self.assertEqual(processor._first_misfit(np.zeros(5, dtype=bool)), 0)
+    
+    def test_measured_fit_is_bisected(self):
+        """A vectorized pick far above the measured fit costs a bisection, not a walk down."""
+        import numpy as np
+        
+        scales = np.arange(processor.MIN_SCALE, processor.MAX_SCALE, processor.SCALE_TOLERANCE)
+        measured = []
+        
+        def fits(scale):
+            measured.append(scale)
+            return scale < 2.505
+        
+        best = processor._largest_measured_fit(scales, len(scales) - 1, fits)
+        self.assertAlmostEqual(best, 2.5)
+        self.assertLessEqual(len(measured), 12)
+        
+        measured.clear()
+        self.assertEqual(processor._largest_measured_fit(scales, 100, lambda scale: True), scales[100])
+        self.assertEqual(processor._largest_measured_fit(scales, -1, fits), scales[0])
+        self.assertEqual(measured, [])
+    
+    def test_never_larger_than_measured_fit(self):
+        """A size the word model accepts but Pillow would not is stepped down to the binary search's."""
+        from pptx import Presentation
+        from pptx.util import Inches
+        
+        prs = Presentation()
+        slide = prs.slides.add_slide(prs.slide_layouts[6])
+        txBox = slide.shapes.add_textbox(Inches(1), Inches(1), Inches(4), Inches(1))
+        txBox.text_frame.text = "Glória"
+        
+        # The model's lines are 1.2x the font size high, the measured ones 1.4x
+        with unittest.mock.patch.object(processor, 'build_text_fit_model', return_value=self.model(1)), \
+                unittest.mock.patch.object(processor, 'measure_multiline_text_size',
+                                           fake_measure_multiline_text_size):
+            binary_size = processor.calculate_max_font_size(txBox, prs.slide_width, prs.slide_height)
+            vectorized_size = processor.calculate_max_font_size(txBox, prs.slide_width, prs.slide_height,
+                                                                vectorized=True)
+        
+        self.assertEqual(binary_size, 37)
+        self.assertEqual(vectorized_size, binary_size)
+    
+    @unittest.skipUnless(processor.get_font_path("Arial"), "Arial is required to compare with Pillow")
+    def test_matches_pillow_measurement(self):
+        """The vectorized sizes stay within a few percent of measure_multiline_text_size()."""
+        text = "Santo, santo, santo, Senhor Deus do universo!\nO céu e a terra proclamam a vossa glória."
+        model = processor.build_text_fit_model(text, "Arial")
+        sizes = [24, 36, 48, 60, 72]
+        widths, heights = processor.measure_text_sizes(model, sizes, max_width=600)
+        for size, width, height in zip(sizes, widths, heights):
+            expected_width, expected_height = processor.measure_multiline_text_size(text, "Arial", size, 600)
+            self.assertAlmostEqual(width, expected_width, delta=expected_width * 0.05)
+            self.assertAlmostEqual(height, expected_height, delta=expected_height * 0.05)
+
+
+@unittest.skipUnless(processor.PILLOW_AVAILABLE, "Pillow is required for slide image export")
+class TestSlideImageExport(unittest.TestCase):
+    """Test the transparent PNG image-sequence export."""
+
+    def setUp(self):
+        """Create a processed presentation with one text slide and one empty slide."""
+        from pptx import Presentation
+        from pptx.util import Inches, Pt
+        import tempfile
+        import shutil
+
+        self.prs = Presentation()
+        self.prs.slide_width = Inches(10)
+        self.prs.slide_height = Inches(5.625)
+        slide = self.prs.slides.add_slide(self.prs.slide_layouts[6])
+        txBox = slide.shapes.add_textbox(Inches(1), Inches(1), Inches(8), Inches(2))
+        run = txBox.text_frame.paragraphs[0].add_run()
+        run.text = "Glória a Deus"
+        run.font.size = Pt(40)
+        self.prs.slides.add_slide(self.prs.slide_layouts[6])
+
+        processor.process_presentation(self.prs, "#FFFF00", 10, "0000FF")
+
+        self.output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output_dir)
+
+    def test_get_run_glow_reads_applied_glow(self):
+        """The glow written by apply_solid_glow_to_run() is read back from the run."""
+        run = self.prs.slides[0].shapes[0].text_frame.paragraphs[0].runs[0]
+        self.assertEqual(processor.get_run_glow(run), ("FFFF00", 10 * 12700))
+
+    def test_export_writes_one_png_per_slide(self):
+        """Every slide becomes a numbered PNG, in slide order."""
+        paths = processor.export_slide_images(self.prs, self.output_dir, width_px=480, jobs=1)
+        names = [os.path.basename(path) for path in paths]
+        self.assertEqual(names, ['slide_001.png', 'slide_002.png'])
+
+    def test_export_has_true_alpha(self):
+        """Text slides have transparent background with glow and text colors; empty slides are fully transparent."""
+        from PIL import Image
+
+        paths = processor.export_slide_images(self.prs, self.output_dir, width_px=480, jobs=1)
+
+        with Image.open(paths[0]) as image:
+            self.assertEqual(image.mode, 'RGBA')
+            self.assertEqual(image.size, (480, 270))
+            self.assertEqual(image.getpixel((0, 0))[3], 0)
+            colors = {pixel[:3] for count, pixel in image.getcolors(480 * 270) if pixel[3] == 255}
+            self.assertIn((255, 255, 0), colors)
+            self.assertIn((0, 0, 255), colors)
+
+        with Image.open(paths[1]) as image:
+            self.assertEqual(image.getextrema()[3], (0, 0))
+
+    def test_export_removes_stale_slides(self):
+        """PNGs left by a previous, longer export are removed."""
+        stale = os.path.join(self.output_dir, 'slide_003.png')
+        with open(stale, 'wb') as f:
+            f.write(b'')
+        processor.export_slide_images(self.prs, self.output_dir, width_px=480, jobs=1)
+        self.assertFalse(os.path.exists(stale))
+
+    def test_spawned_workers_render_without_pptx(self):
+        """Workers started by spawn (Windows, macOS) import neither python-pptx nor lxml."""
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        spec = processor.build_slide_render_spec(
+            self.prs.slides[0], self.prs.slide_width, self.prs.slide_height, 480
+        )
+        path = os.path.join(self.output_dir, 'slide.png')
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+            executor.submit(processor._render_slide_to_file, spec, path).result()
+            # A builtin, so checking does not import this test module (and python-pptx) itself
+            loaded = executor.submit(
+                eval, "sorted(name for name in __import__('sys').modules if name.startswith(('pptx', 'lxml')))"
+            ).result()
+
+        self.assertEqual(loaded, [])
+        self.assertGreater(os.path.getsize(path), 0)
+
+
+@unittest.skipUnless(processor.PILLOW_AVAILABLE, "Pillow is required for slide image export")
+class TestRenderCache(unittest.TestCase):
+    """Test reuse of unchanged slide renders between exports."""
+
+    def setUp(self):
+        """Create a processed two-slide presentation and empty cache/output directories."""
+        from pptx import Presentation
+        from pptx.util import Inches, Pt
+        import tempfile
+        import shutil
+
+        self.prs = Presentation()
+        self.prs.slide_width = Inches(10)
+        self.prs.slide_height = Inches(5.625)
+        for text in ("Santo, Santo, Santo", "Cordeiro de Deus"):
+            slide = self.prs.slides.add_slide(self.prs.slide_layouts[6])
+            txBox = slide.shapes.add_textbox(Inches(1), Inches(1), Inches(8), Inches(2))
+            run = txBox.text_frame.paragraphs[0].add_run()
+            run.text = text
+            run.font.size = Pt(40)
+        processor.process_presentation(self.prs, "#FFFF00", 10, "000000")
+
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.cache_dir = os.path.join(self.tmp, 'cache')
+
+    def export(self, cache, name='out'):
+        return processor.export_slide_images(
+            self.prs, os.path.join(self.tmp, name), width_px=320, jobs=1, cache=cache
+        )
+
+    def test_unchanged_slides_are_copied_from_cache(self):
+        """A second export renders nothing and reuses the cached files."""
+        first = processor.RenderCache(self.cache_dir)
+        self.export(first)
+        self.assertEqual((first.hits, first.misses), (0, 2))
+
+        second = processor.RenderCache(self.cache_dir)
+        with unittest.mock.patch.object(processor, '_render_slide_to_file') as render:
+            paths = self.export(second, 'out2')
+        render.assert_not_called()
+        self.assertEqual(second.hits, 2)
+        for path in paths:
+            self.assertGreater(os.path.getsize(path), 0)
+
+    def test_editing_an_export_leaves_the_cache_intact(self):
+        """Exported PNGs are not linked to cache entries."""
+        paths = self.export(processor.RenderCache(self.cache_dir))
+        with open(paths[0], 'wb') as f:
+            f.write(b'edited')
+
+        cache = processor.RenderCache(self.cache_dir)
+        paths = self.export(cache, 'out2')
+        self.assertEqual(cache.hits, 2)
+        with open(paths[0], 'rb') as f:
+            self.assertTrue(f.read().startswith(b'\x89PNG'))
+
+    def test_changed_slide_is_rendered_again(self):
+        """Only the slide whose text changed misses the cache."""
+        self.export(processor.RenderCache(self.cache_dir))
+        self.prs.slides[1].shapes[0].text_frame.paragraphs[0].runs[0].text = "Glória"
+
+        cache = processor.RenderCache(self.cache_dir)
+        self.export(cache)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_key_depends_on_style(self):
+        """The glow color is part of the cache key."""
+        slide = self.prs.slides[0]
+        spec = processor.build_slide_render_spec(slide, self.prs.slide_width, self.prs.slide_height, 320)
+        processor.process_presentation(self.prs, "#00FFFF", 10, "000000")
+        restyled = processor.build_slide_render_spec(slide, self.prs.slide_width, self.prs.slide_height, 320)
+        self.assertNotEqual(processor.RenderCache.key(spec), processor.RenderCache.key(restyled))
+
+    def test_eviction_keeps_cache_under_limit(self):
+        """Least recently used renders are removed once the cache exceeds max_bytes."""
+        cache = processor.RenderCache(self.cache_dir)
+        self.export(cache)
+        sizes = sorted(os.path.getsize(entry.path) for entry in os.scandir(self.cache_dir))
+
+        small = processor.RenderCache(self.cache_dir, max_bytes=sizes[-1])
+        small.evict()
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+
+@unittest.skipUnless(processor.PILLOW_AVAILABLE, "Pillow is required to downscale images")
+class TestDownscaleImages(unittest.TestCase):
+    """Test the oversized image downscaling and deduplication stage."""
+
+    def setUp(self):
+        """Create a 16:9 presentation."""
+        from pptx import Presentation
+        from pptx.util import Inches
+
+        self.prs = Presentation()
+        self.prs.slide_width = Inches(16)
+        self.prs.slide_height = Inches(9)
+
+    def image_blob(self, size, image_format='JPEG'):
+        import io
+        from PIL import Image
+
+        output = io.BytesIO()
+        Image.new('RGB', size, 'navy').save(output, image_format)
+        return output.getvalue()
+
+    def add_picture(self, slide, blob, left_in, width_in):
+        import io
+        from pptx.util import Inches
+
+        return slide.shapes.add_picture(io.BytesIO(blob), Inches(left_in), Inches(0), width=Inches(width_in))
+
+    def test_oversized_image_is_shrunk_to_displayed_size(self):
+        """A 4000px photo shown on half the slide is shrunk to half the target width."""
+        slide = self.prs.slides.add_slide(self.prs.slide_layouts[6])
+        picture = self.add_picture(slide, self.image_blob((4000, 3000)), 0, 8)
+
+        result = processor.downscale_images(self.prs, (1920, 1080), jobs=1)
+        self.assertEqual(result['images_downscaled'], 1)
+        self.assertLess(result['bytes_after'], result['bytes_before'])
+        self.assertEqual(picture.image.size, (960, 720))
+
+    def test_small_image_is_untouched(self):
+        """Images already within their displayed size are kept as they are."""
+        slide = self.prs.slides.add_slide(self.prs.slide_layouts[6])
+        blob = self.image_blob((400, 300))
+        picture = self.add_picture(slide, blob, 0, 8)
+
+        result = processor.downscale_images(self.prs, (1920, 1080), jobs=1)
+        self.assertEqual(result['images_downscaled'], 0)
+        self.assertEqual(picture.image.blob, blob)
+
+    def test_duplicate_image_parts_are_merged(self):
+        """Separate parts with identical content end up as one image in the saved deck."""
+        import io
+        import zipfile
+        from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+        from pptx.parts.image import Image as PptxImage, ImagePart
+
+        blob = self.image_blob((4000, 3000), 'PNG')
+        for _ in range(2):
+            slide = self.prs.slides.add_slide(self.prs.slide_layouts[6])
+            picture = self.add_picture(slide, blob, 0, 4)
+        # python-pptx dedupes on insert, so force a separate copy like a pasted slide has
+        duplicate = ImagePart.new(self.prs.part.package, PptxImage.from_blob(blob))
+        picture._element.blipFill.blip.set(
+            processor.RELATIONSHIP_NS + 'embed', slide.part.relate_to(duplicate, RT.IMAGE)
+        )
+
+        result = processor.downscale_images(self.prs, (1920, 1080), jobs=1)
+        self.assertEqual(result['images'], 1)
+        self.assertEqual(result['duplicates_merged'], 1)
+
+        output = io.BytesIO()
+        self.prs.save(output)
+        media = [name for name in zipfile.ZipFile(output).namelist() if name.startswith('ppt/media/')]
+        self.assertEqual(len(media), 1)
+
+
+class TestCompactTextStyles(unittest.TestCase):
+    """Test moving the per-run glow and color to the shape's list style."""
+
+    def setUp(self):
+        """Create a slide with a karaoke-style text box (one run per word)."""
+        from pptx import Presentation
+        from pptx.util import Inches
+
+        self.prs = Presentation()
+        slide = self.prs.slides.add_slide(self.prs.slide_layouts[6])
+        self.text_frame = slide.shapes.add_textbox(Inches(1), Inches(1), Inches(8), Inches(2)).text_frame
+        for word in ("Glória", "a", "Deus", "nas", "alturas"):
+            self.text_frame.paragraphs[0].add_run().text = word + " "
+        processor.process_presentation(self.prs, "#FFFFE0", 20, "#050505")
+
+    def test_shared_style_is_hoisted_to_shape(self):
+        """Runs lose their own glow and color but still resolve to them through the shape."""
+        result = processor.compact_text_styles(self.prs)
+
+        self.assertEqual(result['shapes_compacted'], 1)
+        self.assertEqual(result['runs_compacted'], 5)
+        self.assertLess(result['xml_bytes_after'], result['xml_bytes_before'])
+        for run in self.text_frame.paragraphs[0].runs:
+            self.assertEqual(run._r.rPr.find(f'{processor.DRAWINGML_NS}effectLst'), None)
+            self.assertEqual(processor.get_run_glow(run), ('FFFFE0', 20 * 12700))
+            fill = processor.get_shape_level_defRPr(run).find(f'{processor.DRAWINGML_NS}solidFill')
+            self.assertEqual(fill.find(f'{processor.DRAWINGML_NS}srgbClr').get('val'), '050505')
+
+    def test_mixed_styles_keep_per_run(self):
+        """A level whose runs differ is left as it is."""
+        from pptx.dml.color import RGBColor
+
+        self.text_frame.paragraphs[0].runs[2].font.color.rgb = RGBColor(0xFF, 0, 0)
+        result = processor.compact_text_styles(self.prs)
+
+        self.assertEqual(result['shapes_compacted'], 0)
+        self.assertEqual(result['runs_per_run'], 5)
+        self.assertEqual(result['xml_bytes_after'], result['xml_bytes_before'])
+        self.assertEqual(str(self.text_frame.paragraphs[0].runs[2].font.color.rgb), 'FF0000')
+
+    def test_render_spec_unchanged(self):
+        """The PNG export reads the same colors and glows after compaction."""
+        def text_runs(spec):
+            return [run for shape in spec['shapes'] for paragraph in shape['paragraphs']
+                    for run in paragraph['runs'] if run['text'].strip()]
+
+        slide = self.prs.slides[0]
+        size = (self.prs.slide_width, self.prs.slide_height)
+        before = text_runs(processor.build_slide_render_spec(slide, *size))
+        processor.compact_text_styles(self.prs)
+        after = text_runs(processor.build_slide_render_spec(slide, *size))
+        self.assertEqual(before, after)
+
+
 if __name__ == '__main__':
     unittest.main(verbosity=2)
@@ -1,73 +1,253 @@
-from pptx import Presentation
+"""
+Inspects how glow (and leftover shadow) effects are stored in a .pptx.
+
+Streams every slide, slide layout and slide master XML part straight from the
+zip with iterparse, without building a python-pptx Presentation, and reports
+per part:
+  - text runs with and without a:glow, either in their own run properties or
+    inherited from their shape's list style (a:lstStyle/a:lvlNpPr/a:defRPr,
+    written by the shape-level style option of fix_slides_for_obs)
+  - glow radii (pt) and colors found in the part
+  - leftover shadow effects (a:outerShdw, a:innerShdw, a:prstShdw)
+
+Only runs with non-blank text are counted, matching the runs the OBS fix
+pipeline applies glow to. Slides are listed in presentation order.
+
+Usage:
+    python inspect-glow.py Apresentação1_fixed.pptx
+    python inspect-glow.py deck.pptx --only-issues
+"""
+
+import argparse
+import posixpath
+import re
+import sys
+import time
 import zipfile
 import xml.etree.ElementTree as ET
+from collections import Counter
+
+A = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+P = "{http://schemas.openxmlformats.org/presentationml/2006/main}"
+R = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+PKG_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+RUN_TAG = A + "r"
+RUN_PROPERTIES_TAG = A + "rPr"
+PARAGRAPH_TAG = A + "p"
+PARAGRAPH_PROPERTIES_TAG = A + "pPr"
+LIST_STYLE_TAG = A + "lstStyle"
+TEXT_BODY_TAG = P + "txBody"
+EFFECT_TAGS = (A + "effectLst", A + "effectDag")
+TEXT_TAG = A + "t"
+GLOW_TAG = A + "glow"
+SHADOW_TAGS = {A + "outerShdw", A + "innerShdw", A + "prstShdw"}
+COLOR_TAGS = {A + "srgbClr", A + "schemeClr", A + "prstClr", A + "sysClr"}
+# Elements after which nothing inside is needed anymore; cleared to keep memory flat
+CLEAR_TAGS = {P + "sp", P + "pic", P + "graphicFrame", P + "cxnSp", P + "grpSp"}
+
+EMU_PER_PT = 12700
+LAYOUT_PATTERN = re.compile(r"^ppt/slideLayouts/slideLayout(\d+)\.xml$")
+MASTER_PATTERN = re.compile(r"^ppt/slideMasters/slideMaster(\d+)\.xml$")
+LEVEL_PATTERN = re.compile(r"^lvl(\d)pPr$")
+
+
+def slide_part_names(package):
+    """Slide part names in presentation order (sldIdLst), falling back to file order."""
+    try:
+        rels = ET.fromstring(package.read("ppt/_rels/presentation.xml.rels"))
+        presentation = ET.fromstring(package.read("ppt/presentation.xml"))
+    except KeyError:
+        return sorted(
+            (name for name in package.namelist() if re.match(r"^ppt/slides/slide\d+\.xml$", name)),
+            key=lambda name: int(re.search(r"(\d+)\.xml$", name).group(1)),
+        )
 
-# This script will extract and show the XML structure of text with glow
-INPUT_FILE = "Apresentação1_fixed.pptx"
+    targets = {rel.get("Id"): rel.get("Target") for rel in rels.iter(PKG_REL + "Relationship")}
+    names = []
+    for slide_id in presentation.iter(P + "sldId"):
+        target = targets.get(slide_id.get(R + "id"))
+        if target:
+            names.append(posixpath.normpath(posixpath.join("ppt", target)).lstrip("/"))
+    return names
 
-def inspect_presentation():
+
+def numbered_parts(package, pattern):
+    """Part names matching pattern, sorted by their number."""
+    matches = [(pattern.match(name), name) for name in package.namelist()]
+    return [name for match, name in sorted(
+        ((match, name) for match, name in matches if match),
+        key=lambda item: int(item[0].group(1)),
+    )]
+
+
+def glow_description(glow):
+    """Radius in points and color of an a:glow element, e.g. (10.0, 'FFFF00 alpha=100%')."""
+    radius_pt = int(glow.get("rad", "0")) / EMU_PER_PT
+    color = "?"
+    for child in glow:
+        if child.tag in COLOR_TAGS:
+            color = child.get("val") or child.get("lastClr") or "?"
+            alpha = child.find(A + "alpha")
+            if alpha is not None:
+                color += f" alpha={int(alpha.get('val', '100000')) / 1000:g}%"
+            break
+    return round(radius_pt, 2), color
+
+
+def list_style_glow_levels(list_style):
+    """Paragraph levels (0-8) whose default run properties in an a:lstStyle carry a glow."""
+    levels = set()
+    for child in list_style:
+        match = LEVEL_PATTERN.match(child.tag[len(A):])
+        if match and child.find(A + "defRPr/" + A + "effectLst/" + GLOW_TAG) is not None:
+            levels.add(int(match.group(1)) - 1)
+    return levels
+
+
+def inspect_part(package, name):
     """
-    Extracts the raw XML to see how PowerPoint stores the glow effect
+    Streams one XML part and collects its glow statistics.
+
+    Returns:
+        Dict with runs, runs_with_glow (own or inherited from the shape),
+        runs_with_shape_glow, style_glows, glows (Counter of (radius_pt, color))
+        and shadows (Counter of shadow tag names).
     """
-    print(f"Inspecting {INPUT_FILE}...")
-    
-    # Method 1: Using python-pptx to inspect runs
-    prs = Presentation(INPUT_FILE)
-    
-    print("\n=== METHOD 1: Inspecting via python-pptx ===")
-    for slide_num, slide in enumerate(prs.slides, 1):
-        print(f"\n--- Slide {slide_num} ---")
-        for shape in slide.shapes:
-            if shape.has_text_frame and shape.text_frame.text.strip():
-                print(f"\nShape: {shape.name} (Type: {'Placeholder' if shape.is_placeholder else 'TextBox'})")
-                print(f"Text preview: {shape.text_frame.text[:50]}...")
-                
-                for para_idx, paragraph in enumerate(shape.text_frame.paragraphs):
-                    for run_idx, run in enumerate(paragraph.runs):
-                        if run.text.strip():
-                            print(f"  Run {run_idx}: '{run.text[:30]}...'")
-                            # Get the raw XML of this run
-                            run_xml = ET.tostring(run._r, encoding='unicode')
-                            print(f"  XML (first 500 chars): {run_xml[:500]}")
-                            if 'glow' in run_xml.lower():
-                                print(f"  *** FOUND GLOW in this run! ***")
-                                print(f"  Full XML:\n{run_xml}")
-                            break  # Only check first run per paragraph
-                    break  # Only check first paragraph per shape
-        
-        if slide_num >= 2:  # Only check first 2 slides
-            break
-    
-    # Method 2: Direct ZIP inspection
-    print("\n\n=== METHOD 2: Direct ZIP inspection ===")
-    print("Looking at slide1.xml directly...")
-    
-    with zipfile.ZipFile(INPUT_FILE, 'r') as zip_ref:
-        # Read the first slide's XML
-        slide1_xml = zip_ref.read('ppt/slides/slide1.xml').decode('utf-8')
-        
-        # Look for glow elements
-        if 'glow' in slide1_xml.lower():
-            print("Found 'glow' in slide1.xml!")
-            # Extract just the sections with glow
-            lines = slide1_xml.split('>')
-            for i, line in enumerate(lines):
-                if 'glow' in line.lower():
-                    # Print context around the glow
-                    start = max(0, i-3)
-                    end = min(len(lines), i+4)
-                    context = '>'.join(lines[start:end])
-                    print(f"\nGlow context:\n{context}\n")
-        else:
-            print("No 'glow' found in slide1.xml")
-            print(f"First 1000 chars of slide1.xml:\n{slide1_xml[:1000]}")
+    stats = {
+        "runs": 0,
+        "runs_with_glow": 0,
+        "runs_with_shape_glow": 0,
+        "style_glows": 0,
+        "glows": Counter(),
+        "shadows": Counter(),
+    }
+    glow_count = 0
+    own_glows = 0
+    # The list style and paragraph properties end before the runs they apply to
+    shape_glow_levels = set()
+    paragraph_level = 0
+
+    with package.open(name) as part:
+        for _, elem in ET.iterparse(part, events=("end",)):
+            tag = elem.tag
+            if tag == GLOW_TAG:
+                glow_count += 1
+                stats["glows"][glow_description(elem)] += 1
+            elif tag in SHADOW_TAGS:
+                stats["shadows"][tag[len(A):]] += 1
+            elif tag == RUN_TAG:
+                text = "".join(t.text or "" for t in elem.iter(TEXT_TAG))
+                if text.strip():
+                    stats["runs"] += 1
+                    rpr = elem.find(RUN_PROPERTIES_TAG)
+                    if rpr is not None and rpr.find(A + "effectLst/" + GLOW_TAG) is not None:
+                        stats["runs_with_glow"] += 1
+                        own_glows += 1
+                    elif paragraph_level in shape_glow_levels and (
+                        rpr is None or not any(rpr.find(effect) is not None for effect in EFFECT_TAGS)
+                    ):
+                        stats["runs_with_glow"] += 1
+                        stats["runs_with_shape_glow"] += 1
+            elif tag == PARAGRAPH_PROPERTIES_TAG:
+                paragraph_level = int(elem.get("lvl", "0"))
+            elif tag == PARAGRAPH_TAG:
+                paragraph_level = 0
+            elif tag == LIST_STYLE_TAG:
+                shape_glow_levels = list_style_glow_levels(elem)
+            elif tag == TEXT_BODY_TAG:
+                shape_glow_levels = set()
+            elif tag in CLEAR_TAGS:
+                elem.clear()
+
+    # Glows that are not on counted runs live in list styles, defRPr, endParaRPr, etc.
+    stats["style_glows"] = glow_count - own_glows
+    return stats
+
+
+def format_counter(counter, formatter):
+    return ", ".join(f"{formatter(key)} x{count}" for key, count in counter.most_common()) or "-"
+
+
+def print_part(label, stats):
+    runs = stats["runs"]
+    with_glow = stats["runs_with_glow"]
+    shape_glow = f" (from shape {stats['runs_with_shape_glow']})" if stats["runs_with_shape_glow"] else ""
+    print(f"{label}: runs={runs} with_glow={with_glow}{shape_glow} without_glow={runs - with_glow}"
+          f" style_glows={stats['style_glows']}")
+    if stats["glows"]:
+        print(f"    glow: {format_counter(stats['glows'], lambda key: f'{key[0]:g}pt {key[1]}')}")
+    if stats["shadows"]:
+        print(f"    shadows: {format_counter(stats['shadows'], str)}")
+
+
+def has_issues(kind, stats):
+    """
+    A part needs attention when a shadow is left over or, on slides, when some
+    text run lacks glow (layout and master prompt text is never glowed).
+    """
+    missing_glow = kind == "Slide" and stats["runs"] > stats["runs_with_glow"]
+    return missing_glow or bool(stats["shadows"])
+
+
+def inspect_presentation(path, only_issues=False):
+    """Inspects every slide, layout and master of the package and prints the report."""
+    start = time.perf_counter()
+    totals = {
+        "runs": 0,
+        "runs_with_glow": 0,
+        "runs_with_shape_glow": 0,
+        "style_glows": 0,
+        "glows": Counter(),
+        "shadows": Counter(),
+    }
+
+    with zipfile.ZipFile(path) as package:
+        groups = [
+            ("Slide", slide_part_names(package)),
+            ("Layout", numbered_parts(package, LAYOUT_PATTERN)),
+            ("Master", numbered_parts(package, MASTER_PATTERN)),
+        ]
+        for kind, names in groups:
+            if not names:
+                continue
+            print(f"\n=== {kind}s ({len(names)}) ===")
+            for number, name in enumerate(names, 1):
+                stats = inspect_part(package, name)
+                for key in ("runs", "runs_with_glow", "runs_with_shape_glow", "style_glows"):
+                    totals[key] += stats[key]
+                totals["glows"].update(stats["glows"])
+                totals["shadows"].update(stats["shadows"])
+                if only_issues and not has_issues(kind, stats):
+                    continue
+                print_part(f"{kind} {number} ({posixpath.basename(name)})", stats)
+
+    elapsed = time.perf_counter() - start
+    print("\n=== Total ===")
+    print_part("All parts", totals)
+    print(f"Inspected {path} in {elapsed:.3f}s")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Reports glow and shadow effects of every slide, layout and master of a .pptx."
+    )
+    parser.add_argument("input_file", help="The .pptx file to inspect")
+    parser.add_argument(
+        "--only-issues",
+        action="store_true",
+        help="Only list slides with text runs lacking glow and parts with leftover shadows",
+    )
+    return parser.parse_args()
+
 
 if __name__ == "__main__":
+    args = parse_args()
     try:
-        inspect_presentation()
+        inspect_presentation(args.input_file, args.only_issues)
     except FileNotFoundError:
-        print(f"Error: Could not find file '{INPUT_FILE}'")
-    except Exception as e:
-        print(f"Error: {e}")
-        import traceback
-        traceback.print_exc()
+        print(f"Error: Could not find file '{args.input_file}'")
+        sys.exit(1)
+    except (zipfile.BadZipFile, ET.ParseError) as e:
+        print(f"Error: '{args.input_file}' is not a valid .pptx: {e}")
+        sys.exit(1)
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Banco de áudios pré-gerados para anunciar as horas a cada 15 minutos.
+
+Os anúncios usam as mesmas palavras que o speak_time.vbs fala pelo SAPI ("The
+time is now, 2 hours and 15 minutes PM"), para que o anúncio não mude conforme
+venha do banco ou do SAPI.
+
+"build" usa o pipeline do text-to-speech.py (mesmos backends, cache e novas
+tentativas) para sintetizar uma única vez os 96 anúncios de 00:00 a 23:45 e
+grava tudo num só arquivo: um índice JSON seguido das amostras PCM de todos os
+clipes, um depois do outro.
+
+"play" só lê o índice, busca o clipe do quarto de hora mais próximo e toca, sem
+nenhuma síntese na hora. É o que a tarefa agendada (speak_time.vbs) chama.
+
+Formato do banco:
+    BANK_MAGIC, tamanho do índice (uint32 little-endian), índice JSON em UTF-8,
+    amostras PCM. O índice guarda o formato do áudio e, para cada "HH:MM", o
+    deslocamento (a partir do início das amostras) e o tamanho em bytes.
+
+Uso:
+    python speak_time_bank.py build
+    python speak_time_bank.py build --backend fake --voice en-US-Wavenet-D
+    python speak_time_bank.py play
+    python speak_time_bank.py play --time 14:15 --output clipe.wav
+"""
+
+import argparse
+import datetime
+import importlib.util
+import io
+import json
+import os
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+TEXT_TO_SPEECH_SCRIPT = os.path.join(SCRIPT_DIR, "text-to-speech.py")
+DEFAULT_BANK = os.path.join(SCRIPT_DIR, "speak_time_bank.bin")
+
+BANK_MAGIC = b"SPEAKTIME1\n"
+QUARTER_HOURS = [(hour, minute) for hour in range(24) for minute in (0, 15, 30, 45)]
+
+DEFAULT_VOICE = "en-US-Neural2-D"
+DEFAULT_LANGUAGE = "en-US"
+DEFAULT_PITCH = 0.0
+DEFAULT_SPEAKING_RATE = 1.0
+
+
+def time_key(hour, minute):
+    return f"{hour:02d}:{minute:02d}"
+
+
+def announcement_text(hour, minute):
+    """Texto falado para o horário, igual ao que o speak_time.vbs monta para o SAPI."""
+    day_period = "AM" if hour < 12 else "PM"
+    if hour > 12:
+        hour -= 12
+
+    if minute == 0:
+        return f"<speak>The time is now, {hour} hours {day_period}</speak>"
+    return f"<speak>The time is now, {hour} hours and {minute} minutes {day_period}</speak>"
+
+
+def load_text_to_speech():
+    """Importa o text-to-speech.py (o nome com hífen impede um import comum)."""
+    spec = importlib.util.spec_from_file_location("text_to_speech", TEXT_TO_SPEECH_SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def build_bank(args):
+    """Sintetiza os 96 anúncios e grava o banco."""
+    tts = load_text_to_speech()
+
+    cache = None
+    if not args.no_cache:
+        cache = tts.AudioCache(args.cache_dir, int(tts.DEFAULT_CACHE_MAX_MB * 1024 * 1024))
+    synthesizer = tts.SYNTHESIZERS[args.backend]()
+
+    def synthesize(quarter):
+        request = tts.SynthesisRequest(
+            ssml=announcement_text(*quarter),
+            language_code=args.language,
+            voice_name=args.voice,
+            pitch=args.pitch,
+            speaking_rate=args.rate,
+            audio_encoding=tts.DEFAULT_ENCODING,
+        )
+        audio, _ = tts.synthesize_with_retries(synthesizer, request, cache, args.retries)
+        return audio
+
+    with ThreadPoolExecutor(max_workers=args.jobs) as executor:
+        clips = list(executor.map(synthesize, QUARTER_HOURS))
+
+    index = {"clips": {}}
+    pcm = io.BytesIO()
+    for (hour, minute), clip in zip(QUARTER_HOURS, clips):
+        with wave.open(io.BytesIO(clip), "rb") as wav:
+            params = {
+                "channels": wav.getnchannels(),
+                "sample_width": wav.getsampwidth(),
+                "sample_rate": wav.getframerate(),
+            }
+            frames = wav.readframes(wav.getnframes())
+        if index.setdefault("format", params) != params:
+            raise ValueError(f"Clipe {time_key(hour, minute)} com formato diferente dos demais: {params}")
+        index["clips"][time_key(hour, minute)] = [pcm.tell(), len(frames)]
+        pcm.write(frames)
+
+    header = json.dumps(index, sort_keys=True).encode("utf-8")
+    bank_dir = os.path.dirname(os.path.abspath(args.bank))
+    fd, temp_path = tempfile.mkstemp(dir=bank_dir, suffix=".tmp")
+    with open(fd, "wb") as f:
+        f.write(BANK_MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        f.write(pcm.getvalue())
+    os.replace(temp_path, args.bank)
+
+    size_mb = os.path.getsize(args.bank) / (1024 * 1024)
+    print(f'Banco com {len(QUARTER_HOURS)} anúncios salvo em "{args.bank}" ({size_mb:.1f} MB)')
+
+
+def read_clip(bank_path, key):
+    """
+    Lê um clipe do banco sem carregar os demais.
+
+    Returns:
+        O clipe como um WAV completo (bytes).
+    """
+    with open(bank_path, "rb") as f:
+        if f.read(len(BANK_MAGIC)) != BANK_MAGIC:
+            raise ValueError(f"{bank_path} não é um banco de anúncios de horário")
+        (header_size,) = struct.unpack("<I", f.read(4))
+        index = json.loads(f.read(header_size).decode("utf-8"))
+        offset, size = index["clips"][key]
+        f.seek(len(BANK_MAGIC) + 4 + header_size + offset)
+        frames = f.read(size)
+
+    audio_format = index["format"]
+    output = io.BytesIO()
+    with wave.open(output, "wb") as wav:
+        wav.setnchannels(audio_format["channels"])
+        wav.setsampwidth(audio_format["sample_width"])
+        wav.setframerate(audio_format["sample_rate"])
+        wav.writeframes(frames)
+    return output.getvalue()
+
+
+def nearest_quarter(moment):
+    """Quarto de hora mais próximo (a tarefa agendada pode disparar com atraso)."""
+    minutes = round((moment.hour * 60 + moment.minute + moment.second / 60) / 15) * 15 % (24 * 60)
+    return minutes // 60, minutes % 60
+
+
+def play_wav(audio):
+    """Toca um WAV em memória: winsound no Windows, player de linha de comando nos demais."""
+    if sys.platform == "win32":
+        import winsound
+        winsound.PlaySound(audio, winsound.SND_MEMORY)
+        return
+
+    player = next((shutil.which(name) for name in ("aplay", "paplay", "afplay") if shutil.which(name)), None)
+    if player is None:
+        raise RuntimeError("Nenhum player encontrado (aplay, paplay ou afplay); use --output")
+    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
+        f.write(audio)
+    try:
+        subprocess.run([player, f.name], check=True)
+    finally:
+        os.remove(f.name)
+
+
+def play(args):
+    """Toca (ou grava) o clipe do horário."""
+    if args.time:
+        hour, minute = (int(part) for part in args.time.split(":"))
+        hour, minute = nearest_quarter(datetime.datetime(2000, 1, 1, hour, minute))
+    else:
+        hour, minute = nearest_quarter(datetime.datetime.now())
+
+    audio = read_clip(args.bank, time_key(hour, minute))
+    if args.output:
+        with open(args.output, "wb") as out:
+            out.write(audio)
+        print(f'Clipe de {time_key(hour, minute)} salvo em "{args.output}"')
+    else:
+        play_wav(audio)
+
+
+def parse_args():
+    """Processa os argumentos da linha de comando."""
+    parser = argparse.ArgumentParser(
+        description="Gera e toca o banco de anúncios de horário a cada 15 minutos."
+    )
+    parser.add_argument(
+        "--bank",
+        default=DEFAULT_BANK,
+        help=f"Arquivo do banco. Padrão: {DEFAULT_BANK}",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="Sintetiza os 96 anúncios e grava o banco.")
+    build.add_argument("--backend", default="google", help="Backend de síntese (google ou fake). Padrão: google")
+    build.add_argument("--voice", default=DEFAULT_VOICE, help=f"Voz. Padrão: {DEFAULT_VOICE}")
+    build.add_argument("--language", default=DEFAULT_LANGUAGE, help=f"Idioma. Padrão: {DEFAULT_LANGUAGE}")
+    build.add_argument("--pitch", type=float, default=DEFAULT_PITCH, help=f"Tom. Padrão: {DEFAULT_PITCH}")
+    build.add_argument(
+        "--rate",
+        type=float,
+        default=DEFAULT_SPEAKING_RATE,
+        help=f"Velocidade da fala. Padrão: {DEFAULT_SPEAKING_RATE}",
+    )
+    build.add_argument("--jobs", type=int, default=4, help="Sínteses simultâneas. Padrão: 4")
+    build.add_argument("--retries", type=int, default=3, help="Novas tentativas por anúncio. Padrão: 3")
+    build.add_argument(
+        "--cache-dir",
+        default=os.path.join(os.path.expanduser("~"), ".cache", "text_to_speech"),
+        help="Diretório do cache de áudios do text-to-speech.py.",
+    )
+    build.add_argument("--no-cache", action="store_true", help="Não usa o cache de áudios.")
+
+    play_parser = commands.add_parser("play", help="Toca o anúncio do quarto de hora mais próximo.")
+    play_parser.add_argument("--time", help="Horário HH:MM em vez da hora atual.")
+    play_parser.add_argument("--output", help="Grava o clipe neste WAV em vez de tocar.")
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.command == "build":
+        build_bank(args)
+    else:
+        play(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Unit tests for extract_base64_images.
+
+Run with: python -m pytest tests/test_extract_base64_images.py -v
+Or from tests/: python -m pytest test_extract_base64_images.py -v
+"""
+import unittest
+import unittest.mock
+import base64
+import contextlib
+import io
+import os
+import re
+import sys
+import shutil
+import tempfile
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import extract_base64_images as extractor
+
+
+def inline_image(alt, content):
+    """Inline Markdown image with content as its Base64 data."""
+    return f"![{alt}](data:image/png;base64,{base64.b64encode(content).decode('ascii')})\n"
+
+
+class TestPersistentIndex(unittest.TestCase):
+    """Test re-runs over a directory with the persistent image index."""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.md_path = os.path.join(self.tmp, 'a.md')
+
+    def extract(self, *images):
+        """Write a.md with the given (alt, content) images and run the script over the directory."""
+        with open(self.md_path, 'w', encoding='utf-8') as f:
+            f.writelines(inline_image(alt, content) for alt, content in images)
+        with unittest.mock.patch.object(sys, 'argv', ['extract_base64_images.py', self.tmp]), \
+                contextlib.redirect_stdout(io.StringIO()):
+            extractor.main()
+
+    def image_contents(self):
+        """alt -> content of the file the cleaned Markdown points to."""
+        with open(os.path.join(self.tmp, 'a_limpo.md'), encoding='utf-8') as f:
+            links = re.findall(r"!\[(\w+)\]\(([^)]+)\)", f.read())
+        contents = {}
+        for alt, rel_path in links:
+            with open(os.path.join(self.tmp, rel_path), 'rb') as f:
+                contents[alt] = f.read()
+        return contents
+
+    def test_edited_document_never_overwrites_indexed_image(self):
+        """Renumbered inline images do not write over a file the index still maps to another image."""
+        self.extract(('x', b'image X'), ('y', b'image Y'))
+        self.extract(('y', b'image Y'), ('z', b'image Z, edited in'))
+
+        self.assertEqual(self.image_contents(), {'y': b'image Y', 'z': b'image Z, edited in'})
+        with open(os.path.join(self.tmp, 'images', 'a_img_1.png'), 'rb') as f:
+            self.assertEqual(f.read(), b'image X')
+
+    def test_deleted_image_frees_its_name(self):
+        """An index entry whose file was deleted is dropped, and the name is used again."""
+        self.extract(('x', b'image X'))
+        os.remove(os.path.join(self.tmp, 'images', 'a_img_1.png'))
+        self.extract(('z', b'image Z, edited in'))
+
+        self.assertEqual(os.listdir(os.path.join(self.tmp, 'images')), ['a_img_1.png'])
+        self.assertEqual(self.image_contents(), {'z': b'image Z, edited in'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,13 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Gera anúncios falados a partir de SSML com o Google Cloud Text-to-Speech.
+
+O áudio retornado fica em um cache local, indexado pelo hash da requisição
+completa (backend, SSML, voz, tom, velocidade e codificação): repetir um anúncio
+que não mudou não faz nenhuma chamada de rede. O cache é limitado por tamanho,
+descartando primeiro os áudios usados há mais tempo.
+
+O backend de síntese é plugável: "google" chama a API e "fake" gera localmente
+um WAV determinístico, para testar sem rede nem credenciais.
+
+No modo lote (--batch), lê uma lista de anúncios em YAML, CSV ou Markdown e
+sintetiza todos em paralelo (--jobs), com novas tentativas em caso de falha,
+gravando um WAV por anúncio em --output-dir. Anúncios que já têm arquivo de
+saída são pulados.
+
+Textos acima do limite da API (--max-ssml-bytes) são divididos em fins de frase
+ou parágrafo, preservando os elementos <prosody>/<emphasis> abertos; os pedaços
+são sintetizados em paralelo e as amostras LINEAR16 emendadas num único WAV.
+
+Formatos do lote (campos voice, pitch e rate são opcionais em YAML e CSV):
+    YAML:     lista de itens com name e ssml (ou text)
+    CSV:      cabeçalho com as colunas name e ssml (ou text)
+    Markdown: cada título "## nome" seguido do texto/SSML do anúncio
+
+Uso:
+    python text-to-speech.py
+    python text-to-speech.py --ssml-file anuncio.xml -o anuncio.wav
+    python text-to-speech.py --backend fake --no-cache
+    python text-to-speech.py --batch avisos.yaml --output-dir avisos --jobs 4
+"""
+
+import argparse
+import csv
+import hashlib
+import io
+import json
+import math
 import os
+import re
+import struct
+import sys
+import tempfile
+import threading
+import time
+import wave
+from collections import namedtuple
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+CREDENTIALS_FILE = r"../gen-lang-client-0919356485-43fd5df838f2.json"
 
-os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = r"../gen-lang-client-0919356485-43fd5df838f2.json"
+DEFAULT_OUTPUT = "anuncio_animado_ssml.wav"
+DEFAULT_LANGUAGE = "pt-BR"
+DEFAULT_VOICE = "pt-BR-Neural2-B"
+# DEFAULT_VOICE = "pt-BR-Chirp3-HD-Orus"
+# DEFAULT_VOICE = "pt-BR-Wavenet-D"
+# DEFAULT_VOICE = "pt-BR-Neural2-C"
+DEFAULT_PITCH = 1.7            # Tom um pouco mais agudo/alegre
+DEFAULT_SPEAKING_RATE = 1.7    # Mais rápido
+DEFAULT_ENCODING = "LINEAR16"
 
-from google.cloud import texttospeech
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "text_to_speech")
+DEFAULT_CACHE_MAX_MB = 512
 
-client = texttospeech.TextToSpeechClient()
+DEFAULT_BATCH_OUTPUT_DIR = "anuncios"
+DEFAULT_BATCH_JOBS = 4
+DEFAULT_RETRIES = 3
+RETRY_BASE_DELAY = 1.0         # Segundos; dobra a cada nova tentativa
+MAX_SSML_BYTES = 5000          # Limite de entrada da API; textos maiores são divididos
 
 # 1. Defina o seu texto usando tags SSML
-ssml_text = """
+SSML_TEXT = """
 <speak>
     Alô! É com <emphasis level="strong">muita alegria</emphasis> que!
     E <emphasis level="moderate">olha só</emphasis>: depois tem um <prosody rate="slow" pitch="-1st">delicioso</prosody> esperando por vocês!
@@ -15,32 +81,621 @@ ssml_text = """
 </speak>
 """
 
-text_input = "Some text"
-
-audio_config = texttospeech.AudioConfig(
-    pitch=1.7,           # Tom um pouco mais agudo/alegre
-    speaking_rate=1.7,   # 30% mais rápido
-    audio_encoding=texttospeech.AudioEncoding.LINEAR16,
-)
-
-synthesis_input = texttospeech.SynthesisInput(ssml=ssml_text)
-# synthesis_input = texttospeech.SynthesisInput(text=text_input)
-
-# 3. Selecione a voz
-voice = texttospeech.VoiceSelectionParams(
-    language_code="pt-BR",
-    name="pt-BR-Neural2-B"
-    # name="pt-BR-Chirp3-HD-Orus"
-    # name="pt-BR-Wavenet-D"
-    # name="pt-BR-Neural2-C"
-)
-
-# 5. Gere o áudio
-response = client.synthesize_speech(
-    input=synthesis_input, voice=voice, audio_config=audio_config
-)
-
-# Salve o arquivo
-with open("anuncio_animado_ssml.wav", "wb") as out:
-    out.write(response.audio_content)
-    print('Áudio salvo no arquivo "anuncio_animado_ssml.wav"')
+
+class SynthesisRequest(namedtuple(
+    "SynthesisRequest",
+    ["ssml", "language_code", "voice_name", "pitch", "speaking_rate", "audio_encoding"],
+)):
+    """Parâmetros completos de uma síntese; tudo que muda o áudio retornado."""
+
+    def cache_key(self, backend_name):
+        """Hash SHA-256 da requisição completa, incluindo o backend."""
+        payload = json.dumps(dict(self._asdict(), backend=backend_name), sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class GoogleSynthesizer:
+    """Backend que chama a API do Google Cloud Text-to-Speech."""
+
+    name = "google"
+
+    def __init__(self, credentials_file=CREDENTIALS_FILE):
+        if credentials_file:
+            os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = credentials_file
+
+        # Importa só quando o backend é usado: o backend "fake" não precisa da biblioteca
+        from google.cloud import texttospeech
+        self.texttospeech = texttospeech
+        self.client = texttospeech.TextToSpeechClient()
+
+    def synthesize(self, request):
+        """Sintetiza o SSML e retorna o conteúdo do áudio (WAV para LINEAR16)."""
+        texttospeech = self.texttospeech
+
+        audio_config = texttospeech.AudioConfig(
+            pitch=request.pitch,
+            speaking_rate=request.speaking_rate,
+            audio_encoding=getattr(texttospeech.AudioEncoding, request.audio_encoding),
+        )
+        synthesis_input = texttospeech.SynthesisInput(ssml=request.ssml)
+        voice = texttospeech.VoiceSelectionParams(
+            language_code=request.language_code,
+            name=request.voice_name,
+        )
+
+        response = self.client.synthesize_speech(
+            input=synthesis_input, voice=voice, audio_config=audio_config
+        )
+        return response.audio_content
+
+
+class FakeSynthesizer:
+    """
+    Backend local para testes sem rede: gera um WAV LINEAR16 mono determinístico,
+    com um tom cuja frequência e duração dependem da requisição.
+    """
+
+    name = "fake"
+    sample_rate = 24000
+
+    def synthesize(self, request):
+        """Retorna um WAV com ~60 ms de tom por caractere do SSML (mínimo 0,2 s)."""
+        digest = hashlib.sha256(repr(tuple(request)).encode("utf-8")).digest()
+        frequency = 200 + digest[0] * 2
+        duration = max(0.2, len(request.ssml.strip()) * 0.06 / request.speaking_rate)
+        frames = int(self.sample_rate * duration)
+
+        samples = struct.pack(
+            f"<{frames}h",
+            *(int(8000 * math.sin(2 * math.pi * frequency * i / self.sample_rate)) for i in range(frames))
+        )
+        output = io.BytesIO()
+        with wave.open(output, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(self.sample_rate)
+            wav.writeframes(samples)
+        return output.getvalue()
+
+
+SYNTHESIZERS = {
+    GoogleSynthesizer.name: GoogleSynthesizer,
+    FakeSynthesizer.name: FakeSynthesizer,
+}
+
+
+class AudioCache:
+    """
+    Cache em disco dos áudios sintetizados, um arquivo por hash de requisição.
+    Quando o total passa de max_bytes, remove os arquivos menos usados (mtime mais
+    antigo; cada leitura atualiza o mtime).
+    """
+
+    suffix = ".audio"
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.directory, key + self.suffix)
+
+    def get(self, key):
+        """Retorna o áudio em cache, ou None."""
+        path = self.path(key)
+        try:
+            with open(path, "rb") as f:
+                audio = f.read()
+        except FileNotFoundError:
+            return None
+        os.utime(path)  # Marca como usado recentemente
+        return audio
+
+    def put(self, key, audio):
+        """Grava o áudio (de forma atômica) e aplica o limite de tamanho."""
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with open(fd, "wb") as f:
+            f.write(audio)
+        os.replace(temp_path, self.path(key))
+        with self.lock:
+            self.evict()
+
+    def evict(self):
+        """Remove os áudios usados há mais tempo até caber em max_bytes."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(self.suffix):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+
+def synthesize_cached(synthesizer, request, cache=None, limit=None):
+    """
+    Sintetiza a requisição, consultando o cache antes de chamar o backend.
+
+    Args:
+        limit: Semáforo que limita as chamadas simultâneas ao backend (opcional).
+
+    Returns:
+        Tupla (audio, veio_do_cache).
+    """
+    key = request.cache_key(synthesizer.name)
+    if cache is not None:
+        audio = cache.get(key)
+        if audio is not None:
+            return audio, True
+
+    with limit if limit is not None else nullcontext():
+        audio = synthesizer.synthesize(request)
+    if cache is not None:
+        cache.put(key, audio)
+    return audio, False
+
+
+def synthesize_with_retries(synthesizer, request, cache=None, retries=DEFAULT_RETRIES, limit=None):
+    """
+    Como synthesize_cached, mas tenta de novo (com espera exponencial) quando o
+    backend falha. A espera não ocupa uma vaga de limit.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return synthesize_cached(synthesizer, request, cache, limit)
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(RETRY_BASE_DELAY * 2 ** attempt)
+
+
+SSML_TAG_PATTERN = re.compile(r"<\s*(/)?\s*([A-Za-z_][\w:.-]*)?[^>]*?(/)?\s*>")
+SPEAK_PATTERN = re.compile(r"^\s*(<speak\b[^>]*>)(.*)</speak>\s*$", re.DOTALL)
+# Fim de frase (pontuação seguida de espaço) ou de parágrafo (linha em branco)
+SENTENCE_END_PATTERN = re.compile(r"(?<=[.!?…;:])\s+|\n\s*\n")
+# Elementos cujo fechamento também é um bom ponto de corte
+BOUNDARY_ELEMENTS = {"p", "s", "paragraph", "sentence"}
+
+
+def ssml_atoms(body):
+    """
+    Quebra o corpo do SSML em átomos (tags e trechos de texto).
+
+    Yields:
+        Tuplas (texto, tag_name, kind, boundary_after), onde kind é "open",
+        "close", "empty" ou "text", e boundary_after indica que dá para cortar
+        logo depois do átomo.
+    """
+    position = 0
+    for match in SSML_TAG_PATTERN.finditer(body):
+        if match.start() > position:
+            yield from _text_atoms(body[position:match.start()])
+        tag = match.group(0)
+        closing, name, self_closing = match.groups()
+        if closing:
+            yield tag, name, "close", name in BOUNDARY_ELEMENTS
+        elif self_closing or not name:
+            # Inclui <break/>, comentários e instruções de processamento
+            yield tag, name, "empty", name == "break"
+        else:
+            yield tag, name, "open", False
+        position = match.end()
+    if position < len(body):
+        yield from _text_atoms(body[position:])
+
+
+def _text_atoms(text):
+    """Divide um trecho de texto em frases, marcando cada fim de frase."""
+    position = 0
+    for match in SENTENCE_END_PATTERN.finditer(text):
+        yield text[position:match.end()], None, "text", True
+        position = match.end()
+    if position < len(text):
+        yield text[position:], None, "text", False
+
+
+def _split_long_texts(atoms, max_bytes):
+    """
+    Troca frases maiores que max_bytes por palavras com ponto de corte entre
+    elas, para o caso raro de uma frase que sozinha não cabe num pedaço.
+    """
+    for atom in atoms:
+        text, _, kind, boundary = atom
+        if kind == "text" and len(text.encode("utf-8")) > max_bytes:
+            words = re.findall(r"\S+\s*|\s+", text)
+            for word in words[:-1]:
+                yield word, None, "text", True
+            yield words[-1], None, "text", boundary
+        else:
+            yield atom
+
+
+def split_ssml(ssml, max_bytes=MAX_SSML_BYTES):
+    """
+    Divide um SSML longo em documentos <speak> de até max_bytes (UTF-8), cortando
+    em fins de frase ou parágrafo. Elementos abertos no ponto de corte (prosody,
+    emphasis, etc.) são fechados no fim de um pedaço e reabertos no início do
+    seguinte, com os mesmos atributos.
+
+    Returns:
+        Lista de documentos SSML, na ordem de leitura.
+    """
+    if len(ssml.encode("utf-8")) <= max_bytes:
+        return [ssml]
+
+    match = SPEAK_PATTERN.match(ssml)
+    if match:
+        speak_open, body = match.groups()
+    else:
+        speak_open, body = "<speak>", ssml
+    speak_close = "</speak>"
+
+    def size(text):
+        return len(text.encode("utf-8"))
+
+    def render(start_stack, atoms, end_stack):
+        opens = "".join(tag for _, tag in start_stack)
+        closes = "".join(f"</{name}>" for name, _ in reversed(end_stack))
+        return speak_open + opens + "".join(atoms) + closes + speak_close
+
+    def overhead(start_stack, end_stack):
+        return size(render(start_stack, [], end_stack))
+
+    chunks = []
+    start_stack = []      # Elementos abertos no início do pedaço atual: (nome, tag de abertura)
+    stack = []            # Elementos abertos depois do último átomo
+    current = []          # Átomos do pedaço atual
+    current_bytes = 0
+    cut = None            # Último ponto de corte: (índice em current, pilha naquele ponto)
+
+    def emit(atoms, end_stack):
+        chunk = render(start_stack, atoms, end_stack)
+        # Pedaços só com tags ou espaços não têm o que falar
+        if re.sub(r"<[^>]*>", "", chunk).strip() or "<break" in chunk:
+            chunks.append(chunk)
+
+    for text, name, kind, boundary in _split_long_texts(ssml_atoms(body), max_bytes // 2):
+        next_stack = stack
+        if kind == "open":
+            next_stack = stack + [(name, text)]
+        elif kind == "close" and stack and stack[-1][0] == name:
+            next_stack = stack[:-1]
+
+        while current and current_bytes + size(text) + overhead(start_stack, next_stack) > max_bytes:
+            if cut is not None:
+                index, cut_stack = cut
+                emit(current[:index], cut_stack)
+                current = current[index:]
+                start_stack = cut_stack
+            else:
+                emit(current, stack)
+                current = []
+                start_stack = stack
+            current_bytes = sum(size(atom) for atom in current)
+            cut = None
+
+        current.append(text)
+        current_bytes += size(text)
+        stack = next_stack
+        if boundary:
+            cut = (len(current), stack)
+
+    if current:
+        emit(current, stack)
+    return chunks
+
+
+def concatenate_wav(wav_chunks):
+    """
+    Junta WAVs PCM (LINEAR16) num único WAV, copiando as amostras como estão,
+    sem decodificar nem recodificar e sem inserir silêncio entre os pedaços.
+    """
+    if len(wav_chunks) == 1:
+        return wav_chunks[0]
+
+    output = io.BytesIO()
+    params = None
+    with wave.open(output, "wb") as out:
+        for chunk in wav_chunks:
+            with wave.open(io.BytesIO(chunk), "rb") as wav:
+                chunk_params = (wav.getnchannels(), wav.getsampwidth(), wav.getframerate())
+                if params is None:
+                    params = chunk_params
+                    out.setnchannels(params[0])
+                    out.setsampwidth(params[1])
+                    out.setframerate(params[2])
+                elif chunk_params != params:
+                    raise ValueError(f"Pedaços de áudio com formatos diferentes: {params} e {chunk_params}")
+                out.writeframes(wav.readframes(wav.getnframes()))
+    return output.getvalue()
+
+
+def synthesize_long(synthesizer, request, cache=None, retries=DEFAULT_RETRIES,
+                    jobs=DEFAULT_BATCH_JOBS, max_bytes=MAX_SSML_BYTES, limit=None):
+    """
+    Sintetiza um SSML de qualquer tamanho: divide em pedaços dentro do limite da
+    API, sintetiza os pedaços em paralelo (cada um com seu próprio cache) e junta
+    os WAVs na ordem original.
+
+    Args:
+        limit: Semáforo das chamadas ao backend, compartilhado entre os anúncios do
+            lote (padrão: um semáforo próprio com jobs vagas).
+
+    Returns:
+        Tupla (audio, veio_do_cache), verdadeiro só se todos os pedaços vieram do cache.
+    """
+    if limit is None:
+        limit = threading.BoundedSemaphore(jobs)
+    chunks = split_ssml(request.ssml, max_bytes)
+    if len(chunks) == 1:
+        return synthesize_with_retries(synthesizer, request._replace(ssml=chunks[0]), cache, retries, limit)
+
+    if request.audio_encoding != "LINEAR16":
+        raise ValueError("Textos longos só podem ser divididos com a codificação LINEAR16")
+
+    with ThreadPoolExecutor(max_workers=max(1, min(jobs, len(chunks)))) as executor:
+        results = list(executor.map(
+            lambda chunk: synthesize_with_retries(synthesizer, request._replace(ssml=chunk), cache, retries, limit),
+            chunks,
+        ))
+    audio = concatenate_wav([chunk_audio for chunk_audio, _ in results])
+    return audio, all(cached for _, cached in results)
+
+
+def as_ssml(text):
+    """Envolve o texto em <speak> quando ele ainda não é um documento SSML."""
+    text = text.strip()
+    if text.startswith("<speak"):
+        return text
+    return f"<speak>{text}</speak>"
+
+
+def load_announcements(path):
+    """
+    Lê a lista de anúncios de um arquivo YAML, CSV ou Markdown.
+
+    Returns:
+        Lista de dicionários com name e ssml, e opcionalmente voice, pitch e rate.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, "r", encoding="utf-8-sig") as f:
+        if extension in (".yaml", ".yml"):
+            import yaml
+            data = yaml.safe_load(f) or []
+            if isinstance(data, dict):
+                data = data.get("announcements", [])
+            entries = [dict(item) for item in data]
+        elif extension == ".csv":
+            entries = [dict(row) for row in csv.DictReader(f)]
+        elif extension in (".md", ".markdown"):
+            entries = parse_markdown_announcements(f.read())
+        else:
+            raise ValueError(f"Formato de lote não suportado: {extension} (use .yaml, .csv ou .md)")
+
+    announcements = []
+    for number, entry in enumerate(entries, 1):
+        name = str(entry.get("name") or "").strip()
+        text = entry.get("ssml") or entry.get("text") or ""
+        if not name or not str(text).strip():
+            raise ValueError(f"Anúncio {number} de {path} sem name ou ssml/text")
+        announcement = {"name": name, "ssml": as_ssml(str(text))}
+        for field in ("voice", "pitch", "rate"):
+            if entry.get(field) not in (None, ""):
+                announcement[field] = entry[field]
+        announcements.append(announcement)
+    return announcements
+
+
+def parse_markdown_announcements(markdown):
+    """Cada título '## nome' abre um anúncio; o texto até o próximo título é o conteúdo."""
+    entries = []
+    for match in re.finditer(r"^##[ \t]+(.+?)[ \t]*\n(.*?)(?=^##[ \t]|\Z)", markdown, re.MULTILINE | re.DOTALL):
+        entries.append({"name": match.group(1), "text": match.group(2)})
+    return entries
+
+
+def output_filename(name):
+    """Nome de arquivo seguro para o anúncio."""
+    safe = re.sub(r"[^\w\-]+", "_", name).strip("_")
+    return (safe or "anuncio") + ".wav"
+
+
+def run_batch(args, synthesizer, cache):
+    """
+    Sintetiza em paralelo todos os anúncios do lote que ainda não têm saída. No
+    máximo args.jobs chamadas ao backend ficam em andamento ao mesmo tempo, somando
+    os anúncios e os pedaços de textos longos.
+
+    Raises:
+        ValueError: Se dois anúncios resultam no mesmo arquivo de saída.
+    """
+    announcements = load_announcements(args.batch)
+
+    names_by_file = {}
+    for announcement in announcements:
+        names_by_file.setdefault(output_filename(announcement["name"]), []).append(announcement["name"])
+    duplicates = [names for names in names_by_file.values() if len(names) > 1]
+    if duplicates:
+        listed = "; ".join(", ".join(f'"{name}"' for name in names) for names in duplicates)
+        raise ValueError(f"Anúncios com o mesmo arquivo de saída em {args.batch}: {listed}")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    pending = []
+    skipped = 0
+    for announcement in announcements:
+        output = os.path.join(args.output_dir, output_filename(announcement["name"]))
+        if os.path.exists(output) and not args.overwrite:
+            skipped += 1
+            continue
+        request = SynthesisRequest(
+            ssml=announcement["ssml"],
+            language_code=args.language,
+            voice_name=announcement.get("voice", args.voice),
+            pitch=float(announcement.get("pitch", args.pitch)),
+            speaking_rate=float(announcement.get("rate", args.rate)),
+            audio_encoding=DEFAULT_ENCODING,
+        )
+        pending.append((announcement["name"], output, request))
+
+    failed = 0
+    limit = threading.BoundedSemaphore(args.jobs)
+    with ThreadPoolExecutor(max_workers=args.jobs) as executor:
+        futures = {
+            executor.submit(
+                synthesize_long, synthesizer, request, cache, args.retries, args.jobs, args.max_ssml_bytes, limit
+            ): (name, output)
+            for name, output, request in pending
+        }
+        for future in as_completed(futures):
+            name, output = futures[future]
+            try:
+                audio, cached = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"Erro em '{name}': {e}")
+                continue
+            # Grava via temporário: um arquivo incompleto seria pulado na próxima execução
+            with open(output + ".tmp", "wb") as out:
+                out.write(audio)
+            os.replace(output + ".tmp", output)
+            origin = " (do cache)" if cached else ""
+            print(f'"{name}" salvo em "{output}"{origin}')
+
+    print(f"\nGerados: {len(pending) - failed}, já existentes: {skipped}, com erro: {failed}")
+    return failed == 0
+
+
+def parse_args():
+    """Processa os argumentos da linha de comando."""
+    parser = argparse.ArgumentParser(
+        description="Gera um áudio a partir de SSML com o Google Cloud Text-to-Speech."
+    )
+    parser.add_argument(
+        "--ssml-file",
+        help="Arquivo com o SSML a sintetizar. Padrão: o anúncio definido em SSML_TEXT.",
+    )
+    parser.add_argument(
+        "-o", "--output",
+        default=DEFAULT_OUTPUT,
+        help=f"Arquivo de áudio gerado. Padrão: {DEFAULT_OUTPUT}",
+    )
+    parser.add_argument("--voice", default=DEFAULT_VOICE, help=f"Voz. Padrão: {DEFAULT_VOICE}")
+    parser.add_argument("--language", default=DEFAULT_LANGUAGE, help=f"Idioma. Padrão: {DEFAULT_LANGUAGE}")
+    parser.add_argument("--pitch", type=float, default=DEFAULT_PITCH, help=f"Tom. Padrão: {DEFAULT_PITCH}")
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=DEFAULT_SPEAKING_RATE,
+        help=f"Velocidade da fala. Padrão: {DEFAULT_SPEAKING_RATE}",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=sorted(SYNTHESIZERS),
+        default=GoogleSynthesizer.name,
+        help="Backend de síntese ('fake' gera um áudio local, sem rede). Padrão: google",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=DEFAULT_CACHE_DIR,
+        help=f"Diretório do cache de áudios. Padrão: {DEFAULT_CACHE_DIR}",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=float,
+        default=DEFAULT_CACHE_MAX_MB,
+        help=f"Tamanho máximo do cache em MB. Padrão: {DEFAULT_CACHE_MAX_MB}",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Sempre chama o backend, sem ler nem gravar o cache.",
+    )
+    parser.add_argument(
+        "--batch",
+        help="Lista de anúncios (.yaml, .csv ou .md) para sintetizar em lote.",
+    )
+    parser.add_argument(
+        "--output-dir",
+        default=DEFAULT_BATCH_OUTPUT_DIR,
+        help=f"Diretório dos WAVs do lote. Padrão: {DEFAULT_BATCH_OUTPUT_DIR}",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=DEFAULT_BATCH_JOBS,
+        help=f"Sínteses simultâneas (anúncios do lote ou pedaços de um texto longo). Padrão: {DEFAULT_BATCH_JOBS}",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=DEFAULT_RETRIES,
+        help=f"Novas tentativas por anúncio quando a síntese falha. Padrão: {DEFAULT_RETRIES}",
+    )
+    parser.add_argument(
+        "--max-ssml-bytes",
+        type=int,
+        default=MAX_SSML_BYTES,
+        help=f"Tamanho máximo de cada pedaço enviado à API; textos maiores são divididos. Padrão: {MAX_SSML_BYTES}",
+    )
+    parser.add_argument(
+        "--overwrite",
+        action="store_true",
+        help="No lote, sintetiza de novo anúncios que já têm arquivo de saída.",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    cache = None
+    if not args.no_cache:
+        cache = AudioCache(args.cache_dir, int(args.cache_max_mb * 1024 * 1024))
+
+    synthesizer = SYNTHESIZERS[args.backend]()
+
+    if args.batch:
+        if not run_batch(args, synthesizer, cache):
+            sys.exit(1)
+        return
+
+    ssml_text = SSML_TEXT
+    if args.ssml_file:
+        with open(args.ssml_file, "r", encoding="utf-8") as f:
+            ssml_text = f.read()
+
+    request = SynthesisRequest(
+        ssml=ssml_text,
+        language_code=args.language,
+        voice_name=args.voice,
+        pitch=args.pitch,
+        speaking_rate=args.rate,
+        audio_encoding=DEFAULT_ENCODING,
+    )
+
+    audio, cached = synthesize_long(
+        synthesizer, request, cache, args.retries, args.jobs, args.max_ssml_bytes
+    )
+
+    # Salve o arquivo
+    with open(args.output, "wb") as out:
+        out.write(audio)
+    origin = " (do cache)" if cached else ""
+    print(f'Áudio salvo no arquivo "{args.output}"{origin}')
+
+
+if __name__ == "__main__":
+    main()